@@ -0,0 +1,20 @@
+"""Key source and injector backends for the Clipdex listener."""
+
+from .base import Backend, Injector, KeyEvent, KeySource
+
+BACKENDS = ("pynput", "memory")
+
+
+def create_backend(name: str = "pynput") -> Backend:
+    """Creates a backend by name. Backend modules are imported lazily so that
+    the in-memory backend works on machines without a display."""
+    if name == "pynput":
+        from .pynput_backend import PynputBackend
+        return PynputBackend()
+    if name == "memory":
+        from .memory import MemoryBackend
+        return MemoryBackend()
+    raise ValueError(f"Unknown keyboard backend: {name}")
+
+
+__all__ = ["Backend", "Injector", "KeyEvent", "KeySource", "BACKENDS", "create_backend"]
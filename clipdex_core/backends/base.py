@@ -0,0 +1,78 @@
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Optional
+
+
+class KeyEvent:
+    """
+    A backend-neutral key press.
+
+    *name* is set for special keys ("space", "enter", "backspace", "esc",
+    "tab", "shift", ...) and is None for ordinary character keys. *char* is
+    the text the key produces, if any. *injected* is True/False when the
+    backend can tell synthetic events apart and None when it cannot.
+    """
+
+    __slots__ = ("char", "name", "injected")
+
+    def __init__(self, char: Optional[str] = None, name: Optional[str] = None,
+                 injected: Optional[bool] = None):
+        self.char = char
+        self.name = name
+        self.injected = injected
+
+    def __repr__(self) -> str:
+        return f"KeyEvent(char={self.char!r}, name={self.name!r}, injected={self.injected!r})"
+
+
+# Text produced by the special keys that insert something
+SPECIAL_KEY_TEXT = {"space": " ", "enter": "\n", "tab": "\t"}
+
+KeyCallback = Callable[[KeyEvent], None]
+
+
+class KeySource(ABC):
+    """Delivers system-wide key presses to a callback."""
+
+    @abstractmethod
+    def start(self, on_press: KeyCallback) -> None:
+        """Starts delivering key presses to *on_press* (from a background thread)."""
+
+    @abstractmethod
+    def stop(self) -> None:
+        """Stops delivering key presses."""
+
+    @abstractmethod
+    def join(self) -> None:
+        """Blocks until the source has stopped."""
+
+    def check_permissions(self) -> None:
+        """Reports missing OS permissions; a no-op for backends that need none."""
+
+
+class Injector(ABC):
+    """Sends synthetic key presses to the focused application."""
+
+    @abstractmethod
+    def backspace(self) -> None:
+        """Presses and releases Backspace once."""
+
+    @abstractmethod
+    def write(self, text: str) -> None:
+        """Types *text*."""
+
+    @abstractmethod
+    def send(self, chord: str) -> None:
+        """Presses and releases a key combination such as "ctrl+v"."""
+
+
+class Backend:
+    """A key source and an injector that work together, plus an optional clipboard.
+
+    *clipboard* follows the interface of clipdex_core.clipboard.Clipboard;
+    None means the system clipboard.
+    """
+
+    def __init__(self, source: KeySource, injector: Injector, clipboard: Optional[Any] = None):
+        self.source = source
+        self.injector = injector
+        self.clipboard = clipboard
@@ -0,0 +1,163 @@
+import threading
+from typing import List, Optional
+
+from ..edit_plan import graphemes
+from .base import SPECIAL_KEY_TEXT, Backend, Injector, KeyCallback, KeyEvent, KeySource
+
+# Reverse of SPECIAL_KEY_TEXT: which key produces a given character
+_KEY_FOR_TEXT = {text: name for name, text in SPECIAL_KEY_TEXT.items()}
+
+
+def event_for_char(char: str, injected: Optional[bool] = None) -> KeyEvent:
+    """Returns the key press that types *char*."""
+    return KeyEvent(char=char, name=_KEY_FOR_TEXT.get(char), injected=injected)
+
+
+class TextBuffer:
+    """
+    Simulates the text field that has keyboard focus.
+
+    Backspace removes one grapheme cluster before the cursor; Left and Right
+    move the cursor by one grapheme cluster.
+    """
+
+    _TAIL = 32  # Code points examined to find the last grapheme cluster
+
+    def __init__(self, text: str = ""):
+        self._chars: List[str] = list(text)
+        self.cursor = len(self._chars)
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chars)
+
+    def clear(self) -> None:
+        self._chars.clear()
+        self.cursor = 0
+
+    def insert(self, text: str) -> None:
+        self._chars[self.cursor:self.cursor] = text
+        self.cursor += len(text)
+
+    def _grapheme_before(self) -> int:
+        """Code points in the grapheme cluster just before the cursor."""
+        if not self.cursor:
+            return 0
+        start = max(0, self.cursor - self._TAIL)
+        return len(graphemes("".join(self._chars[start:self.cursor]))[-1])
+
+    def apply(self, event: KeyEvent) -> None:
+        if event.name == "backspace":
+            length = self._grapheme_before()
+            del self._chars[self.cursor - length:self.cursor]
+            self.cursor -= length
+        elif event.name == "left":
+            self.cursor -= self._grapheme_before()
+        elif event.name == "right":
+            if self.cursor < len(self._chars):
+                end = self.cursor + self._TAIL
+                self.cursor += len(graphemes("".join(self._chars[self.cursor:end]))[0])
+        elif event.char is not None:
+            self.insert(event.char)
+
+
+class MemoryClipboard:
+    """Clipboard stand-in with the same interface as clipdex_core.clipboard.Clipboard."""
+
+    def __init__(self) -> None:
+        self.text: Optional[str] = None
+
+    def available(self) -> bool:
+        return True
+
+    def get_text(self) -> Optional[str]:
+        return self.text
+
+    def set_text(self, text: str) -> bool:
+        self.text = text
+        return True
+
+
+class MemoryKeySource(KeySource):
+    """Key source fed programmatically; every event is applied to the text buffer first."""
+
+    def __init__(self, buffer: TextBuffer):
+        self.buffer = buffer
+        self._on_press: Optional[KeyCallback] = None
+        self._lock = threading.RLock()  # Serialises callbacks like an OS hook thread
+        self._stopped = threading.Event()
+
+    def start(self, on_press: KeyCallback) -> None:
+        self._on_press = on_press
+        self._stopped.clear()
+
+    def stop(self) -> None:
+        self._on_press = None
+        self._stopped.set()
+
+    def join(self) -> None:
+        self._stopped.wait()
+
+    def emit(self, event: KeyEvent, apply_to_buffer: bool = True) -> None:
+        with self._lock:
+            if apply_to_buffer:
+                self.buffer.apply(event)
+            if self._on_press is not None:
+                self._on_press(event)
+
+
+class MemoryInjector(Injector):
+    """Injector that edits the text buffer and echoes its events back, like an OS hook would."""
+
+    def __init__(self, source: MemoryKeySource, clipboard: MemoryClipboard, report_injected: bool = True):
+        self._source = source
+        self._clipboard = clipboard
+        # Platforms without an injected flag report None for every event
+        self._injected: Optional[bool] = True if report_injected else None
+
+    def backspace(self) -> None:
+        self._source.emit(KeyEvent(name="backspace", injected=self._injected))
+
+    def write(self, text: str) -> None:
+        for char in text:
+            self._source.emit(event_for_char(char, self._injected))
+
+    def send(self, chord: str) -> None:
+        keys = chord.split("+")
+        for key in keys:
+            if len(key) == 1:
+                event = KeyEvent(char=key, injected=self._injected)
+            else:
+                event = KeyEvent(name=key, injected=self._injected)
+            # Keys of a chord do not insert text themselves; a single key (Left, ...) acts normally
+            self._source.emit(event, apply_to_buffer=len(keys) == 1)
+        if keys[-1] == "v" and self._clipboard.text is not None:
+            self._source.buffer.insert(self._clipboard.text)
+
+
+class MemoryBackend(Backend):
+    """
+    Headless backend: a simulated text field plus helpers to type into it.
+
+    Runs the full listener state machine without a display or OS hooks,
+    for tests and benchmarks.
+    """
+
+    def __init__(self, report_injected: bool = True):
+        self.buffer = TextBuffer()
+        clipboard = MemoryClipboard()
+        source = MemoryKeySource(self.buffer)
+        super().__init__(source, MemoryInjector(source, clipboard, report_injected), clipboard)
+
+    @property
+    def text(self) -> str:
+        return self.buffer.text
+
+    def type(self, text: str) -> None:
+        """Simulates the user typing *text*."""
+        for char in text:
+            self.source.emit(event_for_char(char, injected=False))
+
+    def press(self, name: str) -> None:
+        """Simulates the user pressing a special key such as "backspace" or "esc"."""
+        self.source.emit(KeyEvent(char=SPECIAL_KEY_TEXT.get(name), name=name, injected=False))
@@ -0,0 +1,82 @@
+import sys
+from typing import Optional
+
+from pynput import keyboard as pynput_keyboard
+import keyboard as system_keyboard
+
+from .base import SPECIAL_KEY_TEXT, Backend, Injector, KeyCallback, KeyEvent, KeySource
+
+# Platforms whose injected flag can be trusted; elsewhere events report None
+_RELIABLE_INJECTED_FLAG = sys.platform.startswith("win") or sys.platform == "darwin"
+
+
+class PynputKeySource(KeySource):
+    """Key source built on a pynput keyboard listener."""
+
+    def __init__(self) -> None:
+        self._listener: Optional[pynput_keyboard.Listener] = None
+        self._on_press: Optional[KeyCallback] = None
+
+    def start(self, on_press: KeyCallback) -> None:
+        self._on_press = on_press
+        self._listener = pynput_keyboard.Listener(on_press=self._handle_press)
+        self._listener.start()
+
+    def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+
+    def join(self) -> None:
+        if self._listener is not None:
+            self._listener.join()
+
+    def check_permissions(self) -> None:
+        """Check if the app has necessary permissions on MacOS."""
+        try:
+            # Try to start a test listener to check permissions
+            test_listener = pynput_keyboard.Listener(on_press=lambda x: None)
+            test_listener.start()
+            test_listener.stop()
+            print("✓ macOS keyboard permissions checked - OK")
+        except Exception as e:
+            print("⚠️  macOS permission issue detected!")
+            print("Follow these steps to allow Clipdex to work:")
+            print("1. System Preferences > Security & Privacy > Privacy > Accessibility")
+            print("2. Click the '+' button and add the Clipdex application")
+            print("3. Check the box next to Clipdex")
+            print("4. Restart the application")
+            print(f"Error details: {e}")
+
+    def _handle_press(self, key, injected=False) -> None:
+        if self._on_press is not None:
+            self._on_press(translate_key(key, injected if _RELIABLE_INJECTED_FLAG else None))
+
+
+def translate_key(key, injected: Optional[bool] = None) -> KeyEvent:
+    """Converts a pynput key into a KeyEvent."""
+    if isinstance(key, pynput_keyboard.Key):
+        name = key.name
+        return KeyEvent(char=SPECIAL_KEY_TEXT.get(name), name=name, injected=injected)
+    if isinstance(key, pynput_keyboard.KeyCode):
+        return KeyEvent(char=key.char, injected=injected)
+    return KeyEvent(injected=injected)
+
+
+class KeyboardInjector(Injector):
+    """Injector built on the ``keyboard`` package."""
+
+    def backspace(self) -> None:
+        system_keyboard.press_and_release('backspace')
+
+    def write(self, text: str) -> None:
+        system_keyboard.write(text)
+
+    def send(self, chord: str) -> None:
+        system_keyboard.send(chord)
+
+
+class PynputBackend(Backend):
+    """System-wide backend: pynput for input and the ``keyboard`` package for output."""
+
+    def __init__(self) -> None:
+        super().__init__(PynputKeySource(), KeyboardInjector())
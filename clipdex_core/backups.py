@@ -0,0 +1,273 @@
+import gzip
+import json
+import marshal
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .packed_snippets import PackedSnippets, text_digest
+from .paths import get_user_data_dir
+
+# (backup number, unix time, "full" or "delta")
+BackupPoint = Tuple[int, int, str]
+
+
+class BackupManager:
+    """
+    Incremental, gzip-compressed backups of the snippet library.
+
+    Every backup is one numbered file in the backup folder
+    (``000042.json.gz``). A *full* backup holds the whole library; a *delta*
+    holds only the snippets added, changed or deleted since the backup
+    before it. Changes are found by comparing a short hash of every
+    expansion with the hashes recorded at the last backup (``state.bin``),
+    so an unchanged library costs a signature check and a changed one a
+    hashing pass; only the changed texts are written.
+
+    A full backup is taken every ``FULL_EVERY`` backups; the newest
+    ``KEEP_FULL`` full backups are kept together with their deltas, older
+    ones are deleted. Any kept backup can be restored.
+    """
+
+    FULL_EVERY = 24
+    KEEP_FULL = 4
+    _SUFFIX = ".json.gz"
+    _FULL_HEADER = b'{"kind": "full"'
+
+    def __init__(self, directory: Union[str, Path, None] = None):
+        if directory is None:
+            directory = get_user_data_dir() / "backups"
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.state_path = self.directory / "state.bin"
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def backup(self, snippet_manager, full: bool = False) -> Optional[int]:
+        """Backs up the library if it changed since the last backup; returns the new backup number."""
+        with self._lock:
+            state = self._load_state()
+            signature = snippet_manager.signature()
+            if not full and state["seq"] and signature is not None and signature == state["signature"]:
+                return None
+            snippets = snippet_manager.load_mapping()
+            if isinstance(snippets, PackedSnippets):
+                digests = snippets.digests()
+            else:
+                digests = {k: text_digest(v) for k, v in snippets.items()}
+            files = self._files()
+            # A delta needs the backup it builds on; if that is gone, start a new chain
+            full = full or state["seq"] not in files or state["since_full"] + 1 >= self.FULL_EVERY
+
+            def dump_full(f):
+                self._dump_full(f, snippets)
+
+            if full:
+                dump = dump_full
+            else:
+                previous = state["digests"]
+                changed = [k for k, d in digests.items() if previous.get(k) != d]
+                deleted = [k for k in previous if k not in digests]
+                if not changed and not deleted:
+                    state["signature"] = signature
+                    self._save_state(state)
+                    return None
+                delta = {"kind": "delta", "base": state["seq"],
+                         "set": {k: snippets[k] for k in changed}, "delete": deleted}
+
+                def dump(f):
+                    f.write(json.dumps(delta, ensure_ascii=False).encode("utf-8"))
+
+            seq = max(files, default=0) + 1
+            if seq != state["seq"] + 1:
+                dump = dump_full  # Another process backed up in between; the delta would miss its changes
+            seq, full = self._write(seq, dump, dump_full, dump is dump_full)
+            self._save_state({"seq": seq, "signature": signature, "digests": digests,
+                              "since_full": 0 if full else state["since_full"] + 1})
+            if full:
+                self._rotate()
+            return seq
+
+    def points(self) -> List[BackupPoint]:
+        """Every restorable backup as ``(number, unix time, kind)``, oldest first."""
+        points = []
+        for seq, path in sorted(self._files().items()):
+            try:
+                stamp = int(path.stat().st_mtime)
+                kind = "full" if self._is_full(path) else "delta"
+            except (OSError, EOFError):
+                continue  # Rotated away meanwhile, or still being written
+            points.append((seq, stamp, kind))
+        return points
+
+    def snapshot(self, seq: int) -> Dict[str, str]:
+        """Rebuilds the library as it was at backup *seq*."""
+        files = self._files()
+        if seq not in files:
+            raise ValueError(f"No backup {seq}")
+        # Walk back to the full backup the chain starts from, then replay the deltas
+        chain = []
+        current = seq
+        while True:
+            if current not in files:
+                raise ValueError(f"Backup {current} is missing; cannot restore {seq}")
+            data = self._read(files[current])
+            chain.append(data)
+            if data.get("kind") == "full":
+                break
+            current = data["base"]
+        snippets: Dict[str, str] = chain.pop()["snippets"]
+        for delta in reversed(chain):
+            for shortcut in delta["delete"]:
+                snippets.pop(shortcut, None)
+            snippets.update(delta["set"])
+        return snippets
+
+    def restore(self, snippet_manager, seq: int) -> int:
+        """
+        Replaces the library with backup *seq* and returns the number of snippets.
+
+        The current library is backed up first, so a restore can be undone.
+        """
+        snippets = self.snapshot(seq)
+        self.backup(snippet_manager)
+        snippet_manager.save_snippets(snippets)
+        return len(snippets)
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _files(self) -> Dict[int, Path]:
+        files = {}
+        for path in self.directory.glob("*" + self._SUFFIX):
+            name = path.name[:-len(self._SUFFIX)]
+            if name.isdigit():
+                files[int(name)] = path
+        return files
+
+    def _write(self, seq: int, dump: Callable[[Any], None], dump_full: Callable[[Any], None],
+               full: bool) -> Tuple[int, bool]:
+        """Writes the next free backup number; returns it and whether a full backup was written."""
+        for _ in range(8):
+            path = self.directory / f"{seq:06d}{self._SUFFIX}"
+            try:
+                # "x": the GUI and the engine may pick the same number at the same time
+                with open(path, "xb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as f:
+                    dump(f)
+            except FileExistsError:
+                seq, dump, full = seq + 1, dump_full, True
+                continue
+            except BaseException:
+                path.unlink(missing_ok=True)
+                raise
+            return seq, full
+        raise OSError("Could not allocate a backup file name")
+
+    @classmethod
+    def _dump_full(cls, f, snippets) -> None:
+        # Written entry by entry, so the whole library never exists as one JSON string
+        f.write(cls._FULL_HEADER + b', "snippets": {')
+        separator = b""
+        for shortcut, expansion in snippets.items():
+            f.write(separator + json.dumps(shortcut, ensure_ascii=False).encode("utf-8") + b": "
+                    + json.dumps(expansion, ensure_ascii=False).encode("utf-8"))
+            separator = b", "
+        f.write(b"}}")
+
+    @classmethod
+    def _is_full(cls, path: Path) -> bool:
+        with gzip.open(path, "rb") as f:
+            return f.read(len(cls._FULL_HEADER)) == cls._FULL_HEADER
+
+    @staticmethod
+    def _read(path: Path) -> Dict[str, Any]:
+        with gzip.open(path, "rb") as f:
+            return json.load(f)
+
+    def _rotate(self) -> None:
+        files = self._files()
+        fulls = [seq for seq, path in sorted(files.items()) if self._is_full(path)]
+        if len(fulls) <= self.KEEP_FULL:
+            return
+        oldest_kept = fulls[-self.KEEP_FULL]
+        for seq, path in files.items():
+            if seq < oldest_kept:
+                path.unlink(missing_ok=True)
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_path, "rb") as f:
+                state = marshal.loads(f.read())
+            if isinstance(state, dict) and {"seq", "signature", "digests", "since_full"} <= state.keys():
+                return state
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+        return {"seq": 0, "signature": None, "digests": {}, "since_full": 0}
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        tmp_path = self.state_path.with_name(f"{self.state_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(marshal.dumps(state))
+        os.replace(tmp_path, self.state_path)
+
+
+class BackupScheduler:
+    """
+    Backs up the library on a background thread every ``backup_interval_minutes``.
+
+    Runs in the engine process. *get_manager* returns the current
+    SnippetManager (it changes when the storage engine is switched). An
+    interval of 0 turns scheduled backups off.
+    """
+
+    FIRST_DELAY = 60.0  # Seconds after start-up before the first backup
+
+    def __init__(self, get_manager: Callable[[], Any], config_manager, backups: Optional[BackupManager] = None):
+        self._get_manager = get_manager
+        self.config_manager = config_manager
+        self.backups = backups or BackupManager()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="clipdex-backups", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the schedule, taking a last backup if one is due."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            if self._interval():
+                self._backup()
+
+    def _interval(self) -> float:
+        try:
+            return max(0.0, float(self.config_manager.get("backup_interval_minutes", 30)) * 60)
+        except (TypeError, ValueError):
+            return 0.0
+
+    def _run(self) -> None:
+        delay = self.FIRST_DELAY
+        while not self._stop.wait(delay):
+            interval = self._interval()
+            if interval:
+                self._backup()
+            # Disabled: look at the setting again in a minute
+            delay = interval or 60.0
+
+    def _backup(self) -> None:
+        try:
+            started = time.perf_counter()
+            seq = self.backups.backup(self._get_manager())
+            if seq is not None:
+                print(f"Snippet backup {seq} written in {(time.perf_counter() - started) * 1000:.0f} ms")
+        except Exception as e:
+            # A failed backup must not stop the schedule
+            print(f"Snippet backup error: {e}")
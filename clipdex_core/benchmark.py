@@ -0,0 +1,238 @@
+"""
+Replays key-event traces through ClipdexListener and reports per-event cost.
+Usage:  python -m clipdex_core.benchmark [--sizes 100 10000 100000] [--rate 0] [--trace trace.json]
+
+Runs on the in-memory backend, so no display or keyboard permissions are
+needed. Traces are JSON lists of {"char": ..., "name": ...} objects; a
+synthetic trace of prose mixed with shortcuts is generated when no trace
+file is given (use --save-trace to keep it).
+"""
+
+import argparse
+import gc
+import json
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .backends.base import KeyEvent
+from .backends.memory import MemoryBackend, event_for_char
+from .config_manager import ConfigManager
+from .listener import ClipdexListener
+from .snippet_manager import SnippetManager
+from .usage_log import UsageLog
+
+DEFAULT_SIZES = (100, 10_000, 100_000)
+
+
+# ----------------------------------------------------------------------
+# Synthetic data
+# ----------------------------------------------------------------------
+def synthetic_snippets(count: int, seed: int = 0) -> Dict[str, str]:
+    """Returns *count* random shortcuts with short expansions."""
+    rng = random.Random(seed)
+    snippets: Dict[str, str] = {}
+    while len(snippets) < count:
+        shortcut = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 8)))
+        words = rng.randint(2, 12)
+        snippets[shortcut] = " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+                                      for _ in range(words))
+    return snippets
+
+
+def synthetic_trace(snippets: Dict[str, str], events: int, shortcut_char: str = ":",
+                    expansion_ratio: float = 0.1, seed: int = 0) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Returns about *events* (char, name) pairs: prose words, some shortcuts and typos."""
+    rng = random.Random(seed)
+    shortcuts = list(snippets)
+    trace: List[Tuple[Optional[str], Optional[str]]] = []
+    while len(trace) < events:
+        roll = rng.random()
+        if roll < expansion_ratio and shortcuts:
+            word = shortcut_char + rng.choice(shortcuts)
+        elif roll < expansion_ratio * 2:
+            # Looks like a shortcut but matches nothing after a few characters
+            word = shortcut_char + "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+        else:
+            word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(1, 10)))
+        for char in word:
+            trace.append((char, None))
+        if rng.random() < 0.05:
+            trace.append((None, "backspace"))
+        trace.append((" ", "space"))
+    return trace[:events]
+
+
+def load_trace(path: Path) -> List[Tuple[Optional[str], Optional[str]]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [(item.get("char"), item.get("name")) for item in json.load(f)]
+
+
+def save_trace(path: Path, trace: List[Tuple[Optional[str], Optional[str]]]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{"char": char, "name": name} for char, name in trace], f, ensure_ascii=False)
+
+
+# ----------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _make_listener(snippets: Dict[str, str], workdir: Path) -> Tuple[ClipdexListener, MemoryBackend]:
+    snippet_path = workdir / f"snippets_{len(snippets)}.json"
+    snippet_manager = SnippetManager(snippet_path)
+    snippet_manager.save_snippets(snippets)
+    config_manager = ConfigManager(workdir / "config.json")
+    backend = MemoryBackend()
+    usage_log = UsageLog(workdir / f"usage_{len(snippets)}.log")
+    listener = ClipdexListener(backend=backend, snippet_manager=snippet_manager,
+                               config_manager=config_manager, usage_log=usage_log)
+    return listener, backend
+
+
+def _wait_idle(listener: ClipdexListener) -> None:
+    while listener.injector.busy:
+        time.sleep(0.0005)
+
+
+def replay(snippets: Dict[str, str], trace: List[Tuple[Optional[str], Optional[str]]],
+           rate: float = 0.0, measure_allocations: bool = True) -> Dict[str, Any]:
+    """Replays *trace* against a listener loaded with *snippets* and returns the measurements.
+
+    *rate* is the number of user events per second (0 replays as fast as possible).
+    Only the user events are timed: neither the echoes of injected keys nor the
+    time spent waiting for expansions to finish count as event latency.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        listener, backend = _make_listener(snippets, Path(tmp))
+        listener.start()
+        latencies: List[float] = []
+        injected_events = 0
+
+        def timed_on_press(event: KeyEvent) -> None:
+            nonlocal injected_events
+            if event.injected:
+                # The memory backend flags its echoes; they come from the injection thread
+                injected_events += 1
+                listener.on_press(event)
+                return
+            started = time.perf_counter()
+            listener.on_press(event)
+            latencies.append(time.perf_counter() - started)
+
+        backend.source.start(timed_on_press)
+        events = [KeyEvent(char=char, name=name, injected=False) if name else event_for_char(char, False)
+                  for char, name in trace]
+        interval = 1.0 / rate if rate > 0 else 0.0
+
+        gc.collect()
+        started = time.perf_counter()
+        for i, event in enumerate(events):
+            if interval:
+                deadline = started + i * interval
+                while time.perf_counter() < deadline:
+                    pass
+            backend.source.emit(event)
+            if listener.injector.busy:
+                _wait_idle(listener)
+        elapsed = time.perf_counter() - started
+
+        user_events = len(events)
+        latencies.sort()
+        result: Dict[str, Any] = {
+            "snippets": len(snippets),
+            "events": user_events,
+            "injected_events": injected_events,
+            "expansions": listener.injector.job_counts[("expand", "done")],
+            "events_per_second": user_events / elapsed if elapsed else 0.0,
+            "p50_us": _percentile(latencies, 0.50) * 1e6,
+            "p99_us": _percentile(latencies, 0.99) * 1e6,
+            "max_us": (latencies[-1] if latencies else 0.0) * 1e6,
+        }
+
+        if measure_allocations:
+            result.update(_measure_allocations(listener, backend, events))
+
+        listener.stop()
+        listener.join()
+        return result
+
+
+def _measure_allocations(listener: ClipdexListener, backend: MemoryBackend,
+                         events: List[KeyEvent]) -> Dict[str, float]:
+    """Second pass under tracemalloc: net blocks and bytes allocated per user event."""
+    backend.source.start(listener.on_press)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for event in events:
+        backend.source.emit(event)
+        if listener.injector.busy:
+            _wait_idle(listener)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    return {
+        "alloc_blocks_per_event": blocks / len(events) if events else 0.0,
+        "alloc_bytes_per_event": size / len(events) if events else 0.0,
+    }
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    header = f"{'snippets':>9} {'events':>8} {'exp':>5} {'ev/s':>10} {'p50 us':>8} {'p99 us':>8} {'max us':>9} {'blk/ev':>7} {'B/ev':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['snippets']:>9} {r['events']:>8} {r['expansions']:>5} {r['events_per_second']:>10.0f} "
+            f"{r['p50_us']:>8.1f} {r['p99_us']:>8.1f} {r['max_us']:>9.1f} "
+            f"{r.get('alloc_blocks_per_event', 0.0):>7.2f} {r.get('alloc_bytes_per_event', 0.0):>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay key-event traces through the Clipdex listener.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="snippet library sizes to benchmark")
+    parser.add_argument("--events", type=int, default=20_000, help="length of the synthetic trace")
+    parser.add_argument("--rate", type=float, default=0.0, help="user events per second (0 = unthrottled)")
+    parser.add_argument("--trace", type=Path, help="replay this recorded trace instead of a synthetic one")
+    parser.add_argument("--save-trace", type=Path, help="write the synthetic trace of the first size here")
+    parser.add_argument("--no-alloc", action="store_true", help="skip the allocation measurement pass")
+    parser.add_argument("--json", type=Path, help="also write the results as JSON")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        snippets = synthetic_snippets(size, seed=args.seed)
+        if args.trace:
+            trace = load_trace(args.trace)
+        else:
+            trace = synthetic_trace(snippets, args.events, seed=args.seed)
+            if args.save_trace and not results:
+                save_trace(args.save_trace, trace)
+        print(f"Replaying {len(trace)} events against {size} snippets...", file=sys.stderr)
+        results.append(replay(snippets, trace, rate=args.rate, measure_allocations=not args.no_alloc))
+
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
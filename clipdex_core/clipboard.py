@@ -0,0 +1,164 @@
+import shutil
+import subprocess
+import sys
+import time
+from typing import Callable, List, Optional
+
+from .echo_tracker import chord_tokens
+
+
+class Clipboard:
+    """Minimal text clipboard access without a GUI toolkit, so the engine can use it from any thread."""
+
+    TIMEOUT = 1.0  # Seconds to wait for external clipboard tools
+
+    def __init__(self) -> None:
+        self._get_cmd: Optional[List[str]] = None
+        self._set_cmd: Optional[List[str]] = None
+        if sys.platform == "darwin":
+            self._get_cmd, self._set_cmd = ["pbpaste"], ["pbcopy"]
+        elif not sys.platform.startswith("win"):
+            if shutil.which("wl-copy") and shutil.which("wl-paste"):
+                self._get_cmd, self._set_cmd = ["wl-paste", "--no-newline"], ["wl-copy"]
+            elif shutil.which("xclip"):
+                self._get_cmd = ["xclip", "-selection", "clipboard", "-o"]
+                self._set_cmd = ["xclip", "-selection", "clipboard", "-i"]
+            elif shutil.which("xsel"):
+                self._get_cmd = ["xsel", "--clipboard", "--output"]
+                self._set_cmd = ["xsel", "--clipboard", "--input"]
+
+    def available(self) -> bool:
+        return sys.platform.startswith("win") or self._set_cmd is not None
+
+    def get_text(self) -> Optional[str]:
+        """Returns the clipboard text, or None if it is empty or holds non-text data."""
+        if sys.platform.startswith("win"):
+            return _win_get_text()
+        if self._get_cmd is None:
+            return None
+        try:
+            result = subprocess.run(self._get_cmd, capture_output=True, timeout=self.TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode != 0:
+            return None
+        return result.stdout.decode("utf-8", errors="replace")
+
+    def set_text(self, text: str) -> bool:
+        if sys.platform.startswith("win"):
+            return _win_set_text(text)
+        if self._set_cmd is None:
+            return False
+        try:
+            result = subprocess.run(self._set_cmd, input=text.encode("utf-8"), timeout=self.TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        return result.returncode == 0
+
+
+class ClipboardPaster:
+    """
+    Inserts text by placing it on the clipboard and sending a single paste chord.
+
+    The previous clipboard text is restored afterwards. Non-text clipboard
+    contents (images, files) cannot be read back and are therefore lost.
+    """
+
+    PASTE_SETTLE = 0.15  # Seconds the target application gets to read the clipboard
+
+    def __init__(self, send_chord: Callable[[str], None], clipboard: Optional[Clipboard] = None) -> None:
+        self._send_chord = send_chord
+        self.clipboard = clipboard or Clipboard()
+        self.chord = "command+v" if sys.platform == "darwin" else "ctrl+v"
+
+    def available(self) -> bool:
+        return self.clipboard.available()
+
+    def paste(self, text: str, on_inject: Callable[[List[str]], None]) -> bool:
+        """Pastes *text*; returns False (without sending anything) if the clipboard could not be set."""
+        previous = self.clipboard.get_text()
+        if not self.clipboard.set_text(text):
+            return False
+        on_inject(chord_tokens(self.chord))
+        self._send_chord(self.chord)
+        time.sleep(self.PASTE_SETTLE)
+        if previous is not None:
+            self.clipboard.set_text(previous)
+        return True
+
+
+# ----------------------------------------------------------------------
+# Windows clipboard through the Win32 API
+# ----------------------------------------------------------------------
+_CF_UNICODETEXT = 13
+_GMEM_MOVEABLE = 0x0002
+
+
+def _win_api():
+    import ctypes
+    from ctypes import wintypes
+
+    user32 = ctypes.WinDLL("user32", use_last_error=True)
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    user32.OpenClipboard.argtypes = [wintypes.HWND]
+    user32.GetClipboardData.restype = wintypes.HANDLE
+    user32.SetClipboardData.argtypes = [wintypes.UINT, wintypes.HANDLE]
+    user32.SetClipboardData.restype = wintypes.HANDLE
+    kernel32.GlobalAlloc.argtypes = [wintypes.UINT, ctypes.c_size_t]
+    kernel32.GlobalAlloc.restype = wintypes.HGLOBAL
+    kernel32.GlobalLock.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalLock.restype = ctypes.c_void_p
+    kernel32.GlobalUnlock.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalFree.argtypes = [wintypes.HGLOBAL]
+    return ctypes, user32, kernel32
+
+
+def _win_open(user32) -> bool:
+    # Another process may briefly hold the clipboard open
+    for _ in range(10):
+        if user32.OpenClipboard(None):
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _win_get_text() -> Optional[str]:
+    ctypes, user32, kernel32 = _win_api()
+    if not _win_open(user32):
+        return None
+    try:
+        handle = user32.GetClipboardData(_CF_UNICODETEXT)
+        if not handle:
+            return None
+        pointer = kernel32.GlobalLock(handle)
+        if not pointer:
+            return None
+        try:
+            return ctypes.wstring_at(pointer)
+        finally:
+            kernel32.GlobalUnlock(handle)
+    finally:
+        user32.CloseClipboard()
+
+
+def _win_set_text(text: str) -> bool:
+    ctypes, user32, kernel32 = _win_api()
+    data = ctypes.create_unicode_buffer(text)
+    size = ctypes.sizeof(data)
+    handle = kernel32.GlobalAlloc(_GMEM_MOVEABLE, size)
+    if not handle:
+        return False
+    pointer = kernel32.GlobalLock(handle)
+    ctypes.memmove(pointer, data, size)
+    kernel32.GlobalUnlock(handle)
+    if not _win_open(user32):
+        kernel32.GlobalFree(handle)
+        return False
+    try:
+        user32.EmptyClipboard()
+        if user32.SetClipboardData(_CF_UNICODETEXT, handle):
+            return True  # The clipboard owns the memory now
+        kernel32.GlobalFree(handle)
+        return False
+    finally:
+        user32.CloseClipboard()
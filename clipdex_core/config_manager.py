@@ -1,39 +1,114 @@
 import json
 import os
+import threading
 from pathlib import Path
-from typing import Any, Dict, Union
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
 
 from .paths import get_user_data_dir
 
+ConfigSubscriber = Callable[[Mapping[str, Any]], None]
+
+
+class _ConfigState:
+    """Parsed configuration shared by every ConfigManager pointing at the same file."""
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self.snapshot: Mapping[str, Any] = MappingProxyType({})
+        # (mtime_ns, size) of the file the snapshot was read from
+        self.stamp: Optional[Tuple[int, int]] = None
+        self.subscribers: List[ConfigSubscriber] = []
+
+
 class ConfigManager:
-    """Simple JSON-file based configuration manager."""
+    """Simple JSON-file based configuration manager.
+
+    The parsed file is kept in memory as an immutable snapshot, so ``get`` never
+    touches the disk. The snapshot is replaced when ``set`` is called or when
+    ``refresh`` notices that the file changed, and subscribers are notified.
+    """
 
     DEFAULT_CONFIG: Dict[str, Any] = {
         "trigger_key": "space",  # "space" or "enter"
+        "expansion_mode": "trigger",  # "trigger" (shortcut character + trigger key) or "instant"
         "auto_start": False,
         "shortcut_character": ":",  # Character to start shortcuts
+        "suggestions_enabled": True,  # Show completions while a shortcut is typed
+        "injection_strategy": "auto",  # "auto", "type" or "paste"
+        "pacing_profile": "auto",  # "auto", "fast", "balanced", "safe" or "custom"
+        "snippet_storage": "json",  # "json" (snippets.json) or "sqlite" (snippets.db)
+        "backup_interval_minutes": 30,  # Snippet backups from the engine; 0 turns them off
     }
 
+    # One state per config file, so the GUI and the listener stay in sync
+    _states: Dict[str, _ConfigState] = {}
+    _states_lock = threading.Lock()
+
     def __init__(self, filepath: Union[str, Path, None] = None) -> None:
         if filepath is None:
             filepath = get_user_data_dir() / "config.json"
         self.filepath: Union[Path, str] = filepath
+        with self._states_lock:
+            key = os.path.abspath(filepath)
+            self._state = self._states.setdefault(key, _ConfigState())
         self._ensure_file()
+        self.refresh()
 
     # ---------------------------------------------------------------------
     # Public helpers
     # ---------------------------------------------------------------------
     def get(self, key: str, default: Any = None) -> Any:
-        return self._load().get(key, default)
+        return self._state.snapshot.get(key, default)
 
     def set(self, key: str, value: Any) -> None:
-        cfg = self._load()
-        cfg[key] = value
-        self._save(cfg)
+        with self._state.lock:
+            # Start from the file, so keys another process wrote meanwhile are kept
+            cfg = self._load()
+            if cfg is None:
+                cfg = dict(self._state.snapshot)
+            cfg[key] = value
+            changed = dict(self._state.snapshot) != cfg
+            self._save(cfg)
+            snapshot = self._publish(cfg)
+        if changed:
+            self._notify(snapshot)
 
     def all(self) -> Dict[str, Any]:
         """Returns the entire configuration dictionary."""
-        return self._load()
+        return dict(self._state.snapshot)
+
+    def snapshot(self) -> Mapping[str, Any]:
+        """Returns the current read-only configuration snapshot."""
+        return self._state.snapshot
+
+    def refresh(self) -> bool:
+        """Reloads the snapshot if the file changed on disk. Returns True if it did."""
+        with self._state.lock:
+            stamp = self._file_stamp()
+            if stamp is not None and stamp == self._state.stamp:
+                return False
+            cfg = self._load()
+            if cfg is None:
+                if self._state.snapshot:
+                    return False  # Keep the last good snapshot; the next refresh reads the file again
+                cfg = dict(self.DEFAULT_CONFIG)
+            changed = dict(self._state.snapshot) != cfg
+            snapshot = self._publish(cfg, stamp)
+        if changed:
+            self._notify(snapshot)
+        return changed
+
+    def subscribe(self, callback: ConfigSubscriber) -> None:
+        """Registers *callback* to be called with the new snapshot after every change."""
+        with self._state.lock:
+            if callback not in self._state.subscribers:
+                self._state.subscribers.append(callback)
+
+    def unsubscribe(self, callback: ConfigSubscriber) -> None:
+        with self._state.lock:
+            if callback in self._state.subscribers:
+                self._state.subscribers.remove(callback)
 
     # ------------------------------------------------------------------
     # Internal helpers
@@ -44,6 +119,8 @@ class ConfigManager:
         else:
             # Merge any missing defaults without overwriting existing keys
             cfg = self._load()
+            if cfg is None:
+                return  # Unreadable; refresh() falls back to the defaults
             updated = False
             for k, v in self.DEFAULT_CONFIG.items():
                 if k not in cfg:
@@ -52,13 +129,48 @@ class ConfigManager:
             if updated:
                 self._save(cfg)
 
-    def _load(self) -> Dict[str, Any]:
+    def _load(self) -> Optional[Dict[str, Any]]:
+        """Reads the file; returns the defaults if it is missing and None if it cannot be parsed."""
         try:
             with open(self.filepath, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
+                cfg = json.load(f)
+        except FileNotFoundError:
             return dict(self.DEFAULT_CONFIG)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return cfg if isinstance(cfg, dict) else None
 
     def _save(self, cfg: Dict[str, Any]) -> None:
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            json.dump(cfg, f, indent=4, ensure_ascii=False) 
\ No newline at end of file
+        # Replaced in one step, so a reader in another process never sees a half-written file
+        path = Path(self.filepath)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cfg, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.filepath)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _publish(self, cfg: Dict[str, Any], stamp: Optional[Tuple[int, int]] = None) -> Mapping[str, Any]:
+        """Installs *cfg* as the current snapshot. Must be called with the state lock held."""
+        self._state.snapshot = MappingProxyType(dict(cfg))
+        self._state.stamp = stamp if stamp is not None else self._file_stamp()
+        return self._state.snapshot
+
+    def _notify(self, snapshot: Mapping[str, Any]) -> None:
+        with self._state.lock:
+            subscribers = list(self._state.subscribers)
+        for callback in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                # A misbehaving subscriber must not break configuration updates
+                print(f"Config subscriber error: {e}")
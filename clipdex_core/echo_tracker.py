@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Iterable, List, Optional
+
+from .backends.base import SPECIAL_KEY_TEXT, KeyEvent
+
+# Which key produces a given character, for the characters typed by special keys
+_KEY_FOR_TEXT = {text: name for name, text in SPECIAL_KEY_TEXT.items()}
+
+# Modifiers the keyboard library may press on its own, e.g. Shift for capitals
+MODIFIER_KEYS = frozenset({"shift", "ctrl", "alt", "alt_gr", "cmd", "command"})
+
+
+def key_token(event: KeyEvent) -> Optional[str]:
+    """Returns the token an injected *event* is expected under."""
+    if event.name is not None:
+        # "ctrl_l" / "shift_r" -> "ctrl" / "shift"
+        name = event.name
+        if name.endswith(("_l", "_r")) and name[:-2] in MODIFIER_KEYS:
+            name = name[:-2]
+        return "cmd" if name == "command" else name
+    char = event.char
+    if char is not None and len(char) == 1 and ord(char) < 32 and char not in "\t\n\r":
+        # Some hooks report Ctrl+V as the control character "\x16"
+        char = chr(ord(char) + 96)
+    return char
+
+
+def text_tokens(text: str) -> List[str]:
+    """Returns the tokens of the key presses that type *text*."""
+    return [_KEY_FOR_TEXT.get(char, char) for char in text]
+
+
+def chord_tokens(chord: str) -> List[str]:
+    """Returns the tokens of the key presses in a chord such as "ctrl+v"."""
+    return ["cmd" if key == "command" else key for key in chord.split("+")]
+
+
+class EchoTracker:
+    """
+    Tells the listener which key presses were injected by Clipdex itself.
+
+    The injection worker registers every key it is about to send. An event
+    counts as injected only if it matches one of the next few expected keys
+    while the echo window is open, so keys the user types during an
+    expansion are never swallowed. A backend's injected flag can only rule
+    an event out: False means it came from the keyboard, but True may mean
+    another tool (an on-screen keyboard, a remote session) sent it, and
+    those keys must still reach the shortcut matcher. Expected keys that
+    never arrive (dead keys, Unicode input) are skipped over, and all of
+    them expire ``ECHO_WINDOW`` seconds after the last send or echo.
+    """
+
+    LOOKAHEAD = 4        # Expected keys an echo may skip over
+    ECHO_WINDOW = 0.25   # Seconds without sends or echoes before expectations expire
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._expected: Deque[str] = deque()
+        self._deadline = 0.0
+        self._drained = threading.Event()  # Set when every expected key was seen
+        self._drained.set()
+
+    def expect(self, tokens: Iterable[str]) -> None:
+        """Registers keys that are about to be injected, in order."""
+        with self._lock:
+            now = time.monotonic()
+            if now > self._deadline:
+                self._expected.clear()  # Echoes of earlier injections that never came
+            self._expected.extend(tokens)
+            self._deadline = now + self.ECHO_WINDOW
+            if self._expected:
+                self._drained.clear()
+
+    def classify(self, event: KeyEvent) -> bool:
+        """Returns True if *event* is the echo of an injected key."""
+        with self._lock:
+            if not self._expected:
+                return False  # Nothing of ours in flight; injected keys come from another tool
+            now = time.monotonic()
+            if now > self._deadline:
+                self._reset()
+                return False
+            if event.injected is False:
+                return False  # Typed on the keyboard while our keys were in flight
+
+            token = key_token(event)
+            if self._consume(token):
+                self._deadline = now + self.ECHO_WINDOW
+                self._check_drained()
+                return True
+            # Modifiers the library adds around characters are echoes too
+            return token in MODIFIER_KEYS
+
+    def wait_drained(self, timeout: float) -> bool:
+        """Blocks until every expected key was seen; False on timeout."""
+        return self._drained.wait(timeout)
+
+    @property
+    def pending(self) -> int:
+        return len(self._expected)
+
+    # ------------------------------------------------------------------
+    # Internal helpers (called with the lock held)
+    # ------------------------------------------------------------------
+    def _consume(self, token: Optional[str]) -> bool:
+        """Drops expectations up to and including the first match of *token*."""
+        expected = self._expected
+        for i in range(min(self.LOOKAHEAD, len(expected))):
+            if expected[i] == token:
+                for _ in range(i + 1):
+                    expected.popleft()
+                return True
+        return False
+
+    def _check_drained(self) -> None:
+        if not self._expected:
+            self._drained.set()
+
+    def _reset(self) -> None:
+        self._expected.clear()
+        self._drained.set()
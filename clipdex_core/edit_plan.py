@@ -0,0 +1,106 @@
+"""
+Plans the keystrokes that turn the text on screen into the text we want.
+
+Backspace removes one user-perceived character (grapheme cluster), not one
+code point: an emoji with a skin tone or ZWJ sequence, a letter followed by
+combining accents, a flag or a CRLF line break all go away with a single
+press. Counting with ``len()`` therefore deletes too much or too little.
+The planner splits both texts into grapheme clusters, keeps their common
+prefix and only deletes and retypes what differs.
+"""
+
+import unicodedata
+from typing import List
+
+from .injection import InjectionStep
+
+_ZWJ = "\u200d"  # Zero width joiner
+_COMBINING_CATEGORIES = ("Mn", "Me", "Mc")
+
+
+def _is_extender(char: str) -> bool:
+    """True for code points that always attach to the preceding character."""
+    code = ord(char)
+    return (
+        0xFE00 <= code <= 0xFE0F            # Variation selectors
+        or 0x1F3FB <= code <= 0x1F3FF       # Emoji skin tone modifiers
+        or 0xE0020 <= code <= 0xE007F       # Emoji tag sequences (subdivision flags)
+        or 0xE0100 <= code <= 0xE01EF       # Variation selectors supplement
+        or unicodedata.category(char) in _COMBINING_CATEGORIES
+    )
+
+
+def _is_regional_indicator(char: str) -> bool:
+    return 0x1F1E6 <= ord(char) <= 0x1F1FF
+
+
+def graphemes(text: str) -> List[str]:
+    """Splits *text* into grapheme clusters.
+
+    Covers what matters for deleting typed text (CRLF, combining marks,
+    variation selectors, emoji modifiers, ZWJ sequences, flags and Hangul
+    jamo) without the full Unicode segmentation tables.
+    """
+    if text.isascii() and "\r\n" not in text:
+        return list(text)
+    clusters: List[str] = []
+    for char in text:
+        if clusters:
+            last = clusters[-1]
+            prev = last[-1]
+            if prev == "\r":
+                joins = char == "\n" and len(last) == 1
+            elif prev in "\n\t":
+                joins = False
+            elif prev == _ZWJ or char == _ZWJ or _is_extender(char):
+                joins = True
+            elif _is_regional_indicator(char):
+                # Flags are pairs of regional indicators
+                joins = len(last) == 1 and _is_regional_indicator(prev)
+            else:
+                # Hangul vowel/final jamo after a leading jamo
+                joins = 0x1160 <= ord(char) <= 0x11FF and 0x1100 <= ord(prev) <= 0x11FF
+            if joins:
+                clusters[-1] = last + char
+                continue
+        clusters.append(char)
+    return clusters
+
+
+def grapheme_count(text: str) -> int:
+    return len(graphemes(text))
+
+
+def without_last_grapheme(text: str) -> str:
+    """Returns *text* as it looks after one Backspace."""
+    clusters = graphemes(text)
+    return "".join(clusters[:-1])
+
+
+def normalize_typed_text(text: str) -> str:
+    """Returns *text* as it should be typed: a single Enter produces a line break."""
+    return text.replace("\r\n", "\n")
+
+
+def plan_edit(current: str, target: str) -> List[InjectionStep]:
+    """Returns the injection steps that turn *current* into *target*.
+
+    The cursor is assumed to be at the end of *current*, so the shared
+    leading graphemes stay on screen; the rest is deleted with Backspace
+    and the remainder of *target* is typed.
+    """
+    target = normalize_typed_text(target)
+    old = graphemes(current)
+    new = graphemes(target)
+    common = 0
+    for a, b in zip(old, new):
+        if a != b:
+            break
+        common += 1
+    steps: List[InjectionStep] = []
+    if len(old) > common:
+        steps.append(("backspace", len(old) - common))
+    remainder = "".join(new[common:])
+    if remainder:
+        steps.append(("write", remainder))
+    return steps
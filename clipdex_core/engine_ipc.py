@@ -0,0 +1,453 @@
+import itertools
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .paths import get_user_data_dir
+
+# Messages are dicts. Requests carry "id" and "op", replies carry "reply" and
+# "result" (or "error"), and unsolicited engine messages carry "event".
+
+
+def engine_address() -> Tuple[str, str]:
+    """Returns the (address, family) the engine listens on for this user."""
+    if sys.platform.startswith("win"):
+        user = os.getenv("USERNAME", "user")
+        return rf"\\.\pipe\clipdex-engine-{user}", "AF_PIPE"
+    return str(get_user_data_dir() / "engine.sock"), "AF_UNIX"
+
+
+def headless_command() -> List[str]:
+    """Command line that starts the engine on its own (``main.py --headless``)."""
+    if getattr(sys, "frozen", False):
+        return [sys.executable, "--headless"]
+    return [sys.executable, str(Path(__file__).resolve().parent.parent / "main.py"), "--headless"]
+
+
+def _key_path() -> Path:
+    return get_user_data_dir() / "engine.key"
+
+
+def _write_authkey() -> bytes:
+    """Creates a fresh secret that clients must know to connect; readable by this user only."""
+    key = os.urandom(32)
+    path = _key_path()
+    path.unlink(missing_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+def _read_authkey() -> Optional[bytes]:
+    try:
+        return _key_path().read_bytes()
+    except OSError:
+        return None
+
+
+class EngineUnavailable(ConnectionError):
+    """The engine process is not running or did not answer in time."""
+
+
+# ----------------------------------------------------------------------
+# Engine side
+# ----------------------------------------------------------------------
+class _Session:
+    """One connected front end. Messages to it are sent from a queue, never from the caller's thread."""
+
+    MAX_QUEUED = 64
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+        self.closed = threading.Event()
+        self._outbox: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=self.MAX_QUEUED)
+        threading.Thread(target=self._send_loop, name="clipdex-ipc-send", daemon=True).start()
+
+    def post(self, message: Dict[str, Any]) -> bool:
+        """Queues *message*; returns False (dropping it) if the front end is not keeping up."""
+        if self.closed.is_set():
+            return False
+        try:
+            self._outbox.put_nowait(message)
+            return True
+        except queue.Full:
+            return False
+
+    def close(self) -> None:
+        if not self.closed.is_set():
+            self.closed.set()
+            try:
+                self._outbox.put_nowait(None)
+            except queue.Full:
+                pass
+            self.conn.close()
+
+    def _send_loop(self) -> None:
+        while True:
+            message = self._outbox.get()
+            if message is None or self.closed.is_set():
+                return
+            try:
+                self.conn.send(message)
+            except (OSError, ValueError):
+                self.close()
+                return
+
+
+class EngineServer:
+    """
+    Serves a running ClipdexListener to front ends in other processes.
+
+    The GUI asks for status and statistics, requests reloads and expands
+    suggestions; the engine pushes suggestion lists and template prompts.
+    Pushed messages are queued per front end and dropped when it falls
+    behind, so a busy GUI never delays the keyboard callback.
+    """
+
+    PROMPT_TIMEOUT = 300.0  # Seconds to wait for the user to answer a {prompt:...}
+
+    def __init__(self, engine, address: Optional[Tuple[str, str]] = None):
+        self.engine = engine
+        self.address, self.family = address or engine_address()
+        self._listener: Optional[Listener] = None
+        self._sessions: List[_Session] = []
+        self._lock = threading.Lock()
+        self._prompt_ids = itertools.count(1)
+        self._prompts: Dict[int, List[Any]] = {}  # id -> [Event, answer]
+
+    def start(self) -> None:
+        """Binds the local address and starts accepting front ends. Raises OSError if it is taken."""
+        if EngineClient.ping(timeout=0.5):
+            raise OSError("Another Clipdex engine is already running.")
+        if self.family == "AF_UNIX":
+            Path(self.address).unlink(missing_ok=True)  # Left behind by a crashed engine
+        self._listener = Listener(self.address, self.family, authkey=_write_authkey())
+        self.engine.on_suggestions = self._push_suggestions
+        self.engine.on_prompt = self._ask_prompt
+        threading.Thread(target=self._accept_loop, name="clipdex-ipc-accept", daemon=True).start()
+
+    def close(self) -> None:
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+
+    # ------------------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------------------
+    def _accept_loop(self) -> None:
+        while self._listener is not None:
+            try:
+                conn = self._listener.accept()
+            except Exception:
+                if self._listener is None:
+                    return
+                continue  # Failed authentication, or a client that went away
+            session = _Session(conn)
+            with self._lock:
+                self._sessions.append(session)
+            threading.Thread(target=self._serve, args=(session,), name="clipdex-ipc-serve", daemon=True).start()
+
+    def _serve(self, session: _Session) -> None:
+        try:
+            while not session.closed.is_set():
+                try:
+                    request = session.conn.recv()
+                except Exception:
+                    break  # Disconnected, or closed from another thread
+                try:
+                    result = self._dispatch(request.get("op"), request.get("args") or {})
+                    reply = {"reply": request.get("id"), "result": result}
+                except Exception as e:
+                    reply = {"reply": request.get("id"), "error": str(e)}
+                if request.get("id") is not None:
+                    session.post(reply)
+        finally:
+            session.close()
+            with self._lock:
+                if session in self._sessions:
+                    self._sessions.remove(session)
+
+    def _dispatch(self, op: str, args: Dict[str, Any]) -> Any:
+        engine = self.engine
+        if op == "status":
+            return {"pid": os.getpid(), "snippets": len(engine.snippets)}
+        if op == "stats":
+            return engine.metrics.snapshot()
+        if op == "reset_stats":
+            engine.metrics.reset()
+            return None
+        if op == "reload":
+            engine.reload_snippets()
+            return None
+        if op == "expand_suggestion":
+            return engine.expand_suggestion(args["shortcut"])
+        if op == "prompt_answer":
+            waiting = self._prompts.get(args["prompt"])
+            if waiting is not None:
+                waiting[1] = args.get("answer")
+                waiting[0].set()
+            return None
+        if op == "stop":
+            engine.stop()
+            return None
+        raise ValueError(f"Unknown engine request: {op}")
+
+    # ------------------------------------------------------------------
+    # Engine callbacks
+    # ------------------------------------------------------------------
+    def _push_suggestions(self, prefix: str, items: List[Tuple[str, str]]) -> None:
+        """Called on the keyboard thread; only queues the message."""
+        message = {"event": "suggestions", "prefix": prefix, "items": items}
+        with self._lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            session.post(message)
+
+    def _ask_prompt(self, label: str) -> Optional[str]:
+        """Asks the most recently attached front end for a {prompt:...} value."""
+        with self._lock:
+            session = self._sessions[-1] if self._sessions else None
+        if session is None:
+            return ""
+        prompt_id = next(self._prompt_ids)
+        waiting = [threading.Event(), None]
+        self._prompts[prompt_id] = waiting
+        try:
+            if not session.post({"event": "prompt", "prompt": prompt_id, "label": label}):
+                return None
+            deadline = time.monotonic() + self.PROMPT_TIMEOUT
+            while not waiting[0].wait(0.25):
+                if session.closed.is_set() or time.monotonic() > deadline:
+                    return None
+            return waiting[1]
+        finally:
+            del self._prompts[prompt_id]
+
+
+# ----------------------------------------------------------------------
+# Front-end side
+# ----------------------------------------------------------------------
+class EngineClient:
+    """
+    Connection from a front end to the engine process.
+
+    ``on_suggestions(prefix, items)`` and ``on_prompt(label)`` are called on a
+    background thread; ``on_prompt`` may block until the user answers.
+    """
+
+    def __init__(self, on_suggestions: Optional[Callable[[str, List[Tuple[str, str]]], None]] = None,
+                 on_prompt: Optional[Callable[[str], Optional[str]]] = None):
+        self.on_suggestions = on_suggestions
+        self.on_prompt = on_prompt
+        self._conn: Optional[Connection] = None
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._replies: Dict[int, List[Any]] = {}  # id -> [Event, reply]
+
+    @staticmethod
+    def ping(timeout: float = 1.0) -> bool:
+        """Returns True if an engine is running and answering."""
+        client = EngineClient()
+        if not client.connect():
+            return False
+        try:
+            client.call("status", timeout=timeout)
+            return True
+        except EngineUnavailable:
+            return False
+        finally:
+            client.close()
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None
+
+    def connect(self, timeout: float = 0.0) -> bool:
+        """Connects to the engine, retrying for up to *timeout* seconds while it starts."""
+        address, family = engine_address()
+        deadline = time.monotonic() + timeout
+        while True:
+            authkey = _read_authkey()
+            if authkey is not None:
+                try:
+                    self._conn = Client(address, family, authkey=authkey)
+                    threading.Thread(target=self._receive_loop, args=(self._conn,),
+                                     name="clipdex-ipc-receive", daemon=True).start()
+                    return True
+                except Exception:
+                    pass  # Not listening yet, or a stale key from an earlier engine
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+    def call(self, op: str, timeout: float = 1.0, **args: Any) -> Any:
+        """Sends a request and waits for its result. Raises EngineUnavailable."""
+        request_id = next(self._ids)
+        waiting = [threading.Event(), None]
+        self._replies[request_id] = waiting
+        try:
+            self._send({"id": request_id, "op": op, "args": args})
+            if not waiting[0].wait(timeout) or waiting[1] is None:
+                raise EngineUnavailable(f"The engine did not answer '{op}'.")
+        finally:
+            self._replies.pop(request_id, None)
+        reply = waiting[1]
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply.get("result")
+
+    def notify(self, op: str, **args: Any) -> bool:
+        """Sends a request without waiting for a result. Returns False if not connected."""
+        try:
+            self._send({"id": None, "op": op, "args": args})
+            return True
+        except EngineUnavailable:
+            return False
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        conn = self._conn
+        if conn is None:
+            raise EngineUnavailable("Not connected to the engine.")
+        try:
+            with self._send_lock:
+                conn.send(message)
+        except (OSError, ValueError) as e:
+            self._disconnected(conn)
+            raise EngineUnavailable(str(e)) from e
+
+    def _receive_loop(self, conn: Connection) -> None:
+        while True:
+            try:
+                message = conn.recv()
+            except Exception:
+                # Disconnected, or closed from another thread
+                self._disconnected(conn)
+                return
+            if "reply" in message:
+                waiting = self._replies.get(message["reply"])
+                if waiting is not None:
+                    waiting[1] = message
+                    waiting[0].set()
+            elif message.get("event") == "suggestions":
+                callback = self.on_suggestions
+                if callback is not None:
+                    callback(message["prefix"], message["items"])
+            elif message.get("event") == "prompt":
+                # Answered on its own thread so replies keep flowing while the dialog is open
+                threading.Thread(target=self._answer_prompt, args=(message,), daemon=True).start()
+
+    def _answer_prompt(self, message: Dict[str, Any]) -> None:
+        callback = self.on_prompt
+        answer = callback(message["label"]) if callback is not None else ""
+        self.notify("prompt_answer", prompt=message["prompt"], answer=answer)
+
+    def _disconnected(self, conn: Connection) -> None:
+        if self._conn is conn:
+            self._conn = None
+            try:
+                conn.close()
+            except OSError:
+                pass
+        for waiting in list(self._replies.values()):
+            waiting[0].set()  # Wakes callers; a missing reply raises EngineUnavailable
+
+
+class RemoteMetrics:
+    """ExpansionMetrics look-alike (snapshot() and reset()) that reads from the engine process."""
+
+    def __init__(self, client: EngineClient):
+        self._client = client
+
+    def snapshot(self) -> Dict[str, Any]:
+        return self._client.call("stats", timeout=0.5)
+
+    def reset(self) -> None:
+        self._client.call("reset_stats", timeout=0.5)
+
+
+class EngineSupervisor:
+    """
+    Starts the engine process for the GUI and keeps it running.
+
+    If an engine is already running it is attached to instead. An engine
+    that exits unexpectedly is restarted after a short back-off.
+    """
+
+    CONNECT_TIMEOUT = 10.0
+    RESTART_DELAY = 2.0
+    MAX_RESTART_DELAY = 60.0
+
+    def __init__(self, client: EngineClient, command: List[str]):
+        """*command* starts the engine, usually ``headless_command()``."""
+        self.client = client
+        self.command = command
+        self.process: Optional[subprocess.Popen] = None
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        """Connects to a running engine or starts one. Returns True once connected."""
+        connected = self._connect_or_spawn()
+        self._thread = threading.Thread(target=self._watch, name="clipdex-engine-supervisor", daemon=True)
+        self._thread.start()
+        return connected
+
+    def stop(self) -> None:
+        """Stops the engine if this supervisor started it; an engine started elsewhere keeps running."""
+        self._stopping.set()
+        process = self.process
+        if process is not None and process.poll() is None:
+            self.client.notify("stop")
+            try:
+                process.wait(timeout=3)
+            except subprocess.TimeoutExpired:
+                process.terminate()
+        self.client.close()
+
+    def _connect_or_spawn(self) -> bool:
+        if self.client.connect():
+            return True
+        try:
+            self.process = subprocess.Popen(self.command)
+        except OSError as e:
+            print(f"Could not start the Clipdex engine: {e}")
+            return False
+        deadline = time.monotonic() + self.CONNECT_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.client.connect(timeout=0.2):
+                return True
+            if self.process.poll() is not None:
+                return False  # The engine exited during startup
+        return False
+
+    def _watch(self) -> None:
+        delay = self.RESTART_DELAY
+        while not self._stopping.wait(1.0):
+            if self.client.connected:
+                delay = self.RESTART_DELAY
+                continue
+            if self.process is not None and self.process.poll() is None:
+                # Our engine is alive but the connection dropped; reconnect
+                self.client.connect(timeout=1.0)
+                continue
+            print("Clipdex engine is not running; restarting it...")
+            if not self._connect_or_spawn():
+                if self._stopping.wait(delay):
+                    return
+                delay = min(delay * 2, self.MAX_RESTART_DELAY)
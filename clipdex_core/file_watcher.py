@@ -0,0 +1,222 @@
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+Fingerprint = Tuple[int, bytes]
+WatchCallback = Callable[[str], None]
+
+
+def file_fingerprint(path: Union[str, Path]) -> Optional[Fingerprint]:
+    """Returns (size, content hash) of *path*, or None if it cannot be read.
+
+    Unlike mtime this catches two writes that land within the same second.
+    """
+    try:
+        digest = hashlib.blake2b(digest_size=16)
+        size = 0
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                size += len(chunk)
+                digest.update(chunk)
+        return (size, digest.digest())
+    except OSError:
+        return None
+
+
+class _PollingBackend:
+    """Fallback backend: reports every watched file as possibly changed at a low frequency."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._stop = threading.Event()
+
+    def add(self, path: str) -> None:
+        pass
+
+    def wait(self) -> Optional[Set[str]]:
+        self._stop.wait(self.interval)
+        return None  # None means "check every file"
+
+    def wake(self) -> None:
+        self._stop.set()
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifyBackend:
+    """Linux backend built on inotify; watches the parent directories so atomic replaces are seen."""
+
+    IN_MODIFY = 0x00000002  # Only acted on for "-wal" files: SQLite commits in WAL mode just append to them
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    _MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wake_r, self._wake_w = os.pipe()
+        self._closed = False
+        self._close_lock = threading.Lock()  # A wake must never write to a descriptor reused after close
+        self._dirs: Dict[int, str] = {}  # watch descriptor -> directory
+
+    def add(self, path: str) -> None:
+        directory = os.path.dirname(path) or "."
+        if directory in self._dirs.values():
+            return
+        wd = self._add_watch(self._fd, os.fsencode(directory), self._MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self._dirs[wd] = directory
+
+    def wait(self) -> Optional[Set[str]]:
+        ready, _, _ = select.select([self._fd, self._wake_r], [], [])
+        if self._wake_r in ready:
+            return set()
+        changed: Set[str] = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + self._EVENT.size <= len(data):
+            wd, mask, _cookie, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask == self.IN_MODIFY and not name.endswith(b"-wal"):
+                continue  # A partial write; other files are checked once they are closed or replaced
+            directory = self._dirs.get(wd)
+            if directory is not None and name:
+                changed.add(os.path.join(directory, os.fsdecode(name)))
+        return changed
+
+    def wake(self) -> None:
+        """Makes a pending ``wait`` return."""
+        with self._close_lock:
+            if not self._closed:
+                os.write(self._wake_w, b"\0")
+
+    def close(self) -> None:
+        """Releases the inotify and pipe descriptors; only once ``wait`` can no longer run."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            for fd in (self._fd, self._wake_r, self._wake_w):
+                os.close(fd)
+
+
+class FileWatcher:
+    """
+    Watches a few files on a background thread and calls back when their content changes.
+
+    Uses inotify on Linux and falls back to polling every ``poll_interval``
+    seconds elsewhere. A change is only reported when the size or content
+    hash differs from the last seen version.
+    """
+
+    POLL_INTERVAL = 2.0
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL) -> None:
+        self._callbacks: Dict[str, List[WatchCallback]] = {}
+        self._fingerprints: Dict[str, Optional[Fingerprint]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._backend: Union[_InotifyBackend, _PollingBackend]
+        if sys.platform.startswith("linux"):
+            try:
+                self._backend = _InotifyBackend()
+            except (OSError, AttributeError) as e:
+                print(f"inotify unavailable, polling for file changes instead: {e}")
+                self._backend = _PollingBackend(poll_interval)
+        else:
+            self._backend = _PollingBackend(poll_interval)
+
+    def watch(self, path: Union[str, Path], callback: WatchCallback) -> None:
+        """Calls *callback(path)* whenever the content of *path* changes."""
+        key = os.path.abspath(path)
+        with self._lock:
+            self._callbacks.setdefault(key, []).append(callback)
+            self._fingerprints.setdefault(key, file_fingerprint(key))
+        self._backend.add(key)
+
+    def unwatch(self, path: Union[str, Path], callback: WatchCallback) -> None:
+        """Stops calling *callback* for *path*."""
+        key = os.path.abspath(path)
+        with self._lock:
+            callbacks = self._callbacks.get(key)
+            if callbacks is not None and callback in callbacks:
+                callbacks.remove(callback)
+                if not callbacks:
+                    del self._callbacks[key]
+                    self._fingerprints.pop(key, None)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="clipdex-file-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        self._backend.wake()
+        thread, self._thread = self._thread, None
+        if thread is None:
+            self._backend.close()
+        elif thread is not threading.current_thread():
+            thread.join()  # The thread releases the backend on its way out
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _run(self) -> None:
+        try:
+            while self._running:
+                try:
+                    candidates = self._backend.wait()
+                except Exception as e:
+                    print(f"File watcher error: {e}")
+                    return
+                if not self._running:
+                    return
+                with self._lock:
+                    paths = list(self._callbacks) if candidates is None else [p for p in candidates if p in self._callbacks]
+                for path in paths:
+                    self._check(path)
+        finally:
+            self._backend.close()
+
+    def _check(self, path: str) -> None:
+        current = file_fingerprint(path)
+        with self._lock:
+            if current == self._fingerprints.get(path):
+                return
+            self._fingerprints[path] = current
+            callbacks = list(self._callbacks.get(path, ()))
+        for callback in callbacks:
+            try:
+                callback(path)
+            except Exception as e:
+                # A failing reload must not stop the watcher thread
+                print(f"File watcher callback error: {e}")
@@ -0,0 +1,60 @@
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .injection import InjectionStep
+
+
+class PreparedExpansion:
+    """An expansion rendered and planned ahead of time for one way of typing its shortcut."""
+
+    __slots__ = ("shortcut", "typed_text", "expanded_text", "steps", "cursor_back")
+
+    def __init__(self, shortcut: str, typed_text: str, expanded_text: str, steps: List[InjectionStep],
+                 cursor_back: int = 0):
+        self.shortcut = shortcut
+        self.typed_text = typed_text
+        self.expanded_text = expanded_text
+        self.steps = steps
+        self.cursor_back = cursor_back  # Left presses at the end of steps, for {cursor}
+
+
+class HotSet:
+    """
+    The most used snippets, prepared so expanding them does no work on the keystroke path.
+
+    Rebuilt whenever the snippets, the usage ranking or the typing settings
+    change; entries whose shortcut was typed differently than expected are
+    simply not used.
+    """
+
+    SIZE = 32
+
+    def __init__(self, size: int = SIZE):
+        self.size = size
+        self._prepared: Dict[str, PreparedExpansion] = {}
+
+    def rebuild(self, ranked: Iterable[str],
+                prepare: Callable[[str], Optional[PreparedExpansion]]) -> None:
+        """
+        Prepares the first ``size`` shortcuts of *ranked* that *prepare* can handle
+        (it returns None for removed snippets and dynamic templates).
+        """
+        prepared: Dict[str, PreparedExpansion] = {}
+        for shortcut in ranked:
+            if len(prepared) >= self.size:
+                break
+            expansion = prepare(shortcut)
+            if expansion is not None:
+                prepared[shortcut] = expansion
+        self._prepared = prepared
+
+    def get(self, shortcut: str, typed_text: str) -> Optional[PreparedExpansion]:
+        prepared = self._prepared.get(shortcut)
+        if prepared is None or prepared.typed_text != typed_text:
+            return None
+        return prepared
+
+    def __contains__(self, shortcut: object) -> bool:
+        return shortcut in self._prepared
+
+    def __len__(self) -> int:
+        return len(self._prepared)
@@ -0,0 +1,304 @@
+import itertools
+import queue
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .clipboard import ClipboardPaster
+from .echo_tracker import text_tokens
+from .pacing import PACING_PROFILES, KeyPacer
+
+# A step is ("backspace", count), ("write", text) or ("left", count)
+InjectionStep = Tuple[str, Any]
+
+
+class InjectionJob:
+    """
+    A sequence of keyboard actions (deletes and writes) to inject, with timing information.
+
+    *prepare*, if given, is called on the worker thread when the job starts and
+    returns the steps to run (or None to cancel), for expansions that have to
+    read the clipboard or ask the user first.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind: str, steps: List[InjectionStep],
+                 on_finished: Optional[Callable[["InjectionJob"], None]] = None,
+                 shortcut: Optional[str] = None,
+                 prepare: Optional[Callable[[], Optional[List[InjectionStep]]]] = None):
+        self.id = next(self._ids)
+        self.kind = kind  # "expand" or "revert"
+        self.shortcut = shortcut  # Snippet being expanded, if any
+        self.steps = steps
+        self.prepare = prepare
+        self.on_finished = on_finished
+        self.status = "queued"  # queued -> running -> done / cancelled / failed
+        self.strategies: List[str] = []  # "type" or "paste" for every write step
+        self._cancel = threading.Event()
+
+        # perf_counter() timestamps for each phase of the job
+        self.enqueued_at = time.perf_counter()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.marks: Dict[str, float] = {}  # "delete"/"write" -> when that step finished
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def queue_latency(self) -> Optional[float]:
+        """Seconds the job waited in the queue before the worker picked it up."""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.enqueued_at
+
+    @property
+    def injection_latency(self) -> Optional[float]:
+        """Seconds the worker spent injecting the job."""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def timing(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "queue_latency": self.queue_latency,
+            "injection_latency": self.injection_latency,
+            "strategies": list(self.strategies),
+        }
+
+
+class InjectionCostModel:
+    """
+    Chooses between typing and pasting a piece of text.
+
+    Typing cost grows with the length of the text, and faster for non-ASCII
+    characters, which keyboard libraries inject through slower Unicode paths.
+    Pasting costs roughly the same for any length. Both estimates are
+    refined from measured injection times.
+    """
+
+    MODES = ("auto", "type", "paste")
+    SMOOTHING = 0.2  # Weight of a new measurement in the running averages
+
+    def __init__(self, char_cost: float = 0.002, non_ascii_factor: float = 4.0,
+                 paste_cost: float = 0.25) -> None:
+        self.mode = "auto"
+        self.char_cost = char_cost                # Seconds per typed ASCII character
+        self.non_ascii_factor = non_ascii_factor  # Relative cost of a non-ASCII character
+        self.paste_cost = paste_cost              # Seconds per paste, including clipboard restore
+
+    def _typing_units(self, text: str) -> float:
+        if text.isascii():
+            return float(len(text))
+        non_ascii = sum(1 for char in text if ord(char) > 127)
+        return (len(text) - non_ascii) + non_ascii * self.non_ascii_factor
+
+    def estimate_typing(self, text: str) -> float:
+        return self._typing_units(text) * self.char_cost
+
+    def choose(self, text: str, paste_available: bool) -> str:
+        """Returns "type" or "paste" for *text*."""
+        if not paste_available or self.mode == "type":
+            return "type"
+        if self.mode == "paste":
+            return "paste"
+        return "paste" if self.estimate_typing(text) > self.paste_cost else "type"
+
+    def record_typing(self, text: str, seconds: float) -> None:
+        units = self._typing_units(text)
+        if units > 0:
+            self.char_cost += self.SMOOTHING * (seconds / units - self.char_cost)
+
+    def record_paste(self, seconds: float) -> None:
+        self.paste_cost += self.SMOOTHING * (seconds - self.paste_cost)
+
+
+class InjectionWorker:
+    """
+    Performs expansions and reverts on a dedicated thread.
+
+    The keyboard callback only enqueues jobs, so the OS hook thread is never
+    blocked by the per-character delays of an expansion. Long jobs check for
+    cancellation between keystrokes and between chunks of written text.
+    """
+
+    MAX_QUEUED_JOBS = 8
+    WRITE_CHUNK = 16          # Characters written between cancellation checks
+    TIMING_HISTORY = 256      # Number of finished jobs kept for inspection
+    CALIBRATION_SAVE_INTERVAL = 30.0  # Minimum seconds between persisted calibrations
+
+    def __init__(self, backspace: Callable[[], None], write: Callable[[str], None],
+                 on_inject: Callable[[List[str]], None] = lambda keys: None,
+                 paster: Optional[ClipboardPaster] = None,
+                 wait_for_echoes: Callable[[float], bool] = lambda timeout: True,
+                 on_calibrated: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 send_key: Callable[[str], None] = lambda key: None):
+        """
+        *on_inject(keys)* is called right before synthetic key presses are sent, with
+        their tokens ("backspace", "space", "a", ...) in order.
+        *wait_for_echoes(timeout)* blocks until the listener has seen every injected
+        event and returns False on timeout. *on_calibrated(profile)* receives the
+        adaptive pacing profile whenever it is worth saving. *send_key(name)* presses
+        a named key such as "left".
+        """
+        self._backspace = backspace
+        self._write = write
+        self._on_inject = on_inject
+        self._paster = paster
+        self._wait_for_echoes = wait_for_echoes
+        self._on_calibrated = on_calibrated
+        self._send_key = send_key
+        self._saved_calibration: Optional[Dict[str, Any]] = None
+        self._last_calibration_save = 0.0
+        self.cost_model = InjectionCostModel()
+        self.pacer = KeyPacer(PACING_PROFILES["balanced"].copy(), adaptive=True)
+        self._queue: "queue.Queue[Optional[InjectionJob]]" = queue.Queue(maxsize=self.MAX_QUEUED_JOBS)
+        self._current: Optional[InjectionJob] = None
+        self._thread: Optional[threading.Thread] = None
+        self.timings: Deque[Dict[str, Any]] = deque(maxlen=self.TIMING_HISTORY)
+        self.job_counts: "Counter[Tuple[str, str]]" = Counter()  # (kind, status) -> finished jobs
+
+    # ------------------------------------------------------------------
+    # Public API (safe to call from the keyboard callback)
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="clipdex-injector", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self.cancel_all()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def submit(self, job: InjectionJob) -> bool:
+        """Queues *job* without blocking. Returns False if the queue is full."""
+        try:
+            self._queue.put_nowait(job)
+            return True
+        except queue.Full:
+            job.status = "dropped"
+            return False
+
+    def cancel_all(self) -> None:
+        """Cancels the running job and every job still waiting in the queue."""
+        current = self._current
+        if current is not None:
+            current.cancel()
+        with self._queue.mutex:
+            pending = [job for job in self._queue.queue if job is not None]
+        for job in pending:
+            job.cancel()
+
+    @property
+    def busy(self) -> bool:
+        return self._current is not None or not self._queue.empty()
+
+    # ------------------------------------------------------------------
+    # Worker thread
+    # ------------------------------------------------------------------
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._current = job
+            job.started_at = time.perf_counter()
+            job.status = "running"
+            try:
+                job.status = "done" if self._execute(job) else "cancelled"
+            except Exception as e:
+                job.status = "failed"
+                print(f"Injection error: {e}")
+            finally:
+                job.finished_at = time.perf_counter()
+                self._current = None
+                self.timings.append(job.timing())
+                self.job_counts[(job.kind, job.status)] += 1
+            self._maybe_save_calibration()
+            if job.on_finished is not None:
+                try:
+                    job.on_finished(job)
+                except Exception as e:
+                    print(f"Injection callback error: {e}")
+
+    def _execute(self, job: InjectionJob) -> bool:
+        """Runs every step of *job*. Returns False if it was cancelled part way."""
+        if job.prepare is not None:
+            steps = job.prepare()
+            if steps is None or job.cancelled:
+                return False
+            job.steps = steps
+        for action, arg in job.steps:
+            if action == "backspace":
+                completed = self.pacer.send(arg, self._backspace, self._expect_backspaces,
+                                            self._wait_for_echoes, lambda: job.cancelled)
+                if not completed:
+                    return False
+                job.marks["delete"] = time.perf_counter()
+            elif action == "write":
+                if not self._insert(job, arg):
+                    return False
+                job.marks["write"] = time.perf_counter()
+            elif action == "left":
+                # Moves the cursor back to a {cursor} placeholder
+                if not self.pacer.send(arg, lambda: self._send_key("left"),
+                                       lambda count: self._on_inject(["left"] * count),
+                                       self._wait_for_echoes, lambda: job.cancelled):
+                    return False
+            else:
+                raise ValueError(f"Unknown injection step: {action}")
+        return True
+
+    def _expect_backspaces(self, count: int) -> None:
+        self._on_inject(["backspace"] * count)
+
+    def _maybe_save_calibration(self) -> None:
+        if self._on_calibrated is None:
+            return
+        calibration = self.pacer.snapshot()
+        if calibration is None or calibration == self._saved_calibration:
+            return
+        now = time.monotonic()
+        if now - self._last_calibration_save < self.CALIBRATION_SAVE_INTERVAL and self._saved_calibration is not None:
+            return
+        self._saved_calibration = calibration
+        self._last_calibration_save = now
+        try:
+            self._on_calibrated(calibration)
+        except Exception as e:
+            print(f"Could not save pacing calibration: {e}")
+
+    def _insert(self, job: InjectionJob, text: str) -> bool:
+        """Types or pastes *text*, whichever the cost model expects to be faster."""
+        paste_available = self._paster is not None and self._paster.available()
+        strategy = self.cost_model.choose(text, paste_available)
+        if strategy == "paste" and not job.cancelled:
+            started = time.perf_counter()
+            if self._paster.paste(text, self._on_inject):
+                self.cost_model.record_paste(time.perf_counter() - started)
+                job.strategies.append("paste")
+                return True
+            # Clipboard unavailable right now; fall back to typing
+
+        job.strategies.append("type")
+        for start in range(0, len(text), self.WRITE_CHUNK):
+            if job.cancelled:
+                return False
+            chunk = text[start:start + self.WRITE_CHUNK]
+            started = time.perf_counter()
+            self._on_inject(text_tokens(chunk))
+            self._write(chunk)
+            self.cost_model.record_typing(chunk, time.perf_counter() - started)
+        return True
@@ -1,103 +1,189 @@
-import time
-from pynput import keyboard as pynput_keyboard
-import keyboard as system_keyboard
+from .backends import Backend, KeyEvent, create_backend
 from .snippet_manager import SnippetManager
-import os
+from .shortcut_index import ShortcutIndex
+from .suffix_matcher import SuffixMatcher
+from .file_watcher import FileWatcher
+from .injection import InjectionJob, InjectionWorker
+from .clipboard import ClipboardPaster
+from .echo_tracker import MODIFIER_KEYS, EchoTracker, key_token
+from .edit_plan import normalize_typed_text, plan_edit, without_last_grapheme
+from .pacing import pacer_from_config
+from .metrics import ExpansionMetrics
+from .usage_log import UsageLog
+from .hot_set import HotSet, PreparedExpansion
+from .templates import compile_snippets
+from . import startup
+from .backends.base import SPECIAL_KEY_TEXT
 import sys
-from typing import Optional
+import threading
+from typing import Callable, List, Optional, Tuple
 from .config_manager import ConfigManager
 
 class ClipdexListener:
     """
     Listens for system-wide keyboard events and performs text expansion.
+
+    Key presses come from *backend*'s key source and expansions go out through
+    its injector; the default is the system-wide pynput/keyboard backend.
+
+    While a shortcut is being typed, ``on_suggestions(prefix, [(shortcut,
+    preview), ...])`` is called with the best completions and the start of
+    their expansions (an empty list hides them); ``expand_suggestion``
+    expands one of them.
     """
-    def __init__(self):
-        self.snippet_manager = SnippetManager()
-        self.config_manager = ConfigManager()
-        self.snippets = self.snippet_manager.load_snippets()
+
+    SUGGESTION_COUNT = 5  # Completions cached per prefix and offered while typing
+    SUGGESTION_PREVIEW = 120  # Characters of each expansion sent along with a completion
+    def __init__(self, backend: Optional[Backend] = None,
+                 snippet_manager: Optional[SnippetManager] = None,
+                 config_manager: Optional[ConfigManager] = None,
+                 usage_log: Optional[UsageLog] = None):
+        with startup.phase("backend"):
+            self.backend = backend if backend is not None else create_backend("pynput")
+        with startup.phase("config_manager"):
+            self.config_manager = config_manager or ConfigManager()
+        with startup.phase("snippet_manager"):
+            self.snippet_manager = snippet_manager or SnippetManager(
+                storage=self.config_manager.get("snippet_storage", "json"))
+        # Only a manager we created ourselves follows the snippet_storage setting
+        self._own_snippet_manager = snippet_manager is None
+        # Which snippets get expanded; drives suggestion ranking and the hot set
+        self.usage = usage_log or UsageLog()
+        self.hot_set = HotSet()
+        # Signature of the snippet library that was loaded, so duplicate reload requests are cheap
+        self._snippets_signature = self.snippet_manager.signature()
+        self._reload_lock = threading.Lock()  # The file watcher and the GUI may both ask for a reload
+        with startup.phase("load_snippets"):
+            # The prefix tree comes prebuilt from the snapshot cache when it is current
+            self.snippets, self.shortcut_index = self.snippet_manager.load_snippets_and_index()
+        with startup.phase("snippet_index"):
+            # Expansions with placeholders, compiled once per load
+            self.templates = compile_snippets(self.snippets)
+
+        # Recognises the key presses we inject ourselves when they come back through the hook
+        self._echoes = EchoTracker()
+
+        # Expansions and reverts are injected on their own thread, typed or pasted
+        injector = self.backend.injector
+        paster = ClipboardPaster(send_chord=injector.send, clipboard=self.backend.clipboard)
+        self.injector = InjectionWorker(
+            backspace=injector.backspace,
+            write=injector.write,
+            on_inject=self._echoes.expect,
+            paster=paster,
+            wait_for_echoes=self._echoes.wait_drained,
+            on_calibrated=self._save_pacing_calibration,
+            send_key=injector.send,
+        )
+        # Read by {clipboard} placeholders
+        self._clipboard = paster.clipboard
+        # Answers {prompt:Name} placeholders; returns None to cancel the expansion
+        self.on_prompt: Optional[Callable[[str], Optional[str]]] = None
+        self._prompting = False  # Keys typed into the prompt must not reach the state machine
+        self._pacing_settings = None  # (profile name, custom profile) the pacer was built from
+        self.metrics = ExpansionMetrics()
+
+        # Config values used on the hot path, kept up to date by the config manager
+        self._shortcut_char = ":"
+        self._trigger_key = "space"
+        # Set in "instant" expansion mode: matches shortcuts as soon as they are typed
+        self._suffix_matcher: Optional[SuffixMatcher] = None
+        # Completions offered while typing, ranked by how often each snippet was used
+        self.on_suggestions: Optional[Callable[[str, List[Tuple[str, str]]], None]] = None
+        self._suggestions_enabled = False
+        self._suggestions_shown = False
+        with startup.phase("apply_config"):
+            self._on_config_changed(self.config_manager.snapshot())
+        self.config_manager.subscribe(self._on_config_changed)
 
         # Check for MacOS permissions
         if sys.platform == "darwin":
-            self._check_macos_permissions()
+            self.backend.source.check_permissions()
 
         # Variables to track the current state
         self.current_shortcut = ""
         self.is_listening = False
+        # Trie nodes visited while typing the current shortcut (root first),
+        # so backspace can step back without re-walking the prefix
+        self._node_path = [ShortcutIndex.ROOT]
+        self._path_index = self.shortcut_index  # Index the node path belongs to
 
         # Variables to track the current state
         self._awaiting_backspace = False  # Waiting for the first key after expansion
+        # Guards the typing state above and below; key presses, suggestion picks (IPC thread)
+        # and finished expansions (injection thread) all change it
+        self._state_lock = threading.RLock()
         self._last_expanded_text = ""     # The expanded text we wrote
         self._last_shortcut = ""          # Original shortcut (':' + shortcut)
-        self._ignore_events = 0           # Count of keys to ignore
         # Track if the user pressed space before the ':' key
         self._prev_key_was_space = False
         self._leading_space_flag = False  # Was there a space before the ':' key?
 
-        # Track the last modified time of the snippet file
-        self._snippet_file_mtime: Optional[float] = self._get_snippet_file_mtime()
-
-        # Prepare the pynput listener
-        self.listener = pynput_keyboard.Listener(on_press=self.on_press)
-
-    def _check_macos_permissions(self):
-        """Check if the app has necessary permissions on MacOS."""
-        try:
-            # Try to start a test listener to check permissions
-            test_listener = pynput_keyboard.Listener(on_press=lambda x: None)
-            test_listener.start()
-            test_listener.stop()
-            print("✓ macOS keyboard permissions checked - OK")
-        except Exception as e:
-            print("⚠️  macOS permission issue detected!")
-            print("Follow these steps to allow Clipdex to work:")
-            print("1. System Preferences > Security & Privacy > Privacy > Accessibility")
-            print("2. Click the '+' button and add the Clipdex application")
-            print("3. Check the box next to Clipdex")
-            print("4. Restart the application")
-            print(f"Error details: {e}")
+        # Reload snippets and config when their files change, off the keystroke path
+        self.file_watcher = FileWatcher()
+        self._watch_snippet_storage()
+        self.file_watcher.watch(self.config_manager.filepath, self._on_config_file_changed)
 
     def start(self):
         """Starts the listener."""
         print("Clipdex engine running...")
+        self.file_watcher.start()
+        self.injector.start()
         try:
-            self.listener.start()
+            self.backend.source.start(self.on_press)
             print("✓ Keyboard listener started")
         except Exception as e:
             print(f"❌ Keyboard listener could not be started: {e}")
             if sys.platform == "darwin":
                 print("Check Accessibility permissions on macOS!")
 
+    def stop(self):
+        """Stops listening; join() then returns."""
+        self.backend.source.stop()
+
     def join(self):
         """Waits for the listener thread to finish."""
-        self.listener.join()
+        self.backend.source.join()
+        self.file_watcher.stop()
+        self.injector.stop()
+        self.usage.close()
 
-    def on_press(self, key):
+    def on_press(self, key: KeyEvent):
         """Function triggered on every key press."""
-        # Ignore keys pressed by the program
-        if self._ignore_events > 0:
-            self._ignore_events -= 1
+        # The IPC thread may expand a suggestion at the same moment; see expand_suggestion
+        with self._state_lock:
+            self._handle_key(key)
+
+    def _handle_key(self, key: KeyEvent):
+        # Esc cancels any expansion that is still being typed
+        if key.name == "esc":
+            self.injector.cancel_all()
+
+        # Ignore keys pressed by the program, and keys typed into a template prompt
+        if self._echoes.classify(key) or self._prompting:
             return
-    
+
+        # A key we did not inject while a job is running means the user is typing
+        if self.injector.busy:
+            self.injector.cancel_all()
+
         # Check if we are waiting for the first key after expansion
         if self._awaiting_backspace:
             # If the first key is backspace, revert the expansion
-            if key == pynput_keyboard.Key.backspace:
+            if key.name == "backspace":
                 try:
                     # The user's backspace already removed the last character.
-                    # We need to remove the remaining expanded text
-                    remove_count = len(self._last_expanded_text)
-                    self._ignore_events += remove_count
-                    for _ in range(remove_count):
-                        system_keyboard.press_and_release('backspace')
-                        time.sleep(0.01)
-
-                    # 2. Write the old shortcut again (including shortcut character)
-                    system_keyboard.write(self._last_shortcut)
-                    self._ignore_events += len(self._last_shortcut)
-
-                    # 3. Reset the listening state
+                    # Edit what is left of the expansion back into the old
+                    # shortcut (including shortcut character)
+                    on_screen = without_last_grapheme(self._last_expanded_text)
+                    self.injector.submit(InjectionJob(
+                        "revert", plan_edit(on_screen, self._last_shortcut),
+                        on_finished=self.metrics.record_job))
+
+                    # Reset the listening state
                     self.is_listening = False
                     self.current_shortcut = ""
+                    self._publish_suggestions()
                 finally:
                     # Now we are not waiting for the first key after expansion
                     self._awaiting_backspace = False
@@ -107,53 +193,36 @@ class ClipdexListener:
                 self._awaiting_backspace = False
                 # (Continue processing this key as normal)
 
-        # Update the snippet list on every key press
-        self._refresh_snippets_if_needed()
-
         try:
-            # Get shortcut character from config
-            shortcut_char = self.config_manager.get("shortcut_character", ":")
+            # Trigger-less mode: no shortcut character, no trigger key
+            if self._suffix_matcher is not None:
+                self._match_suffix(key)
+                return
+
             # Shortcut character starts listening
-            if isinstance(key, pynput_keyboard.KeyCode) and key.char == shortcut_char:
+            if key.name is None and key.char == self._shortcut_char:
                 self.is_listening = True
                 self.current_shortcut = ""
+                self._node_path = [ShortcutIndex.ROOT]
+                self._path_index = self.shortcut_index
                 # Save if there was a space before the shortcut character
                 self._leading_space_flag = self._prev_key_was_space
                 # print("Listening started...")  # For debugging
+                self._publish_suggestions()
                 return
 
             if self.is_listening:
+                if self._path_index is not self.shortcut_index:
+                    self._resync_node_path()
                 # Space or Enter ends the shortcut
-                trigger_pref = self.config_manager.get("trigger_key", "space").lower()
-                is_trigger = (
-                    (trigger_pref == "space" and key == pynput_keyboard.Key.space) or
-                    (trigger_pref == "enter" and key == pynput_keyboard.Key.enter)
-                )
+                is_trigger = key.name == self._trigger_key
 
                 if is_trigger:
-                    if self.current_shortcut in self.snippets:
-                        # print(f"Shortcut found: {self.current_shortcut}")  # For debugging
-
-                        # 1. Delete the typed shortcut
-                        # The shortcut itself + the trigger character + the terminator ' '
-                        shortcut_char = self.config_manager.get("shortcut_character", ":")
-                        backspace_count = len(self.current_shortcut) + 2
-                        # Ignore the backspace key events we will create
-                        self._ignore_events += backspace_count
-                        for _ in range(backspace_count):
-                            system_keyboard.press_and_release('backspace')
-                            time.sleep(0.01)  # Prevent keypress overlaps
-
-                        # 2. Write the expanded text
-                        expanded_text = self.snippets[self.current_shortcut]
-                        system_keyboard.write(expanded_text)
-
-                        # 3. Save information for reverting (undo)
-                        self._awaiting_backspace = True
-                        self._last_expanded_text = expanded_text
-                        shortcut_char = self.config_manager.get("shortcut_character", ":")
-                        self._last_shortcut = shortcut_char + self.current_shortcut
-                        self._ignore_events += len(expanded_text)
+                    matched = self.shortcut_index.shortcut_at(self._node_path[-1])
+                    if matched is not None and matched in self.snippets:
+                        # On screen: the shortcut character, the shortcut and the trigger
+                        typed_text = self._shortcut_char + self.current_shortcut + (key.char or " ")
+                        self._submit_expansion(matched, typed_text, self._shortcut_char + matched)
                         # Save if there was a space before the ':' key (for reverting)
                         self._leading_space_for_revert = self._leading_space_flag
 
@@ -162,40 +231,284 @@ class ClipdexListener:
                     self.current_shortcut = ""
 
                 # Backspace removes a character
-                elif key == pynput_keyboard.Key.backspace:
-                    self.current_shortcut = self.current_shortcut[:-1]
+                elif key.name == "backspace":
+                    if len(self._node_path) > 1:
+                        self._node_path.pop()
+                        self.current_shortcut = self.current_shortcut[:-1]
+                    else:
+                        # The shortcut character itself was deleted
+                        self.is_listening = False
 
                 # Other characters are added to the shortcut
-                elif isinstance(key, pynput_keyboard.KeyCode) and key.char:
-                    self.current_shortcut += key.char
+                elif key.name is None and key.char:
+                    next_node = self.shortcut_index.step(self._node_path[-1], key.char)
+                    if next_node is None:
+                        # No snippet starts with this prefix; stop tracking the word
+                        self.is_listening = False
+                        self.current_shortcut = ""
+                    else:
+                        self._node_path.append(next_node)
+                        self.current_shortcut += key.char
+
+                self._publish_suggestions()
 
         except Exception as e:
             # Catch possible errors and prevent the listener from crashing
             print(f"An error occurred: {e}")
             self.is_listening = False
             self.current_shortcut = ""
+            self._publish_suggestions()
 
         # Update the previous key was space flag for the next key
-        self._prev_key_was_space = (key == pynput_keyboard.Key.space)
+        self._prev_key_was_space = (key.name == "space")
 
     # ------------------------------------------------------------------
     # Helper Methods
     # ------------------------------------------------------------------
 
-    def _get_snippet_file_mtime(self) -> float:
-        """Returns the last modified time of the snippet file."""
-        if os.path.exists(self.snippet_manager.filepath):
-            return os.path.getmtime(self.snippet_manager.filepath)
-        return 0.0
+    def _on_config_changed(self, config):
+        """Caches the config values needed on every key press."""
+        self._shortcut_char = config.get("shortcut_character", ":")
+        # "space" or "enter", matching the KeyEvent name of the trigger key
+        self._trigger_key = str(config.get("trigger_key", "space")).lower()
+        strategy = config.get("injection_strategy", "auto")
+        self.injector.cost_model.mode = strategy if strategy in self.injector.cost_model.MODES else "auto"
+        if config.get("expansion_mode", "trigger") == "instant":
+            if self._suffix_matcher is None:
+                self._suffix_matcher = SuffixMatcher(self.snippets)
+        else:
+            self._suffix_matcher = None
+        suggestions_enabled = bool(config.get("suggestions_enabled", True))
+        if suggestions_enabled and not self._suggestions_enabled:
+            self.shortcut_index.rank(self.SUGGESTION_COUNT, self.usage.counts)
+        self._suggestions_enabled = suggestions_enabled
+        self._rebuild_hot_set()
+        storage = config.get("snippet_storage", "json")
+        if self._own_snippet_manager and storage != self.snippet_manager.storage:
+            self._switch_snippet_storage(storage)
+        # Rebuild the pacer only when the chosen profile changes, not when a calibration is saved
+        pacing_settings = (config.get("pacing_profile", "auto"), config.get("pacing_custom"))
+        if pacing_settings != self._pacing_settings:
+            self._pacing_settings = pacing_settings
+            self.injector.pacer = pacer_from_config(config)
+
+    def expand_suggestion(self, shortcut):
+        """Expands *shortcut* in place of the partially typed one. Safe to call from any thread."""
+        with self._state_lock:
+            if not self.is_listening or shortcut not in self.snippets:
+                return False
+            typed_text = self._shortcut_char + self.current_shortcut
+            self.is_listening = False
+            self.current_shortcut = ""
+            self._publish_suggestions()
+            return self._submit_expansion(shortcut, typed_text, self._shortcut_char + shortcut)
 
-    def _refresh_snippets_if_needed(self):
-        """Reloads the snippet list if the file has been modified."""
+    def _publish_suggestions(self):
+        """Sends the ranked completions of the typed prefix to ``on_suggestions``."""
+        callback = self.on_suggestions
+        if callback is None or not self._suggestions_enabled:
+            return
+        shortcuts = ()
+        if self.is_listening and len(self._node_path) > 1:
+            shortcuts = self.shortcut_index.top(self._node_path[-1])
+        if not shortcuts and not self._suggestions_shown:
+            return
+        snippets = self.snippets
+        self._suggestions_shown = bool(shortcuts)
+        # Runs on every key press: decode only the start of each expansion, the full text when one is picked
+        items = []
+        for shortcut in shortcuts:
+            preview, truncated = snippets.preview(shortcut, self.SUGGESTION_PREVIEW)
+            items.append((shortcut, preview + "…" if truncated else preview))
         try:
-            current_mtime = self._get_snippet_file_mtime()
-            if current_mtime != self._snippet_file_mtime:
-                self.snippets = self.snippet_manager.load_snippets()
-                self._snippet_file_mtime = current_mtime
-                print("Snippet list updated.")
+            callback(self.current_shortcut, items)
         except Exception as e:
-            # If there's an error reading the file, don't crash the engine
-            print(f"Snippet update error: {e}")
\ No newline at end of file
+            print(f"Suggestion callback error: {e}")
+
+    def _submit_expansion(self, shortcut, typed_text, revert_text):
+        """Queues the edit that replaces *typed_text* with the expansion of *shortcut*.
+
+        *revert_text* is what an immediate Backspace restores.
+        """
+        prepared = self.hot_set.get(shortcut, typed_text) or self._prepare_expansion(shortcut, typed_text)
+        if prepared is not None:
+            job = InjectionJob("expand", prepared.steps, on_finished=self._on_expansion_finished,
+                               shortcut=shortcut)
+        else:
+            template = self.templates.get(shortcut)
+            if template is None:
+                return False
+            # Dynamic template: rendered on the injection thread, which may read the clipboard or prompt
+            job = InjectionJob("expand", [], on_finished=self._on_expansion_finished, shortcut=shortcut,
+                               prepare=lambda: self._render_template(template, typed_text))
+        if not self.injector.submit(job):
+            print("Expansion skipped: injection queue is full.")
+            return False
+        # Save information for reverting (undo); a moved cursor cannot be reverted
+        self._awaiting_backspace = prepared is not None and not prepared.cursor_back
+        self._last_expanded_text = prepared.expanded_text if prepared is not None else ""
+        self._last_shortcut = revert_text
+        return True
+
+    @staticmethod
+    def _expansion_steps(typed_text, expanded_text, cursor_back):
+        """Replaces what is on screen with the expanded text, keeping any shared prefix."""
+        steps = plan_edit(typed_text, expanded_text)
+        if cursor_back:
+            steps.append(("left", cursor_back))
+        return steps
+
+    def _prepare_expansion(self, shortcut, typed_text):
+        """Plans the expansion of *shortcut*; None for unknown shortcuts and dynamic templates."""
+        template = self.templates.get(shortcut)
+        if template is None:
+            expansion = self.snippets.get(shortcut)
+            if expansion is None:
+                return None
+            cursor_back = 0
+        elif template.is_static:
+            expansion, cursor_back = template.static_text, template.cursor_back
+        else:
+            return None
+        expanded_text = normalize_typed_text(expansion)
+        return PreparedExpansion(shortcut, typed_text, expanded_text,
+                                 self._expansion_steps(typed_text, expanded_text, cursor_back), cursor_back)
+
+    def _render_template(self, template, typed_text):
+        """Renders a dynamic template on the injection thread and returns its steps."""
+        rendered = template.render(self._clipboard.get_text, self._ask)
+        if rendered is None:
+            return None  # A prompt was cancelled
+        text, cursor_back = rendered
+        expanded_text = normalize_typed_text(text)
+        with self._state_lock:
+            self._last_expanded_text = expanded_text
+            self._awaiting_backspace = not cursor_back
+        return self._expansion_steps(typed_text, expanded_text, cursor_back)
+
+    def _ask(self, label):
+        """Answers a {prompt:Name} placeholder through ``on_prompt``."""
+        callback = self.on_prompt
+        if callback is None:
+            return ""
+        self._prompting = True
+        try:
+            return callback(label)
+        finally:
+            self._prompting = False
+
+    def _typed_text_for(self, shortcut):
+        """What is on screen when *shortcut* is expanded with the current settings."""
+        if self._suffix_matcher is not None:
+            return shortcut
+        return self._shortcut_char + shortcut + SPECIAL_KEY_TEXT.get(self._trigger_key, " ")
+
+    def _rebuild_hot_set(self):
+        self.hot_set.rebuild(self.usage.top(self.hot_set.size),
+                             lambda shortcut: self._prepare_expansion(shortcut, self._typed_text_for(shortcut)))
+
+    def _match_suffix(self, key):
+        """Feeds *key* to the suffix matcher and expands a shortcut the moment it is complete."""
+        matcher = self._suffix_matcher
+        if key.name == "backspace":
+            matcher.backspace()
+            return
+        if key.char is None:
+            # Arrows, Home, Esc... the cursor may have moved away from what we saw typed
+            if key_token(key) not in MODIFIER_KEYS:
+                matcher.reset()
+            return
+        shortcut = matcher.feed(key.char)
+        if shortcut is None:
+            return
+        self._submit_expansion(shortcut, shortcut, shortcut)
+        matcher.reset()
+
+    def _save_pacing_calibration(self, profile):
+        """Persists the adaptive pacing profile so the next start begins from it."""
+        self.config_manager.set("pacing_calibration", profile)
+
+    def _on_expansion_finished(self, job):
+        """Records stage timings; a cancelled expansion can no longer be reverted."""
+        self.metrics.record_job(job)
+        if job.status != "done":
+            with self._state_lock:
+                self._awaiting_backspace = False
+        elif job.shortcut is not None:
+            if self.usage.record(job.shortcut):
+                # The log was just compacted; refresh the hot set from the new ranking
+                self._rebuild_hot_set()
+            if self._suggestions_enabled:
+                self.shortcut_index.promote(job.shortcut)
+
+    def _resync_node_path(self):
+        """Re-walks the typed shortcut after the snippet index was replaced."""
+        index = self.shortcut_index
+        path = [ShortcutIndex.ROOT]
+        for char in self.current_shortcut:
+            node = index.step(path[-1], char)
+            if node is None:
+                self.is_listening = False
+                self.current_shortcut = ""
+                break
+            path.append(node)
+        self._node_path = path
+        self._path_index = index
+
+    def _on_snippet_file_changed(self, path):
+        self.reload_snippets()
+
+    def reload_snippets(self):
+        """Rebuilds the snippet index on the calling thread and swaps it in, if the library changed."""
+        with self._reload_lock:
+            # Taken before the load, so a write that lands during it triggers another reload
+            signature = self.snippet_manager.signature()
+            if signature is not None and signature == self._snippets_signature:
+                return
+            try:
+                snippets, index = self.snippet_manager.load_snippets_and_index()
+                templates = compile_snippets(snippets)
+                if self._suggestions_enabled:
+                    index.rank(self.SUGGESTION_COUNT, self.usage.counts)
+                matcher = self._suffix_matcher
+                if matcher is not None:
+                    matcher.update(snippets)
+                self.templates = templates
+                self.snippets = snippets
+                self.shortcut_index = index
+                self._rebuild_hot_set()
+            except Exception as e:
+                # If there's an error reading the file, don't crash the engine; the next request retries
+                print(f"Snippet update error: {e}")
+                return
+            self._snippets_signature = signature
+        print("Snippet list updated.")
+
+    def _watch_snippet_storage(self):
+        for path in self.snippet_manager.watch_paths():
+            self.file_watcher.watch(path, self._on_snippet_file_changed)
+
+    def _switch_snippet_storage(self, storage):
+        """Moves to another storage engine after the setting changed, and reloads from it."""
+        previous = self.snippet_manager
+        try:
+            self.snippet_manager = SnippetManager(storage=storage)
+        except Exception as e:
+            print(f"Could not open snippet storage '{storage}': {e}")
+            return
+        # The GUI copies the library over before it changes the setting; a hand-edited config does not
+        try:
+            if self.snippet_manager.load_snippets() != previous.load_snippets():
+                print(f"Warning: the snippets in {self.snippet_manager.filepath} differ from those in "
+                      f"{previous.filepath}; changes made in the previous storage are not carried over.")
+        except Exception as e:
+            print(f"Could not compare snippet storages: {e}")
+        for path in previous.watch_paths():
+            self.file_watcher.unwatch(path, self._on_snippet_file_changed)
+        previous.close()
+        self._watch_snippet_storage()
+        self.reload_snippets()
+
+    def _on_config_file_changed(self, path):
+        """Refreshes the shared config snapshot; subscribers update their caches."""
+        self.config_manager.refresh()
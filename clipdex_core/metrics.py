@@ -0,0 +1,108 @@
+import bisect
+import threading
+import time
+from typing import Any, Dict, List
+
+
+def _bucket_bounds() -> List[float]:
+    """Upper bucket bounds in seconds: a 1-2-5 series from 10 µs to 50 s."""
+    bounds = []
+    scale = 1e-5
+    while scale < 100:
+        for step in (1, 2, 5):
+            bounds.append(step * scale)
+        scale *= 10
+    return bounds
+
+
+class LatencyHistogram:
+    """
+    Latency histogram with fixed, log-spaced buckets.
+
+    Memory use is constant no matter how many samples are recorded;
+    percentiles are reported as the upper bound of the bucket they fall in.
+    """
+
+    BOUNDS: List[float] = _bucket_bounds()
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(self.BOUNDS) + 1)  # Last bucket collects overflow
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return min(self.BOUNDS[index], self.max) if index < len(self.BOUNDS) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": (self.total / self.count * 1000) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+            "buckets": {f"{bound * 1000:g}": n for bound, n in zip(self.BOUNDS + [float("inf")], self.counts) if n},
+        }
+
+
+class ExpansionMetrics:
+    """
+    Per-stage timing of expansions, measured from the moment the trigger key was seen.
+
+    Stages:
+      queued  - trigger detected until the injection worker picked the job up
+      delete  - trigger detected until the typed shortcut was deleted
+      write   - trigger detected until the expansion was fully inserted
+      revert  - undo backspace detected until the shortcut was restored
+    """
+
+    STAGES = ("queued", "delete", "write", "revert")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+        self.started_at = time.time()
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._histograms[stage].record(seconds)
+
+    def record_job(self, job: Any) -> None:
+        """Records the stage marks of a finished InjectionJob."""
+        if job.status != "done" or job.started_at is None:
+            return
+        if job.kind == "revert":
+            self.record("revert", job.finished_at - job.enqueued_at)
+            return
+        self.record("queued", job.started_at - job.enqueued_at)
+        for stage in ("delete", "write"):
+            mark = job.marks.get(stage)
+            if mark is not None:
+                self.record(stage, mark - job.enqueued_at)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+            self.started_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns a JSON-serialisable summary of every stage."""
+        with self._lock:
+            stages = {stage: histogram.to_dict() for stage, histogram in self._histograms.items()}
+        return {"since": self.started_at, "stages": stages}
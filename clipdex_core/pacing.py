@@ -0,0 +1,131 @@
+import time
+from typing import Any, Callable, Dict, Mapping, Optional
+
+
+class PacingProfile:
+    """
+    How quickly synthetic key presses are sent.
+
+    Keys go out in bursts of *burst_size*, *key_delay* seconds apart. After a
+    burst the pacer either waits until the listener has seen every injected
+    event (*wait_for_echo*) or sleeps for *burst_delay* seconds.
+    """
+
+    def __init__(self, burst_size: int = 8, key_delay: float = 0.0,
+                 burst_delay: float = 0.0, wait_for_echo: bool = True):
+        self.burst_size = max(1, int(burst_size))
+        self.key_delay = max(0.0, float(key_delay))
+        self.burst_delay = max(0.0, float(burst_delay))
+        self.wait_for_echo = bool(wait_for_echo)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "PacingProfile":
+        return cls(
+            burst_size=data.get("burst_size", 8),
+            key_delay=data.get("key_delay", 0.0),
+            burst_delay=data.get("burst_delay", 0.0),
+            wait_for_echo=data.get("wait_for_echo", True),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "burst_size": self.burst_size,
+            "key_delay": self.key_delay,
+            "burst_delay": self.burst_delay,
+            "wait_for_echo": self.wait_for_echo,
+        }
+
+    def copy(self) -> "PacingProfile":
+        return PacingProfile.from_dict(self.to_dict())
+
+
+# Built-in profiles selectable with the "pacing_profile" config key.
+# "safe" matches the old behaviour of one backspace every 10 ms.
+PACING_PROFILES: Dict[str, PacingProfile] = {
+    "fast": PacingProfile(burst_size=32, key_delay=0.0),
+    "balanced": PacingProfile(burst_size=8, key_delay=0.001),
+    "safe": PacingProfile(burst_size=1, key_delay=0.01, wait_for_echo=False),
+}
+
+
+def pacer_from_config(config: Mapping[str, Any]) -> "KeyPacer":
+    """Builds a pacer from the pacing_* config keys.
+
+    ``pacing_profile`` is "auto" (adaptive, starting from the last
+    calibration saved on this machine), "custom" (uses ``pacing_custom``)
+    or the name of a built-in profile.
+    """
+    name = config.get("pacing_profile", "auto")
+    if name in PACING_PROFILES:
+        return KeyPacer(PACING_PROFILES[name].copy(), adaptive=False)
+    if name == "custom" and isinstance(config.get("pacing_custom"), dict):
+        return KeyPacer(PacingProfile.from_dict(config["pacing_custom"]), adaptive=False)
+    calibration = config.get("pacing_calibration")
+    if isinstance(calibration, dict):
+        return KeyPacer(PacingProfile.from_dict(calibration), adaptive=True)
+    return KeyPacer(PACING_PROFILES["balanced"].copy(), adaptive=True)
+
+
+class KeyPacer:
+    """
+    Sends a run of identical key presses using a pacing profile.
+
+    In adaptive mode the profile is calibrated from echo latency: if the
+    listener confirms a burst quickly, bursts grow. If a burst is not
+    confirmed within ``ECHO_TIMEOUT``, the target could not keep up, so
+    bursts shrink and a per-key delay is added.
+    """
+
+    ECHO_TIMEOUT = 0.1     # Seconds to wait for the listener to see a burst
+    FAST_ECHO = 0.02       # Echo latency below which bursts may grow
+    MAX_BURST = 64
+    MAX_KEY_DELAY = 0.01
+
+    def __init__(self, profile: PacingProfile, adaptive: bool = False):
+        self.profile = profile
+        self.adaptive = adaptive
+        self.failures = 0
+
+    def send(self, count: int, press: Callable[[], None], on_inject: Callable[[int], None],
+             wait_for_echoes: Callable[[float], bool], cancelled: Callable[[], bool]) -> bool:
+        """Presses a key *count* times. Returns False if cancelled part way."""
+        sent = 0
+        while sent < count:
+            if cancelled():
+                return False
+            profile = self.profile
+            burst = min(profile.burst_size, count - sent)
+            for _ in range(burst):
+                if cancelled():
+                    return False
+                on_inject(1)
+                press()
+                sent += 1
+                if profile.key_delay:
+                    time.sleep(profile.key_delay)
+            if profile.wait_for_echo:
+                started = time.perf_counter()
+                confirmed = wait_for_echoes(self.ECHO_TIMEOUT)
+                self._calibrate(burst, confirmed, time.perf_counter() - started)
+            elif profile.burst_delay:
+                time.sleep(profile.burst_delay)
+        return True
+
+    def _calibrate(self, burst: int, confirmed: bool, latency: float) -> None:
+        if not self.adaptive:
+            return
+        profile = self.profile.copy()
+        if not confirmed:
+            self.failures += 1
+            profile.burst_size = max(1, profile.burst_size // 2)
+            profile.key_delay = min(self.MAX_KEY_DELAY, max(0.001, profile.key_delay * 2))
+        elif burst == profile.burst_size and latency < self.FAST_ECHO:
+            profile.burst_size = min(self.MAX_BURST, profile.burst_size + 2)
+            profile.key_delay = profile.key_delay / 2 if profile.key_delay > 0.0001 else 0.0
+        else:
+            return
+        self.profile = profile
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Returns the calibrated profile to persist, or None if this pacer is not adaptive."""
+        return self.profile.to_dict() if self.adaptive else None
@@ -0,0 +1,140 @@
+import hashlib
+import mmap
+import sys
+import zlib
+from array import array
+from typing import Dict, Iterator, List, Mapping, Sequence, Tuple, Union
+
+FLAG_COMPRESSED = 1  # Entry is zlib-compressed
+FLAG_BRACE = 2       # Text contains "{" (may hold template placeholders)
+
+Blob = Union[bytes, mmap.mmap]
+
+
+def text_digest(text: str) -> bytes:
+    """Short hash of an expansion, used to tell which snippets changed."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+
+class PackedSnippets(Mapping[str, str]):
+    """
+    Read-only ``{shortcut: expansion}`` mapping with the expansions packed in one blob.
+
+    Shortcuts are interned and looked up through a dictionary of positions;
+    the expansion texts live back to back in a single UTF-8 buffer,
+    addressed by an offset array, and long ones are zlib-compressed one by
+    one. A text is only decoded when it is asked for, so what stays in
+    memory grows with the number of shortcuts rather than with the size of
+    the expansions. The blob may be a memory-mapped file (see
+    ``SnippetCache``), in which case the texts are not even read until used.
+    """
+
+    COMPRESS_MIN = 512  # Shorter texts rarely shrink enough to pay for zlib
+
+    __slots__ = ("_keys", "_positions", "_offsets", "_flags", "_blob", "_base")
+
+    def __init__(self, keys: Sequence[str], offsets: array, flags: bytes, blob: Blob, base: int = 0):
+        self._keys: Tuple[str, ...] = tuple(sys.intern(k) for k in keys)
+        self._positions: Dict[str, int] = {k: i for i, k in enumerate(self._keys)}
+        self._offsets = offsets  # len(keys) + 1 entries, relative to base
+        self._flags = flags
+        self._blob = blob
+        self._base = base
+
+    @classmethod
+    def from_mapping(cls, snippets: Mapping[str, str]) -> "PackedSnippets":
+        if isinstance(snippets, PackedSnippets):
+            return snippets
+        blob = bytearray()
+        offsets = array("Q", [0])
+        flags = bytearray()
+        for text in snippets.values():
+            text = str(text)
+            data = text.encode("utf-8")
+            flag = FLAG_BRACE if "{" in text else 0
+            if len(data) >= cls.COMPRESS_MIN:
+                packed = zlib.compress(data, 6)
+                if len(packed) < len(data) * 0.9:
+                    data = packed
+                    flag |= FLAG_COMPRESSED
+            blob += data
+            offsets.append(len(blob))
+            flags.append(flag)
+        return cls(list(snippets), offsets, bytes(flags), bytes(blob))
+
+    # ------------------------------------------------------------------
+    # Mapping interface
+    # ------------------------------------------------------------------
+    def __getitem__(self, shortcut: str) -> str:
+        return self._text(self._positions[shortcut])
+
+    def __contains__(self, shortcut: object) -> bool:
+        return shortcut in self._positions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # ------------------------------------------------------------------
+    # Partial reads
+    # ------------------------------------------------------------------
+    def preview(self, shortcut: str, length: int) -> Tuple[str, bool]:
+        """Returns the first *length* characters of the expansion and whether it was cut short."""
+        position = self._positions[shortcut]
+        data = self._raw(position)
+        # UTF-8 needs at most 4 bytes per character
+        wanted = length * 4
+        if self._flags[position] & FLAG_COMPRESSED:
+            decompressor = zlib.decompressobj()
+            head = decompressor.decompress(data, wanted)
+            more = bool(decompressor.unconsumed_tail) or not decompressor.eof
+        else:
+            head, more = data[:wanted], len(data) > wanted
+        text = head.decode("utf-8", errors="ignore") if more else head.decode("utf-8")
+        if len(text) > length:
+            return text[:length], True
+        return text, more
+
+    def with_brace(self) -> List[str]:
+        """Shortcuts whose expansion contains "{", the only ones that can hold placeholders."""
+        flags = self._flags
+        return [k for i, k in enumerate(self._keys) if flags[i] & FLAG_BRACE]
+
+    def digests(self) -> Dict[str, bytes]:
+        """Returns ``text_digest`` of every expansion, hashing the UTF-8 bytes without decoding them."""
+        digests = {}
+        flags = self._flags
+        for i, k in enumerate(self._keys):
+            data = self._raw(i)
+            if flags[i] & FLAG_COMPRESSED:
+                data = zlib.decompress(data)
+            digests[k] = hashlib.blake2b(data, digest_size=8).digest()
+        return digests
+
+    def to_parts(self) -> Tuple[List[str], bytes, bytes, bytes]:
+        """Returns ``(keys, offsets, flags, blob)`` as plain bytes, for writing to disk."""
+        start, end = self._base, self._base + self._offsets[-1]
+        return list(self._keys), self._offsets.tobytes(), bytes(self._flags), bytes(self._blob[start:end])
+
+    @classmethod
+    def from_parts(cls, keys: Sequence[str], offsets: bytes, flags: bytes, blob: Blob,
+                   base: int = 0) -> "PackedSnippets":
+        """Inverse of ``to_parts``; *blob* may be a larger buffer with the texts starting at *base*."""
+        offset_array = array("Q")
+        offset_array.frombytes(offsets)
+        return cls(keys, offset_array, flags, blob, base)
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _raw(self, position: int) -> bytes:
+        base = self._base
+        return self._blob[base + self._offsets[position]:base + self._offsets[position + 1]]
+
+    def _text(self, position: int) -> str:
+        data = self._raw(position)
+        if self._flags[position] & FLAG_COMPRESSED:
+            data = zlib.decompress(data)
+        return data.decode("utf-8")
@@ -0,0 +1,132 @@
+import heapq
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+class ShortcutIndex:
+    """
+    Prefix tree over all snippet shortcuts.
+
+    Nodes are stored in flat lists and addressed by integer ids, so the
+    listener can walk the tree one keystroke at a time without allocating.
+    Node ``0`` is always the root (the empty prefix).
+    """
+
+    ROOT = 0
+
+    def __init__(self, shortcuts: Iterable[str] = ()):
+        # _children[node] maps a character to the id of the child node
+        self._children: List[Dict[str, int]] = [{}]
+        # _terminal[node] holds the full shortcut if the node completes one
+        self._terminal: List[Optional[str]] = [None]
+        # _top[node] holds the best-ranked shortcuts below the node, once ranked
+        self._top: List[Tuple[str, ...]] = []
+        self._top_k = 0
+        self._usage: Mapping[str, int] = {}
+        for shortcut in shortcuts:
+            self.add(shortcut)
+
+    @classmethod
+    def from_snippets(cls, snippets: Dict[str, str]) -> "ShortcutIndex":
+        """Builds an index from a ``{shortcut: expansion}`` dictionary."""
+        return cls(snippets.keys())
+
+    def to_state(self) -> Tuple[List[Dict[str, int]], List[Optional[str]]]:
+        """Returns the tree as plain lists and dicts (for the snapshot cache); ranking is not included."""
+        return self._children, self._terminal
+
+    @classmethod
+    def from_state(cls, state: Tuple[List[Dict[str, int]], List[Optional[str]]]) -> "ShortcutIndex":
+        """Rebuilds an index from ``to_state()`` without walking every shortcut again."""
+        index = cls()
+        index._children, index._terminal = state
+        return index
+
+    def add(self, shortcut: str) -> None:
+        """Inserts *shortcut* into the tree."""
+        node = self.ROOT
+        for char in shortcut:
+            child = self._children[node].get(char)
+            if child is None:
+                child = len(self._children)
+                self._children.append({})
+                self._terminal.append(None)
+                self._children[node][char] = child
+            node = child
+        self._terminal[node] = shortcut
+
+    # ------------------------------------------------------------------
+    # Lookups used by the listener on every keystroke
+    # ------------------------------------------------------------------
+    def step(self, node: int, char: str) -> Optional[int]:
+        """Returns the child of *node* for *char*, or None if no shortcut continues that way."""
+        return self._children[node].get(char)
+
+    def shortcut_at(self, node: int) -> Optional[str]:
+        """Returns the shortcut completed at *node*, or None if the prefix is not a full shortcut."""
+        return self._terminal[node]
+
+    def walk(self, text: str) -> Optional[int]:
+        """Returns the node reached by typing *text* from the root, or None."""
+        node: Optional[int] = self.ROOT
+        for char in text:
+            node = self._children[node].get(char)
+            if node is None:
+                return None
+        return node
+
+    # ------------------------------------------------------------------
+    # Ranked suggestions
+    # ------------------------------------------------------------------
+    def _rank_key(self, shortcut: str) -> Tuple[int, int, str]:
+        # Most used first, then the shortest completion, then alphabetical
+        return (-self._usage.get(shortcut, 0), len(shortcut), shortcut)
+
+    def rank(self, k: int, usage: Mapping[str, int]) -> None:
+        """Precomputes the top *k* shortcuts below every node, ranked by *usage* counts."""
+        self._top_k = k
+        self._usage = usage
+        children, terminal, key = self._children, self._terminal, self._rank_key
+        top: List[Tuple[str, ...]] = [()] * len(children)
+        # Children always have larger ids than their parent, so a reverse scan is bottom-up
+        for node in range(len(children) - 1, -1, -1):
+            candidates: List[str] = [terminal[node]] if terminal[node] is not None else []
+            for child in children[node].values():
+                candidates.extend(top[child])
+            if len(candidates) > k:
+                top[node] = tuple(heapq.nsmallest(k, candidates, key=key))
+            else:
+                top[node] = tuple(sorted(candidates, key=key))
+        self._top = top
+
+    def top(self, node: int) -> Tuple[str, ...]:
+        """Returns the ranked shortcuts that start with the prefix of *node* (after ``rank``)."""
+        return self._top[node] if node < len(self._top) else ()
+
+    def promote(self, shortcut: str) -> None:
+        """Re-ranks *shortcut* along its path after its usage count went up."""
+        if not self._top:
+            return
+        key = self._rank_key
+        node = self.ROOT
+        path = [node]
+        for char in shortcut:
+            node = self._children[node].get(char)
+            if node is None:
+                return
+            path.append(node)
+        for node in path:
+            ranked = self._top[node]
+            # Only this shortcut's score rose, so it can only enter or move up
+            if shortcut in ranked or len(ranked) < self._top_k or key(shortcut) < key(ranked[-1]):
+                merged = set(ranked)
+                merged.add(shortcut)
+                self._top[node] = tuple(sorted(merged, key=key)[:self._top_k])
+
+    def __contains__(self, shortcut: object) -> bool:
+        if not isinstance(shortcut, str):
+            return False
+        node = self.walk(shortcut)
+        return node is not None and self._terminal[node] is not None
+
+    def __len__(self) -> int:
+        return sum(1 for shortcut in self._terminal if shortcut is not None)
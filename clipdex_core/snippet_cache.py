@@ -0,0 +1,128 @@
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Mapping, Optional, Tuple, Union
+
+from .packed_snippets import PackedSnippets
+from .shortcut_index import ShortcutIndex
+
+# (size, mtime_ns, content hash) of the source file a snapshot was parsed from
+SourceStamp = Tuple[int, int, bytes]
+
+
+def content_hash(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class SnippetCache:
+    """
+    Binary snapshot of a parsed snippet library, kept next to its JSON file.
+
+    The snapshot holds the shortcuts, the prefix tree built from them and
+    the packed expansion texts (see ``PackedSnippets``), behind a small
+    header with the size, mtime and content hash of the JSON file it came
+    from. A valid snapshot is memory-mapped and needs neither JSON parsing
+    nor a tree build; expansion texts are only paged in when they are used.
+    The hash is only checked when the file was written within
+    ``RACY_WINDOW_NS`` of being read, where a second write with the same
+    size and mtime could have gone unnoticed.
+
+    The format is tied to the Python version (marshal is not portable);
+    another interpreter simply regenerates it.
+
+        MAGIC | header length, index length | header | index | texts
+    """
+
+    MAGIC = b"CLXSNAP2"
+    RACY_WINDOW_NS = 2_000_000_000  # Coarsest common mtime resolution (FAT)
+    _LENGTHS = struct.Struct("<IQ")
+    # Windows cannot replace a file that is mapped, so the texts are read into memory there
+    MAP_TEXTS = os.name != "nt"
+
+    def __init__(self, source: Union[str, Path]):
+        self.source = Path(source)
+        self.filepath = self.source.with_name(self.source.name + ".cache")
+        self._writer: Optional[threading.Thread] = None
+
+    def load(self) -> Optional[Tuple[PackedSnippets, ShortcutIndex]]:
+        """Returns the snippets and their index if the snapshot matches the source file, else None."""
+        try:
+            with open(self.filepath, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            stat = os.stat(self.source)
+        except (OSError, ValueError):
+            return None  # Missing (or empty, which mmap refuses)
+        try:
+            if data[:len(self.MAGIC)] != self.MAGIC:
+                return None
+            offset = len(self.MAGIC)
+            header_length, index_length = self._LENGTHS.unpack_from(data, offset)
+            offset += self._LENGTHS.size
+            version, size, mtime_ns, read_at_ns, digest = marshal.loads(data[offset:offset + header_length])
+            if version != self._version() or size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+                return None
+            if read_at_ns - mtime_ns < self.RACY_WINDOW_NS and not self._source_hash_is(digest):
+                return None
+            offset += header_length
+            keys, offsets, flags, trie = marshal.loads(data[offset:offset + index_length])
+            offset += index_length
+        except (ValueError, EOFError, TypeError, struct.error):
+            return None  # Truncated or from an older format
+        if self.MAP_TEXTS:
+            snippets = PackedSnippets.from_parts(keys, offsets, flags, data, base=offset)
+        else:
+            snippets = PackedSnippets.from_parts(keys, offsets, flags, data[offset:])
+            data.close()
+        return snippets, ShortcutIndex.from_state(trie)
+
+    def store(self, snippets: Mapping[str, str], stamp: SourceStamp, read_at_ns: int,
+              index: Optional[ShortcutIndex] = None) -> None:
+        """Writes a snapshot of *snippets* parsed from the source version *stamp*."""
+        if index is None:
+            index = ShortcutIndex.from_snippets(snippets)
+        keys, offsets, flags, texts = PackedSnippets.from_mapping(snippets).to_parts()
+        size, mtime_ns, digest = stamp
+        header = marshal.dumps((self._version(), size, mtime_ns, read_at_ns, digest))
+        index_data = marshal.dumps((keys, offsets, flags, index.to_state()))
+        # Per-process temporary name: the GUI and the engine may refresh the snapshot at the same time
+        tmp_path = self.filepath.with_name(f"{self.filepath.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(self.MAGIC + self._LENGTHS.pack(len(header), len(index_data)))
+                f.write(header)
+                f.write(index_data)
+                f.write(texts)
+            os.replace(tmp_path, self.filepath)
+        except OSError as e:
+            print(f"Could not write snippet cache: {e}")
+
+    def store_in_background(self, snippets: Mapping[str, str], stamp: SourceStamp, read_at_ns: int) -> None:
+        """Like ``store``, on a background thread, so a stale snapshot never delays the caller."""
+        thread = threading.Thread(target=self.store, args=(snippets, stamp, read_at_ns),
+                                  name="clipdex-snippet-cache", daemon=True)
+        self._writer = thread
+        thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Waits for the last background write to finish."""
+        if self._writer is not None:
+            self._writer.join(timeout)
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _version() -> Tuple[int, int, int]:
+        return sys.version_info[0], sys.version_info[1], marshal.version
+
+    def _source_hash_is(self, digest: bytes) -> bool:
+        try:
+            with open(self.source, "rb") as f:
+                return content_hash(f.read()) == digest
+        except OSError:
+            return False
@@ -0,0 +1,304 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+# (shortcut, new expansion or None when it was deleted)
+Change = Tuple[str, Optional[str]]
+# (revision, unix time, shortcut, expansion or None when it was deleted)
+Revision = Tuple[int, float, str, Optional[str]]
+# (revision, unix time, number of snippets changed, first shortcut changed, its expansion or None)
+RestorePoint = Tuple[int, float, int, str, Optional[str]]
+
+COMPRESS_MIN = 512  # Same threshold as PackedSnippets
+
+
+def body_hash(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class SnippetHistory:
+    """
+    Every version of every snippet, in an SQLite database next to the library.
+
+    Every save, edit or import is one row in ``revisions`` (its time and
+    the range of its changes); each snippet it changed is one row in
+    ``changes`` (shortcut, the body of the new expansion, or NULL for a
+    deletion). Only whole revisions are restore points, so a restore never
+    yields half of a batch. Expansion texts live in ``bodies``, found by
+    their hash, so a text is stored once however many snippets or versions
+    share it; long ones are zlib-compressed. An index on
+    ``(shortcut, id, body)`` answers both questions without reading the log:
+    the versions of one snippet are a range of it, and the library at any
+    revision is one index lookup per shortcut ever recorded (``shortcuts``)
+    for its newest change up to that revision. Restoring therefore costs
+    the size of the library, not the length of the history.
+
+    The first change seeds the history with the library as it was, so every
+    restore point is complete.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS bodies (
+            id INTEGER PRIMARY KEY,
+            hash BLOB NOT NULL UNIQUE,
+            compressed INTEGER NOT NULL,
+            data BLOB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS revisions (
+            id INTEGER PRIMARY KEY,
+            time REAL NOT NULL,
+            first_change INTEGER NOT NULL,
+            last_change INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS revisions_by_time ON revisions (time);
+        CREATE TABLE IF NOT EXISTS changes (
+            id INTEGER PRIMARY KEY,
+            revision INTEGER NOT NULL,
+            shortcut TEXT NOT NULL,
+            body INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS changes_by_shortcut ON changes (shortcut, id, body);
+        CREATE TABLE IF NOT EXISTS shortcuts (
+            name TEXT PRIMARY KEY,
+            first INTEGER NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    _CHUNK = 500  # Changes per statement batch; keeps IN (...) under SQLite's variable limit
+
+    def __init__(self, filepath: Union[str, Path]):
+        self.filepath = Path(filepath)
+        self._lock = threading.RLock()
+        self._db = self._connect()
+        self._db.executescript(self._SCHEMA)
+        self._seeded = False
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def ensure_seeded(self, load_library: Callable[[], Mapping[str, str]]) -> None:
+        """Records the current library as the first revision if the history is still empty."""
+        if self._seeded:
+            return
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM revisions LIMIT 1").fetchone() is None:
+                library = load_library()
+                if library:
+                    self.record(library.items())
+            self._seeded = True
+
+    def record(self, changes: Iterable[Change]) -> None:
+        """
+        Records *changes* as one new revision; a change that repeats the
+        latest version is skipped, and no revision is made if nothing changed.
+        """
+        with self._transaction() as db:
+            revision = _Revision(db)
+            revision.add(changes)
+            revision.finish()
+
+    def begin(self) -> "_HistoryBatch":
+        """Starts recording one revision in batches on a connection of its own (for worker threads)."""
+        return _HistoryBatch(self)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def versions(self, shortcut: str) -> List[Revision]:
+        """Every version of *shortcut*, newest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT r.id, r.time, c.shortcut, b.compressed, b.data FROM changes c "
+                "JOIN revisions r ON r.id = c.revision "
+                "LEFT JOIN bodies b ON b.id = c.body WHERE c.shortcut = ? ORDER BY c.id DESC",
+                (shortcut,)).fetchall()
+        return [(rid, stamp, name, self._decode(compressed, data)) for rid, stamp, name, compressed, data in rows]
+
+    def recent(self, limit: int = 200) -> List[RestorePoint]:
+        """The last *limit* revisions of the library, newest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT r.id, r.time, r.last_change - r.first_change + 1, c.shortcut, b.compressed, b.data "
+                "FROM revisions r JOIN changes c ON c.id = r.first_change "
+                "LEFT JOIN bodies b ON b.id = c.body ORDER BY r.id DESC LIMIT ?", (limit,)).fetchall()
+        return [(rid, stamp, count, name, self._decode(compressed, data))
+                for rid, stamp, count, name, compressed, data in rows]
+
+    def revision_at(self, timestamp: float) -> Optional[int]:
+        """The last revision made at or before *timestamp* (unix time), or None."""
+        with self._lock:
+            row = self._db.execute("SELECT id FROM revisions WHERE time <= ? ORDER BY time DESC, id DESC LIMIT 1",
+                                   (timestamp,)).fetchone()
+        return row[0] if row else None
+
+    def snapshot(self, revision: int) -> Dict[str, str]:
+        """The library as it was right after *revision*, in the order the snippets were first added."""
+        with self._lock:
+            row = self._db.execute("SELECT last_change FROM revisions WHERE id <= ? ORDER BY id DESC LIMIT 1",
+                                   (revision,)).fetchone()
+            if row is None:
+                return {}
+            # Deleted snippets (NULL body) drop out of the join
+            rows = self._db.execute(
+                "SELECT s.name, b.compressed, b.data FROM shortcuts s JOIN bodies b ON b.id = ("
+                "    SELECT body FROM changes WHERE shortcut = s.name AND id <= ?1 ORDER BY id DESC LIMIT 1"
+                ") WHERE s.first <= ?1 ORDER BY s.first", row).fetchall()
+        return {shortcut: self._decode(compressed, data) for shortcut, compressed, data in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.filepath, timeout=10.0, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    @staticmethod
+    def _next_time(db: sqlite3.Connection) -> float:
+        # Never earlier than the last revision, so revision order and time order agree
+        last = db.execute("SELECT MAX(time) FROM revisions").fetchone()[0]
+        return max(time.time(), last or 0.0)
+
+    @classmethod
+    def _add(cls, db: sqlite3.Connection, changes: Iterable[Change], revision: int) -> None:
+        changes = iter(changes)
+        while True:
+            chunk = list(islice(changes, cls._CHUNK))
+            if not chunk:
+                return
+            cls._add_chunk(db, chunk, revision)
+
+    @classmethod
+    def _add_chunk(cls, db: sqlite3.Connection, chunk: List[Change], revision: int) -> None:
+        # A few set-based statements per chunk rather than several per change
+        digests = [None if expansion is None else body_hash(expansion) for _, expansion in chunk]
+        texts = {digest: expansion for digest, (_, expansion) in zip(digests, chunk) if digest is not None}
+        hashes = list(texts)
+        body_ids = dict(db.execute(f"SELECT hash, id FROM bodies WHERE hash IN ({cls._marks(hashes)})", hashes))
+        new = [digest for digest in hashes if digest not in body_ids]
+        if new:
+            next_id = cls._next_id(db, "bodies")
+            db.executemany("INSERT INTO bodies (hash, compressed, data) VALUES (?, ?, ?)",
+                           [(digest, *cls._encode(texts[digest])) for digest in new])
+            body_ids.update(zip(new, range(next_id, next_id + len(new))))
+
+        names = list({shortcut for shortcut, _ in chunk})
+        # Bare column: body is taken from the row with MAX(id)
+        latest = {shortcut: body for shortcut, body, _ in db.execute(
+            f"SELECT shortcut, body, MAX(id) FROM changes WHERE shortcut IN ({cls._marks(names)}) "
+            "GROUP BY shortcut", names)}
+        known = set(latest)
+        changes = []
+        for (shortcut, _), digest in zip(chunk, digests):
+            body = None if digest is None else body_ids[digest]
+            if latest.get(shortcut) == body:
+                continue  # Unchanged, or deleting a snippet that was never recorded
+            latest[shortcut] = body
+            changes.append((revision, shortcut, body))
+        if not changes:
+            return
+        next_id = cls._next_id(db, "changes")
+        db.executemany("INSERT INTO changes (revision, shortcut, body) VALUES (?, ?, ?)", changes)
+        firsts: Dict[str, int] = {}
+        for change, (_, shortcut, _) in enumerate(changes, next_id):
+            if shortcut not in known:
+                firsts.setdefault(shortcut, change)
+        db.executemany("INSERT INTO shortcuts (name, first) VALUES (?, ?)", firsts.items())
+
+    @staticmethod
+    def _next_id(db: sqlite3.Connection, table: str) -> int:
+        # While the write transaction is held, new rows get the ids after the largest one, without gaps
+        return db.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0] + 1
+
+    @staticmethod
+    def _marks(values: List) -> str:
+        return ",".join("?" * len(values))
+
+    @staticmethod
+    def _encode(text: str) -> Tuple[int, bytes]:
+        """Returns ``(compressed, data)`` for storing *text* in ``bodies``."""
+        data = text.encode("utf-8")
+        if len(data) >= COMPRESS_MIN:
+            packed = zlib.compress(data, 6)
+            if len(packed) < len(data) * 0.9:
+                return 1, packed
+        return 0, data
+
+    @staticmethod
+    def _decode(compressed: Optional[int], data: Optional[bytes]) -> Optional[str]:
+        if data is None:
+            return None
+        if compressed:
+            data = zlib.decompress(data)
+        return data.decode("utf-8")
+
+
+class _Revision:
+    """One revision being recorded inside a write transaction on *db*."""
+
+    def __init__(self, db: sqlite3.Connection):
+        self._db = db
+        self.id = SnippetHistory._next_id(db, "revisions")
+        self._first_change = SnippetHistory._next_id(db, "changes")
+
+    def add(self, changes: Iterable[Change]) -> None:
+        SnippetHistory._add(self._db, changes, self.id)
+
+    def finish(self) -> None:
+        """Adds the revision row, unless every change was skipped."""
+        last_change = SnippetHistory._next_id(self._db, "changes") - 1
+        if last_change >= self._first_change:
+            self._db.execute("INSERT INTO revisions (id, time, first_change, last_change) VALUES (?, ?, ?, ?)",
+                             (self.id, SnippetHistory._next_time(self._db), self._first_change, last_change))
+
+
+class _HistoryBatch:
+    """Records one revision in one transaction on its own connection; see ``SnippetHistory.begin``."""
+
+    def __init__(self, history: SnippetHistory):
+        self._db = history._connect()
+        self._db.execute("BEGIN IMMEDIATE")
+        self._revision = _Revision(self._db)
+
+    def add(self, changes: Iterable[Change]) -> None:
+        self._revision.add(changes)
+
+    def commit(self) -> None:
+        try:
+            self._revision.finish()
+            self._db.execute("COMMIT")
+        finally:
+            # Rolls back whatever a failed commit left open
+            self.abort()
+
+    def abort(self) -> None:
+        if self._db is None:
+            return
+        db, self._db = self._db, None
+        try:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+        finally:
+            db.close()
@@ -0,0 +1,158 @@
+import codecs
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator, List, Optional, Tuple, Union
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_TAIL = frozenset("0123456789.eE+-")
+_decoder = json.JSONDecoder()
+
+
+class ImportCancelled(Exception):
+    """Raised by ``SnippetImporter.run`` when it was cancelled; nothing was saved."""
+
+
+def iter_json_object(f: BinaryIO, chunk_size: int = 1 << 16) -> Iterator[Tuple[Any, Any]]:
+    """
+    Yields the ``(key, value)`` pairs of the JSON object in *f* one at a time.
+
+    Only the pair being parsed is held in memory, plus one read chunk, so
+    the size of the file does not matter. Raises ValueError if the file is
+    not a JSON object.
+    """
+    decode = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    position = 0
+    at_eof = False
+
+    def read_more(at_least: int = 0) -> bool:
+        """Appends at least one more chunk to the buffer; False at end of file."""
+        nonlocal buffer, position, at_eof
+        if at_eof:
+            return False
+        # Growing reads keep a single huge value linear to parse
+        data = f.read(max(chunk_size, at_least))
+        if not data:
+            at_eof = True
+            buffer = buffer[position:] + decode.decode(b"", final=True)
+        else:
+            buffer = buffer[position:] + decode.decode(data)
+        position = 0
+        return True
+
+    def skip_whitespace() -> None:
+        nonlocal position
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position < len(buffer) or not read_more():
+                return
+
+    def expect(char: str) -> None:
+        nonlocal position
+        skip_whitespace()
+        if buffer[position:position + 1] != char:
+            raise ValueError(f"Invalid file format: expected '{char}'")
+        position += 1
+
+    def value() -> Any:
+        nonlocal position
+        skip_whitespace()
+        while True:
+            try:
+                result, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                # Probably cut off by the end of the chunk; otherwise really invalid
+                if read_more(len(buffer) - position):
+                    continue
+                raise ValueError(f"Invalid file format: {e.msg}") from None
+            # A value that touches the end of the buffer may continue in the next chunk, and
+            # so may a number cut before its fraction or exponent ("12" of "12.5e3")
+            cut_short = end == len(buffer) or (isinstance(result, (int, float)) and buffer[end] in _NUMBER_TAIL)
+            if cut_short and read_more(len(buffer) - position):
+                continue
+            position = end
+            return result
+
+    expect("{")
+    skip_whitespace()
+    if buffer[position:position + 1] == "}":
+        return
+    while True:
+        key = value()
+        if not isinstance(key, str):
+            raise ValueError("Invalid file format: object keys must be strings")
+        expect(":")
+        yield key, value()
+        skip_whitespace()
+        separator = buffer[position:position + 1]
+        position += 1
+        if separator == "}":
+            skip_whitespace()
+            if position < len(buffer):
+                raise ValueError("Invalid file format: extra data after the object")
+            return
+        if separator != ",":
+            raise ValueError("Invalid file format: expected ',' or '}'")
+
+
+class SnippetImporter:
+    """
+    Merges a JSON snippet file into the library without loading it whole.
+
+    The file is parsed incrementally, validated and handed to the store in
+    batches of ``BATCH_SIZE``; the store keeps them aside and applies them
+    in one commit at the end, so a cancelled or failed import changes
+    nothing. Existing snippets with the same shortcut are overwritten.
+    ``run`` is meant for a worker thread.
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(self, snippet_manager, source: Union[str, Path]):
+        self.snippet_manager = snippet_manager
+        self.source = Path(source)
+
+    def run(self, on_progress: Optional[Callable[[float, int], None]] = None,
+            cancelled: Callable[[], bool] = lambda: False) -> Tuple[int, int]:
+        """
+        Imports the file and returns ``(imported, skipped)``.
+
+        *on_progress(fraction, imported)* is called after every batch, with
+        the fraction of the file read. Entries that are not a non-empty
+        shortcut with a text expansion are skipped. Raises ImportCancelled
+        when *cancelled()* turns true, ValueError for an invalid file.
+        """
+        total_size = max(1, os.path.getsize(self.source))
+        imported = skipped = 0
+        batch: List[Tuple[str, str]] = []
+        session = self.snippet_manager.begin_import()
+        try:
+            with open(self.source, "rb") as f:
+                for shortcut, expansion in iter_json_object(f):
+                    if not shortcut or not isinstance(expansion, str) or not expansion:
+                        skipped += 1
+                        continue
+                    batch.append((shortcut, expansion))
+                    if len(batch) >= self.BATCH_SIZE:
+                        if cancelled():
+                            raise ImportCancelled()
+                        session.add(batch)
+                        imported += len(batch)
+                        batch = []
+                        if on_progress is not None:
+                            on_progress(min(1.0, f.tell() / total_size), imported)
+            if batch:
+                session.add(batch)
+                imported += len(batch)
+            if cancelled():
+                raise ImportCancelled()
+            if on_progress is not None:
+                on_progress(1.0, imported)
+        except BaseException:
+            session.abort()
+            raise
+        # Not inside the try: a failed commit has already cleaned up, and its error is the one to report
+        session.commit()
+        return imported, skipped
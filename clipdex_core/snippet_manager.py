@@ -1,28 +1,74 @@
-import json
 import os
 from pathlib import Path
 import sys
 import shutil
-from typing import Union
+from typing import Dict, Hashable, List, Mapping, Optional, Tuple, Union
 
 from .paths import get_user_data_dir
+from .packed_snippets import PackedSnippets
+from .shortcut_index import ShortcutIndex
+from .snippet_history import SnippetHistory
+from .snippet_store import JsonSnippetStore, SqliteSnippetStore
+
+STORAGE_ENGINES = ("json", "sqlite")
 
 class SnippetManager:
     """
-    Manages shortcut data (snippets) through a JSON file.
-    Reads, writes, and ensures the file exists.
+    Manages shortcut data (snippets) through a JSON file or an SQLite database.
+    Reads, writes, and ensures the storage exists.
+
+    The storage engine comes from the ``snippet_storage`` config value
+    ("json" or "sqlite"). The first time the SQLite engine is used, the
+    existing JSON library is copied into the database once; the JSON file is
+    left in place as it was.
+
+    With *keep_history*, every change made through the manager is also
+    recorded in a ``SnippetHistory`` next to the library (``<file>.history``),
+    opened on the first change.
     """
-    def __init__(self, filepath: Union[str, Path, None] = None):
+    def __init__(self, filepath: Union[str, Path, None] = None, storage: Optional[str] = None,
+                 keep_history: bool = False):
         """Creates a new SnippetManager.
 
         If *filepath* is not provided, the file path is automatically set to the user's LOCALAPPDATA folder.
+        *storage* overrides the configured engine; with an explicit *filepath*,
+        a ``.db`` or ``.sqlite`` suffix selects SQLite.
         """
+        if storage is None:
+            if filepath is not None:
+                storage = "sqlite" if Path(filepath).suffix in (".db", ".sqlite") else "json"
+            else:
+                from .config_manager import ConfigManager
+                storage = ConfigManager().get("snippet_storage", "json")
+        if storage not in STORAGE_ENGINES:
+            storage = "json"
+        self.storage = storage
+
         if filepath is None:
-            filepath = get_user_data_dir() / "snippets.json"
+            filepath = get_user_data_dir() / ("snippets.db" if storage == "sqlite" else "snippets.json")
 
         # No need to convert Path object to string; os and open accept it.
         self.filepath: Union[Path, str] = filepath
-        self._ensure_file_exists()
+        self.keep_history = keep_history
+        self._history: Optional[SnippetHistory] = None
+        if storage == "sqlite":
+            self._store = SqliteSnippetStore(filepath)
+            # One-shot migration from the JSON library next to it (or the bundled default)
+            json_path = Path(filepath).with_suffix(".json")
+            source = json_path if json_path.exists() else self._bundled_default()
+            copied = self._store.import_json(source)
+            if copied:
+                print(f"Moved {copied} snippets from {source} to {filepath}")
+        else:
+            self._store = JsonSnippetStore(filepath)
+            self._ensure_file_exists()
+
+    @staticmethod
+    def _bundled_default() -> Optional[Path]:
+        # Under PyInstaller, sys._MEIPASS is a temporary folder; during development, we use the module root.
+        base_path = Path(getattr(sys, "_MEIPASS", Path(__file__).resolve().parent.parent.parent))
+        default_path = base_path / "snippets.json"
+        return default_path if default_path.exists() else None
 
     def _ensure_file_exists(self):
         """Ensures that the JSON file exists. If not, try to copy a bundled default; otherwise create empty."""
@@ -31,10 +77,8 @@ class SnippetManager:
 
         # 1) Check if there's a bundled default file
         try:
-            # Under PyInstaller, sys._MEIPASS is a temporary folder; during development, we use the module root.
-            base_path = Path(getattr(sys, "_MEIPASS", Path(__file__).resolve().parent.parent.parent))
-            default_path = base_path / "snippets.json"
-            if default_path.exists():
+            default_path = self._bundled_default()
+            if default_path is not None:
                 shutil.copy(default_path, self.filepath)
                 return
         except Exception:
@@ -42,20 +86,137 @@ class SnippetManager:
             pass
 
         # 2) If no default file exists, create an empty file
-        self.save_snippets({})
+        self._store.save({})
 
-    def load_snippets(self):
-        """Loads shortcuts from the JSON file and returns them as a dictionary."""
-        try:
-            with open(self.filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            # Return an empty dictionary if the file is not found or is corrupted.
-            return {}
+    def load_snippets(self) -> Dict[str, str]:
+        """Loads all shortcuts and returns them as a dictionary, in the order they were added."""
+        return self._store.load()
+
+    def load_packed(self) -> PackedSnippets:
+        """Loads all shortcuts as a read-only mapping that decodes each expansion only when it is read."""
+        return PackedSnippets.from_mapping(self._store.load_indexed()[0])
+
+    def load_mapping(self) -> Mapping[str, str]:
+        """Loads all shortcuts in whichever read-only form is cheapest: the cached snapshot, or a dict."""
+        return self._store.load_indexed()[0]
+
+    def load_snippets_and_index(self) -> Tuple[PackedSnippets, ShortcutIndex]:
+        """Like ``load_packed``, together with the prefix tree (prebuilt when the snapshot cache has it)."""
+        snippets, index = self._store.load_indexed()
+        if index is None:
+            index = ShortcutIndex.from_snippets(snippets)
+        return PackedSnippets.from_mapping(snippets), index
 
     def save_snippets(self, snippets_data: dict):
-        """Saves the given dictionary to the JSON file."""
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            # indent=4: Makes the file more readable.
-            # ensure_ascii=False: Properly saves Turkish characters.
-            json.dump(snippets_data, f, indent=4, ensure_ascii=False)
\ No newline at end of file
+        """Replaces the whole library with the given dictionary."""
+        history = self._history_for_change()
+        if history is None:
+            self._store.save(snippets_data)
+            return
+        current = self.load_mapping()
+        changes = [(s, e) for s, e in snippets_data.items() if current.get(s) != e]
+        changes += [(s, None) for s in current if s not in snippets_data]
+        self._store.save(snippets_data)
+        history.record(changes)
+
+    # ------------------------------------------------------------------
+    # Single-snippet changes (one row each with SQLite)
+    # ------------------------------------------------------------------
+    def get_snippet(self, shortcut: str) -> Optional[str]:
+        """Returns the expansion of *shortcut*, or None."""
+        return self._store.get(shortcut)
+
+    def set_snippet(self, shortcut: str, expansion: str, replaces: Optional[str] = None):
+        """Adds or updates one snippet. *replaces* is the previous shortcut when it was renamed."""
+        history = self._history_for_change()
+        self._store.put(shortcut, expansion, replaces)
+        if history is not None:
+            renamed = [(replaces, None)] if replaces is not None and replaces != shortcut else []
+            history.record(renamed + [(shortcut, expansion)])
+
+    def update_snippets(self, snippets: Mapping[str, str]):
+        """Adds or overwrites several snippets at once, keeping the others."""
+        history = self._history_for_change()
+        self._store.update(snippets)
+        if history is not None:
+            history.record(snippets.items())
+
+    def delete_snippet(self, shortcut: str) -> bool:
+        """Removes *shortcut*; returns False if it did not exist."""
+        history = self._history_for_change()
+        deleted = self._store.delete(shortcut)
+        if deleted and history is not None:
+            history.record([(shortcut, None)])
+        return deleted
+
+    def begin_import(self):
+        """
+        Starts a bulk import: ``add(batch)`` any number of times, then ``commit()`` or ``abort()``.
+
+        Nothing is visible until ``commit``; see ``SnippetImporter``.
+        """
+        history = self._history_for_change()
+        session = self._store.begin_import()
+        return session if history is None else _RecordedImport(session, history.begin())
+
+    # ------------------------------------------------------------------
+    # History
+    # ------------------------------------------------------------------
+    @property
+    def history(self) -> Optional[SnippetHistory]:
+        """The edit history, or None without *keep_history*."""
+        if not self.keep_history:
+            return None
+        if self._history is None:
+            self._history = SnippetHistory(Path(self.filepath).with_name(Path(self.filepath).name + ".history"))
+        return self._history
+
+    def _history_for_change(self) -> Optional[SnippetHistory]:
+        history = self.history
+        if history is not None:
+            # The library before the first recorded change is the oldest restore point
+            history.ensure_seeded(self.load_mapping)
+        return history
+
+    # ------------------------------------------------------------------
+    # Change detection
+    # ------------------------------------------------------------------
+    def signature(self) -> Optional[Hashable]:
+        """A cheap value that changes whenever the library is written (None if unknown)."""
+        return self._store.signature()
+
+    def watch_paths(self) -> List[Path]:
+        """Files whose changes mean the library may have changed."""
+        return self._store.watch_paths()
+
+    def close(self):
+        self._store.close()
+        if self._history is not None:
+            self._history.close()
+
+
+class _RecordedImport:
+    """An import session that records the imported snippets in the history when it commits."""
+
+    def __init__(self, session, batch):
+        self._session = session
+        self._batch = batch
+
+    def add(self, rows: List[Tuple[str, str]]) -> None:
+        self._session.add(rows)
+        self._batch.add(rows)
+
+    def commit(self) -> None:
+        # Each commit cleans up after itself when it fails
+        try:
+            self._session.commit()
+        except BaseException:
+            self._batch.abort()
+            raise
+        self._batch.commit()
+
+    def abort(self) -> None:
+        try:
+            self._session.abort()
+        finally:
+            self._batch.abort()
@@ -0,0 +1,358 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Hashable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from .shortcut_index import ShortcutIndex
+from .snippet_cache import SnippetCache, content_hash
+
+
+class JsonSnippetStore:
+    """
+    The snippet library as one JSON object, rewritten in full on every change.
+
+    Parsed libraries are kept in a binary snapshot next to the file (see
+    ``SnippetCache``), so unchanged libraries load without parsing JSON.
+    """
+
+    kind = "json"
+
+    def __init__(self, filepath: Union[str, Path]):
+        self.filepath = Path(filepath)
+        self.cache = SnippetCache(self.filepath)
+
+    def load(self) -> Dict[str, str]:
+        snippets = self.load_indexed()[0]
+        return snippets if isinstance(snippets, dict) else dict(snippets.items())
+
+    def load_indexed(self) -> Tuple[Mapping[str, str], Optional[ShortcutIndex]]:
+        """
+        Returns the snippets and, when they came from the snapshot, their prebuilt index.
+
+        From the snapshot the snippets are a read-only ``PackedSnippets``;
+        otherwise a freshly parsed dictionary.
+        """
+        cached = self.cache.load()
+        if cached is not None:
+            return cached
+        try:
+            with open(self.filepath, "rb") as f:
+                stat = os.fstat(f.fileno())
+                read_at_ns = time.time_ns()
+                data = f.read()
+            snippets = json.loads(data)
+        except (FileNotFoundError, json.JSONDecodeError, UnicodeDecodeError):
+            # Return an empty dictionary if the file is not found or is corrupted.
+            return {}, None
+        if isinstance(snippets, dict):
+            # A copy: callers are free to modify the dictionary they get back
+            self.cache.store_in_background(dict(snippets), (stat.st_size, stat.st_mtime_ns, content_hash(data)), read_at_ns)
+        return snippets, None
+
+    def save(self, snippets: Mapping[str, str]) -> None:
+        # indent=4: Makes the file more readable.
+        # ensure_ascii=False: Properly saves Turkish characters.
+        data = json.dumps(snippets, indent=4, ensure_ascii=False).encode("utf-8")
+        # Written next to the file and swapped in, so a crash never leaves half a library behind
+        tmp_path = self.filepath.with_name(self.filepath.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            stat = os.fstat(f.fileno())
+            written_at_ns = time.time_ns()
+        os.replace(tmp_path, self.filepath)
+        # The engine reloads right after a save; have the snapshot ready for it
+        self.cache.store_in_background(dict(snippets), (stat.st_size, stat.st_mtime_ns, content_hash(data)),
+                                       written_at_ns)
+
+    def get(self, shortcut: str) -> Optional[str]:
+        # From the snapshot only this one expansion is decoded
+        return self.load_indexed()[0].get(shortcut)
+
+    def put(self, shortcut: str, expansion: str, replaces: Optional[str] = None) -> None:
+        snippets = self.load()
+        if replaces is not None and replaces != shortcut:
+            snippets.pop(replaces, None)
+        snippets[shortcut] = expansion
+        self.save(snippets)
+
+    def update(self, snippets: Mapping[str, str]) -> None:
+        current = self.load()
+        current.update(snippets)
+        self.save(current)
+
+    def delete(self, shortcut: str) -> bool:
+        snippets = self.load()
+        if shortcut not in snippets:
+            return False
+        del snippets[shortcut]
+        self.save(snippets)
+        return True
+
+    def signature(self) -> Optional[Hashable]:
+        # Size and content hash: two saves of the same size within one mtime tick still differ
+        try:
+            with open(self.filepath, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        return len(data), content_hash(data)
+
+    def watch_paths(self) -> List[Path]:
+        return [self.filepath]
+
+    def begin_import(self) -> "_JsonImport":
+        return _JsonImport(self)
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteSnippetStore:
+    """
+    The snippet library as an SQLite database in WAL mode.
+
+    Every change touches only its own rows inside a transaction, so an edit
+    costs the same with ten snippets or fifty thousand and a crash can never
+    leave a half-written library. Rows keep their insertion order (rowid),
+    matching the order of the JSON file. A revision counter in the ``meta``
+    table is bumped by every write, so readers in other processes can tell
+    cheaply whether anything changed.
+    """
+
+    kind = "sqlite"
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS snippets (
+            id INTEGER PRIMARY KEY,
+            shortcut TEXT NOT NULL UNIQUE,
+            expansion TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', 0);
+    """
+
+    def __init__(self, filepath: Union[str, Path]):
+        self.filepath = Path(filepath)
+        self._lock = threading.RLock()
+        # The engine reads from its IPC and file watcher threads; access is serialised by the lock
+        self._db = sqlite3.connect(self.filepath, timeout=10.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only risks the last commits on power loss, never a corrupt database
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self._SCHEMA)
+
+    def load(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._db.execute("SELECT shortcut, expansion FROM snippets ORDER BY id"))
+
+    def load_indexed(self) -> Tuple[Mapping[str, str], Optional[ShortcutIndex]]:
+        return self.load(), None
+
+    def save(self, snippets: Mapping[str, str]) -> None:
+        """Makes the table match *snippets*, writing only the rows that differ."""
+        with self._transaction() as db:
+            current = dict(db.execute("SELECT shortcut, expansion FROM snippets"))
+            removed = [(s,) for s in current if s not in snippets]
+            if removed:
+                db.executemany("DELETE FROM snippets WHERE shortcut = ?", removed)
+            changed = [(s, e) for s, e in snippets.items() if current.get(s) != e]
+            self._upsert(db, changed)
+
+    def get(self, shortcut: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT expansion FROM snippets WHERE shortcut = ?", (shortcut,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, shortcut: str, expansion: str, replaces: Optional[str] = None) -> None:
+        """Inserts or updates one snippet; *replaces* is the old shortcut when it was renamed."""
+        with self._transaction() as db:
+            if replaces is not None and replaces != shortcut:
+                db.execute("DELETE FROM snippets WHERE shortcut = ?", (replaces,))
+            self._upsert(db, [(shortcut, expansion)])
+
+    def update(self, snippets: Mapping[str, str]) -> None:
+        with self._transaction() as db:
+            self._upsert(db, snippets.items())
+
+    def delete(self, shortcut: str) -> bool:
+        with self._transaction() as db:
+            return db.execute("DELETE FROM snippets WHERE shortcut = ?", (shortcut,)).rowcount > 0
+
+    def signature(self) -> Optional[Hashable]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return ("sqlite", row[0] if row else 0)
+
+    def watch_paths(self) -> List[Path]:
+        # Commits land in the -wal file; the database file itself only changes on checkpoints
+        return [self.filepath, self.filepath.with_name(self.filepath.name + "-wal")]
+
+    def import_json(self, source: Union[str, Path, None]) -> int:
+        """
+        One-shot migration: copies a JSON library into a new database.
+
+        Runs once per database, in a single write transaction, so when two
+        processes migrate at once the second one finds it already done. A
+        missing or unreadable *source* starts the database empty. Returns the
+        number of snippets copied.
+        """
+        snippets = {}
+        if source is not None:
+            try:
+                with open(source, "r", encoding="utf-8") as f:
+                    snippets = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                pass
+        if not isinstance(snippets, dict):
+            snippets = {}
+        with self._transaction() as db:
+            if db.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone() is not None:
+                return 0
+            db.execute("INSERT INTO meta (key, value) VALUES ('migrated', 1)")
+            self._upsert(db, snippets.items())
+        return len(snippets)
+
+    def begin_import(self) -> "_SqliteImport":
+        return _SqliteImport(self)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """``BEGIN IMMEDIATE`` ... ``COMMIT`` that also bumps the revision."""
+        with self._lock:
+            # Take the write lock up front, so concurrent writers wait instead of failing part way
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+                self._db.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+                self._db.execute("COMMIT")
+            except BaseException:
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _upsert(db: sqlite3.Connection, rows) -> None:
+        # ON CONFLICT keeps the row id, so an edited snippet keeps its place in the list
+        db.executemany(
+            "INSERT INTO snippets (shortcut, expansion) VALUES (?, ?) "
+            "ON CONFLICT(shortcut) DO UPDATE SET expansion = excluded.expansion",
+            ((str(s), str(e)) for s, e in rows),
+        )
+
+
+# ----------------------------------------------------------------------
+# Bulk imports
+# ----------------------------------------------------------------------
+class _SqliteImport:
+    """
+    Adds imported batches inside one write transaction on a connection of its own.
+
+    Other connections keep reading the previous library (WAL) until ``commit``.
+    """
+
+    def __init__(self, store: SqliteSnippetStore):
+        self._db = sqlite3.connect(store.filepath, timeout=10.0, isolation_level=None)
+        self._closed = False
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("BEGIN IMMEDIATE")
+
+    def add(self, rows: List[Tuple[str, str]]) -> None:
+        SqliteSnippetStore._upsert(self._db, rows)
+
+    def commit(self) -> None:
+        try:
+            self._db.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+            self._db.execute("COMMIT")
+        finally:
+            # Rolls back whatever a failed commit left open
+            self.abort()
+
+    def abort(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self._db.in_transaction:
+                self._db.execute("ROLLBACK")
+        finally:
+            self._db.close()
+
+
+class _JsonImport:
+    """
+    Stages imported batches in a temporary SQLite file next to the library.
+
+    ``commit`` writes the merged library once, streaming: existing snippets
+    in their order (imported texts replace theirs), then the new ones. Only
+    one snippet at a time is held in memory besides the current library.
+    """
+
+    def __init__(self, store: JsonSnippetStore):
+        self._store = store
+        fd, path = tempfile.mkstemp(prefix=store.filepath.name + ".", suffix=".import", dir=store.filepath.parent)
+        os.close(fd)
+        self._path = Path(path)
+        self._db = sqlite3.connect(self._path, isolation_level=None)
+        self._closed = False
+        # Scratch data: no journal, no syncing
+        self._db.execute("PRAGMA journal_mode=OFF")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute("CREATE TABLE snippets (id INTEGER PRIMARY KEY, shortcut TEXT NOT NULL UNIQUE, "
+                         "expansion TEXT NOT NULL)")
+
+    def add(self, rows: List[Tuple[str, str]]) -> None:
+        self._db.execute("BEGIN")
+        SqliteSnippetStore._upsert(self._db, rows)
+        self._db.execute("COMMIT")
+
+    def commit(self) -> None:
+        current = self._store.load_indexed()[0]
+        db = self._db
+        tmp_path = self._store.filepath.with_name(self._store.filepath.name + ".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                # Same layout as json.dump(..., indent=4, ensure_ascii=False)
+                separator = "\n"
+                f.write("{")
+                for shortcut in current:
+                    row = db.execute("SELECT expansion FROM snippets WHERE shortcut = ?", (shortcut,)).fetchone()
+                    expansion = row[0] if row is not None else current[shortcut]
+                    f.write(f"{separator}    {json.dumps(shortcut, ensure_ascii=False)}: "
+                            f"{json.dumps(expansion, ensure_ascii=False)}")
+                    separator = ",\n"
+                for shortcut, expansion in db.execute("SELECT shortcut, expansion FROM snippets ORDER BY id"):
+                    if shortcut not in current:
+                        f.write(f"{separator}    {json.dumps(shortcut, ensure_ascii=False)}: "
+                                f"{json.dumps(expansion, ensure_ascii=False)}")
+                        separator = ",\n"
+                f.write("}" if separator == "\n" else "\n}")
+            os.replace(tmp_path, self._store.filepath)
+        except BaseException:
+            # A failed write or replace must not leave the half-written file behind
+            tmp_path.unlink(missing_ok=True)
+            raise
+        finally:
+            self.abort()
+
+    def abort(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._db.close()
+        self._path.unlink(missing_ok=True)
@@ -0,0 +1,196 @@
+"""
+Start-up milestones and the optional start-up profiler.
+
+Marks (``mark``) and initialisation phases (``phase``) are always recorded;
+they cost a perf_counter() call each. Setting ``CLIPDEX_PROFILE_STARTUP``
+(or passing ``--profile-startup``) additionally times the first import of
+the heavy modules in ``PROFILED_IMPORTS`` and writes a JSON report per
+process to ``startup_<role>.json``, plus one line per launch to
+``startup_history.jsonl``. The variable's value is the report directory;
+``1`` means the user data directory.
+"""
+
+import atexit
+import builtins
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+ENV_VAR = "CLIPDEX_PROFILE_STARTUP"
+FLAG = "--profile-startup"
+
+# Modules (and packages, including their submodules) whose first import is timed
+PROFILED_IMPORTS = ("clipdex_gui.main_window", "clipdex_core.listener", "PyQt6", "pynput", "keyboard")
+
+# Reference point for every mark; main.py imports this module before anything heavy
+_STARTED = time.perf_counter()
+_marks: Dict[str, float] = {}
+_phases: Dict[str, float] = {}
+_imports: Dict[str, float] = {}
+_report_dir: Optional[Path] = None
+_role = "app"
+
+
+def mark(name: str) -> None:
+    """Records the first time *name* is reached, in seconds since start-up."""
+    if name not in _marks:
+        _marks[name] = time.perf_counter() - _STARTED
+        _save()
+
+
+def marks() -> Dict[str, float]:
+    """Returns every recorded mark, in the order they were reached."""
+    return dict(_marks)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Times an initialisation step; repeated phases add up."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases[name] = _phases.get(name, 0.0) + time.perf_counter() - started
+        _save()
+
+
+# ----------------------------------------------------------------------
+# Profiler
+# ----------------------------------------------------------------------
+def enable(role: str, argv: Optional[list] = None) -> bool:
+    """
+    Turns the profiler on for this process if the flag or environment variable asks for it.
+
+    *role* names the report ("gui", "engine"). The flag is turned into the
+    environment variable so processes started from this one are profiled too.
+    """
+    global _report_dir, _role
+    argv = sys.argv if argv is None else argv
+    if FLAG in argv[1:]:
+        argv.remove(FLAG)
+        os.environ.setdefault(ENV_VAR, "1")
+    value = os.environ.get(ENV_VAR, "").strip()
+    if not value or value == "0":
+        return False
+    if value == "1":
+        from .paths import get_user_data_dir
+        _report_dir = get_user_data_dir()
+    else:
+        _report_dir = Path(value)
+        _report_dir.mkdir(parents=True, exist_ok=True)
+    _role = role
+    builtins.__import__ = _timed_import(builtins.__import__)
+    atexit.register(_append_history)
+    _save()
+    return True
+
+
+def report() -> Dict[str, Any]:
+    """Returns the start-up report of this process."""
+    return {
+        "role": _role,
+        "pid": os.getpid(),
+        "timestamp": time.time(),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "launch": _launch_kind(),
+        # Interpreter start-up before this module was imported; None where the OS does not say
+        "process_start_to_profiler": _process_age_at_start(),
+        "marks": dict(_marks),
+        "phases": dict(_phases),
+        "imports": dict(_imports),
+    }
+
+
+def _timed_import(original_import):
+    nested = [0]  # Profiled imports in progress; only the outermost one is recorded
+
+    def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if level or nested[0] or name in sys.modules or not name.startswith(PROFILED_IMPORTS):
+            return original_import(name, globals, locals, fromlist, level)
+        started = time.perf_counter()
+        nested[0] += 1
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            nested[0] -= 1
+            if name in sys.modules and name not in _imports:
+                _imports[name] = time.perf_counter() - started
+    return timed_import
+
+
+def _save() -> None:
+    if _report_dir is None:
+        return
+    try:
+        path = _report_dir / f"startup_{_role}.json"
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report(), f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write start-up report: {e}")
+
+
+def _append_history() -> None:
+    if _report_dir is None:
+        return
+    try:
+        with open(_report_dir / "startup_history.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(report()) + "\n")
+    except OSError as e:
+        print(f"Could not write start-up history: {e}")
+
+
+_launch: Optional[str] = None
+
+
+def _launch_kind() -> str:
+    """
+    "cold" for the first profiled launch of this role since boot (caches empty),
+    "warm" after that, "unknown" where the boot cannot be identified.
+    """
+    global _launch
+    if _launch is None:
+        _launch = "unknown"
+        try:
+            boot_id = Path("/proc/sys/kernel/random/boot_id").read_text().strip()
+        except OSError:
+            return _launch
+        marker = _report_dir / f"startup_{_role}.boot" if _report_dir is not None else None
+        if marker is None:
+            return _launch
+        try:
+            previous = marker.read_text().strip()
+        except OSError:
+            previous = None
+        _launch = "warm" if previous == boot_id else "cold"
+        try:
+            marker.write_text(boot_id)
+        except OSError:
+            pass
+    return _launch
+
+
+_process_age: Optional[float] = None
+
+
+def _process_age_at_start() -> Optional[float]:
+    """Seconds between process creation and the import of this module (Linux only, 10 ms resolution)."""
+    global _process_age
+    if _process_age is None and sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/stat", "rb") as f:
+                # Field 22 (starttime) counts clock ticks since boot; the command name may contain spaces
+                start_ticks = int(f.read().rsplit(b")", 1)[1].split()[19])
+            with open("/proc/uptime", "rb") as f:
+                uptime = float(f.read().split()[0])
+            age_now = uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+            _process_age = max(0.0, age_now - (time.perf_counter() - _STARTED))
+        except (OSError, ValueError, IndexError):
+            return None
+    return _process_age
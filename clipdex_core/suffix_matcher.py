@@ -0,0 +1,232 @@
+from array import array
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class ShortcutAutomaton:
+    """
+    Aho-Corasick automaton over all shortcuts, for trigger-less expansion.
+
+    Feeding typed characters one at a time with ``step`` yields a state whose
+    ``matches`` are the shortcuts that the typed text currently ends with.
+    A step follows at most as many failure links as the longest shortcut has
+    characters, so the cost per keystroke does not grow with the library.
+    Nodes are stored in flat lists like ShortcutIndex; node ``0`` is the root.
+    """
+
+    ROOT = 0
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        self.patterns: FrozenSet[str] = frozenset(p for p in patterns if p)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._terminal: List[Optional[str]] = [None]
+        for pattern in self.patterns:
+            self._insert(pattern)
+        self._fail = array("i", [0]) * len(self._goto)
+        # _output[node]: nearest node (itself or along failure links) that completes a shortcut, or -1
+        self._output = array("i", [-1]) * len(self._goto)
+        self._alphabet = frozenset(char for pattern in self.patterns for char in pattern)
+        self._link()
+
+    def _insert(self, pattern: str) -> None:
+        node = self.ROOT
+        for char in pattern:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._terminal.append(None)
+                self._goto[node][char] = child
+            node = child
+        self._terminal[node] = pattern
+
+    def _link(self) -> None:
+        """Computes failure and output links breadth-first."""
+        goto, fail, output, terminal = self._goto, self._fail, self._output, self._terminal
+        queue = list(goto[self.ROOT].values())
+        for node in queue:
+            output[node] = node if terminal[node] is not None else -1
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for char, child in goto[node].items():
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, self.ROOT)
+                output[child] = child if terminal[child] is not None else output[fail[child]]
+                queue.append(child)
+
+    # ------------------------------------------------------------------
+    # Per-keystroke API
+    # ------------------------------------------------------------------
+    def step(self, state: int, char: str) -> int:
+        """Returns the state after typing *char* in *state*."""
+        if char not in self._alphabet:
+            return self.ROOT
+        goto, fail = self._goto, self._fail
+        while True:
+            child = goto[state].get(char)
+            if child is not None:
+                return child
+            if state == self.ROOT:
+                return self.ROOT
+            state = fail[state]
+
+    def matches(self, state: int) -> Iterable[str]:
+        """Yields the shortcuts the typed text ends with, longest first."""
+        node = self._output[state]
+        while node != -1:
+            yield self._terminal[node]  # type: ignore[misc]
+            node = self._output[self._fail[node]]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+
+class KeyRingBuffer:
+    """
+    Fixed-size ring of the most recent typed characters and automaton states.
+
+    Keeping the states next to each character lets Backspace restore the
+    previous states without re-scanning, and the characters give the
+    context needed for word-boundary checks. Two states are kept per
+    character: one for the base automaton and one for the delta automaton.
+    """
+
+    def __init__(self, size: int = 64):
+        self.size = size
+        self._chars = array("I", [0]) * size   # Code points
+        self._base_states = array("i", [0]) * size
+        self._delta_states = array("i", [0]) * size
+        self._end = 0     # Index after the newest entry
+        self._count = 0
+
+    def clear(self) -> None:
+        self._count = 0
+
+    def rescan(self, base: "ShortcutAutomaton", delta: "ShortcutAutomaton") -> None:
+        """Recomputes the stored states for new automata, keeping the characters."""
+        base_state = delta_state = ShortcutAutomaton.ROOT
+        for offset in range(self._count, 0, -1):
+            index = (self._end - offset) % self.size
+            char = chr(self._chars[index])
+            base_state = base.step(base_state, char)
+            delta_state = delta.step(delta_state, char)
+            self._base_states[index] = base_state
+            self._delta_states[index] = delta_state
+
+    def push(self, char: str, base_state: int, delta_state: int) -> None:
+        end = self._end
+        self._chars[end] = ord(char)
+        self._base_states[end] = base_state
+        self._delta_states[end] = delta_state
+        self._end = (end + 1) % self.size
+        if self._count < self.size:
+            self._count += 1
+
+    def pop(self) -> None:
+        if self._count:
+            self._end = (self._end - 1) % self.size
+            self._count -= 1
+
+    @property
+    def base_state(self) -> int:
+        """Base automaton state after the newest character (the root when empty)."""
+        return self._base_states[(self._end - 1) % self.size] if self._count else ShortcutAutomaton.ROOT
+
+    @property
+    def delta_state(self) -> int:
+        return self._delta_states[(self._end - 1) % self.size] if self._count else ShortcutAutomaton.ROOT
+
+    def char_before(self, length: int) -> Optional[str]:
+        """Returns the character typed just before the last *length* characters, if still buffered."""
+        if length >= self._count:
+            return None
+        return chr(self._chars[(self._end - 1 - length) % self.size])
+
+
+class SuffixMatcher:
+    """
+    Matches shortcuts against the end of the typed text, without a trigger key.
+
+    A shortcut that starts with a letter or digit only matches at the start
+    of a word, so ``btw`` does not fire inside ``abtw``.
+
+    Snippet edits are applied incrementally: shortcuts added since the last
+    full build go into a small delta automaton that is stepped alongside the
+    base one, and removed shortcuts are filtered out of the base matches.
+    The base automaton is rebuilt only once the delta grows past
+    ``MAX_DELTA`` shortcuts.
+    """
+
+    MAX_DELTA = 256
+
+    def __init__(self, shortcuts: Iterable[str] = (), buffer_size: int = 64):
+        patterns = frozenset(s for s in shortcuts if s)
+        self.shortcuts = patterns
+        # (base, delta, removed) is replaced as a whole so the listener never sees half an update
+        self._generation = (ShortcutAutomaton(patterns), ShortcutAutomaton(), frozenset())
+        self._buffer_generation = self._generation
+        self.buffer = KeyRingBuffer(buffer_size)
+
+    def update(self, shortcuts: Iterable[str]) -> bool:
+        """Adopts a new shortcut set. Returns False if it did not change."""
+        patterns = frozenset(s for s in shortcuts if s)
+        if patterns == self.shortcuts:
+            return False
+        base = self._generation[0]
+        added = patterns - base.patterns
+        removed = base.patterns - patterns
+        if len(added) + len(removed) > self.MAX_DELTA:
+            self._generation = (ShortcutAutomaton(patterns), ShortcutAutomaton(), frozenset())
+        else:
+            self._generation = (base, ShortcutAutomaton(added), frozenset(removed))
+        self.shortcuts = patterns
+        return True
+
+    def feed(self, char: str) -> Optional[str]:
+        """Adds a typed character; returns the shortcut the text now ends with, if any."""
+        generation = self._generation
+        buffer = self.buffer
+        if generation is not self._buffer_generation:
+            # Buffered states belong to the previous automata; re-run the buffered text
+            # through the new ones so the word typed so far still counts
+            buffer.rescan(generation[0], generation[1])
+            self._buffer_generation = generation
+        base, delta, removed = generation
+        base_state = base.step(buffer.base_state, char)
+        delta_state = delta.step(buffer.delta_state, char)
+        buffer.push(char, base_state, delta_state)
+        if not base_state and not delta_state:
+            return None
+
+        best: Optional[str] = None
+        for shortcut in base.matches(base_state):
+            if shortcut not in removed and self._at_word_start(shortcut):
+                best = shortcut
+                break
+        for shortcut in delta.matches(delta_state):
+            if best is not None and len(shortcut) <= len(best):
+                break
+            if self._at_word_start(shortcut):
+                best = shortcut
+                break
+        return best
+
+    def backspace(self) -> None:
+        self.buffer.pop()
+
+    def reset(self) -> None:
+        """Forgets the typed context (after an expansion, or when the cursor may have moved)."""
+        self.buffer.clear()
+
+    def _at_word_start(self, shortcut: str) -> bool:
+        if not _is_word_char(shortcut[0]):
+            return True
+        before = self.buffer.char_before(len(shortcut))
+        return before is None or not _is_word_char(before)
@@ -0,0 +1,179 @@
+"""
+Dynamic placeholders in expansions.
+
+    {date} {date:%d.%m.%Y}    current date (strftime format, default %Y-%m-%d)
+    {time} {time:%H:%M:%S}    current time (default %H:%M)
+    {datetime}                 date and time (default %Y-%m-%d %H:%M)
+    {clipboard}                current clipboard text
+    {prompt:Name}              asks for a value; repeated names reuse the answer
+    {cursor}                   where the cursor is left after expanding
+    {{ and }}                  literal braces
+
+Any other text in braces is kept as it is. Expansions are compiled once when
+the snippet library loads; plain text without placeholders is not compiled
+at all.
+"""
+
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from .edit_plan import grapheme_count
+from .packed_snippets import PackedSnippets
+
+_PLACEHOLDER = re.compile(r"\{\{|\}\}|\{(date|time|datetime|clipboard|prompt|cursor)(?::([^{}]*))?\}")
+
+_DEFAULT_FORMATS = {"date": "%Y-%m-%d", "time": "%H:%M", "datetime": "%Y-%m-%d %H:%M"}
+
+# A part is ("text", str), ("time", format), ("clipboard", ""), ("prompt", name) or ("cursor", "")
+TemplatePart = Tuple[str, str]
+
+
+class _TimeFormatCache:
+    """
+    Bounded LRU of formatted dates and times.
+
+    A format is only re-rendered when a field it shows changes: a date-only
+    format once a day, "%H:%M" once a minute, and so on.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[str, Tuple[int, ...]], str]" = OrderedDict()
+
+    @staticmethod
+    def _resolution(fmt: str) -> int:
+        """Number of struct_time fields (year, yday, hour, minute, second) the format depends on."""
+        if any(code in fmt for code in ("%S", "%T", "%X", "%c", "%s", "%r")):
+            return 5
+        if any(code in fmt for code in ("%M", "%R")):
+            return 4
+        if any(code in fmt for code in ("%H", "%I", "%p", "%k", "%l")):
+            return 3
+        return 2
+
+    def format(self, fmt: str, now: time.struct_time) -> str:
+        fields = (now.tm_year, now.tm_yday, now.tm_hour, now.tm_min, now.tm_sec)
+        key = (fmt, fields[:self._resolution(fmt)])
+        text = self._entries.get(key)
+        if text is None:
+            text = time.strftime(fmt, now)
+            self._entries[key] = text
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        return text
+
+
+_time_cache = _TimeFormatCache()
+
+
+class Template:
+    """
+    A compiled expansion.
+
+    Static templates (no placeholders other than ``{cursor}``) are fully
+    rendered at compile time: ``static_text`` holds the text and
+    ``cursor_back`` the number of Left presses that put the cursor in place.
+    """
+
+    __slots__ = ("source", "parts", "static_text", "cursor_back")
+
+    def __init__(self, source: str, parts: List[TemplatePart]):
+        self.source = source
+        self.parts = parts
+        self.static_text: Optional[str] = None
+        self.cursor_back = 0
+        if all(kind in ("text", "cursor") for kind, _ in parts):
+            self.static_text = "".join(value for kind, value in parts if kind == "text")
+        self.cursor_back = self._static_cursor_back()
+
+    @property
+    def is_static(self) -> bool:
+        return self.static_text is not None
+
+    def _static_cursor_back(self) -> int:
+        """Left presses for {cursor}, if everything after it is plain text (otherwise 0)."""
+        for index, (kind, _) in enumerate(self.parts):
+            if kind == "cursor":
+                tail = self.parts[index + 1:]
+                if all(k == "text" for k, _ in tail):
+                    return grapheme_count("".join(v for _, v in tail))
+                return 0
+        return 0
+
+    def render(self, clipboard: Callable[[], Optional[str]],
+               prompt: Callable[[str], Optional[str]]) -> Optional[Tuple[str, int]]:
+        """Returns ``(text, cursor_back)``, or None if a prompt was cancelled."""
+        if self.static_text is not None:
+            return self.static_text, self.cursor_back
+        now = time.localtime()
+        answers: Dict[str, str] = {}
+        pieces: List[str] = []
+        cursor_at: Optional[int] = None
+        for kind, value in self.parts:
+            if kind == "text":
+                pieces.append(value)
+            elif kind == "time":
+                pieces.append(_time_cache.format(value, now))
+            elif kind == "clipboard":
+                pieces.append(clipboard() or "")
+            elif kind == "prompt":
+                if value not in answers:
+                    answer = prompt(value)
+                    if answer is None:
+                        return None
+                    answers[value] = answer
+                pieces.append(answers[value])
+            elif kind == "cursor" and cursor_at is None:
+                cursor_at = len(pieces)
+        text = "".join(pieces)
+        cursor_back = grapheme_count("".join(pieces[cursor_at:])) if cursor_at is not None else 0
+        return text, cursor_back
+
+
+def has_placeholders(text: str) -> bool:
+    return "{" in text and _PLACEHOLDER.search(text) is not None
+
+
+def compile_template(text: str) -> Template:
+    parts: List[TemplatePart] = []
+
+    def add_text(value: str) -> None:
+        if not value:
+            return
+        if parts and parts[-1][0] == "text":
+            parts[-1] = ("text", parts[-1][1] + value)
+        else:
+            parts.append(("text", value))
+
+    position = 0
+    for match in _PLACEHOLDER.finditer(text):
+        add_text(text[position:match.start()])
+        position = match.end()
+        token = match.group(0)
+        if token in ("{{", "}}"):
+            add_text(token[0])
+            continue
+        name, argument = match.group(1), match.group(2)
+        if name in _DEFAULT_FORMATS:
+            parts.append(("time", argument or _DEFAULT_FORMATS[name]))
+        elif name == "prompt":
+            parts.append(("prompt", argument or "Value"))
+        else:
+            parts.append((name, ""))
+    add_text(text[position:])
+    return Template(text, parts)
+
+
+def compile_snippets(snippets: Mapping[str, str]) -> Dict[str, Template]:
+    """Compiles the expansions that contain placeholders; plain text is left out."""
+    if isinstance(snippets, PackedSnippets):
+        # Only texts with a brace are decoded
+        candidates = ((shortcut, snippets[shortcut]) for shortcut in snippets.with_brace())
+    else:
+        candidates = snippets.items()
+    return {shortcut: compile_template(text) for shortcut, text in candidates
+            if isinstance(text, str) and has_placeholders(text)}
@@ -0,0 +1,170 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from .paths import get_user_data_dir
+
+
+class UsageLog:
+    """
+    Records which snippets are expanded, and how often.
+
+    Every expansion is appended to a log file as one JSON line. Every
+    ``COMPACT_EVERY`` records the log is folded into a summary file of
+    per-snippet counts and last-used timestamps, so readers only ever parse
+    the summary plus a short log tail. Compaction renames the log to a
+    numbered generation file first; a crash part way leaves that file
+    behind, and it is merged (or discarded, if the summary already covers
+    it) the next time the log is opened.
+    """
+
+    COMPACT_EVERY = 200
+
+    def __init__(self, filepath: Union[str, Path, None] = None, read_only: bool = False):
+        if filepath is None:
+            filepath = get_user_data_dir() / "usage.log"
+        self.filepath = Path(filepath)
+        self.summary_path = self.filepath.with_suffix(".json")
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._file = None
+        self._generation = 0
+        self._pending = 0  # Records appended since the last compaction
+        # Kept as the same dict objects for the lifetime of the log, so callers may hold on to them
+        self.counts: Dict[str, int] = {}
+        self.last_used: Dict[str, float] = {}
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def record(self, shortcut: str, when: Optional[float] = None) -> bool:
+        """Appends one use of *shortcut*. Returns True if the log was compacted as a result."""
+        when = time.time() if when is None else when
+        with self._lock:
+            self._apply(shortcut, when)
+            if self.read_only:
+                return False
+            try:
+                if self._file is None:
+                    self._file = open(self.filepath, "a", encoding="utf-8")
+                self._file.write(json.dumps([when, shortcut], ensure_ascii=False) + "\n")
+                self._file.flush()
+            except OSError as e:
+                print(f"Could not write usage log: {e}")
+                return False
+            self._pending += 1
+            if self._pending < self.COMPACT_EVERY:
+                return False
+        self.compact()
+        return True
+
+    def compact(self) -> None:
+        """Folds the log into the summary file and starts a new, empty log."""
+        if self.read_only:
+            return
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            generation = self._generation + 1
+            segment = self._segment_path(generation)
+            try:
+                if self.filepath.exists():
+                    os.replace(self.filepath, segment)
+                self._write_summary(generation)
+                self._generation = generation
+                if segment.exists():
+                    segment.unlink()
+                self._pending = 0
+            except OSError as e:
+                print(f"Could not compact usage log: {e}")
+
+    def close(self) -> None:
+        if self._pending:
+            self.compact()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> Dict[str, Tuple[int, float]]:
+        """Returns ``{shortcut: (count, last_used)}``."""
+        with self._lock:
+            return {s: (n, self.last_used.get(s, 0.0)) for s, n in self.counts.items()}
+
+    def top(self, n: int) -> List[str]:
+        """Returns the *n* most used shortcuts, most used first."""
+        with self._lock:
+            ranked = sorted(self.counts.items(), key=lambda item: (-item[1], -self.last_used.get(item[0], 0.0)))
+        return [shortcut for shortcut, _ in ranked[:n]]
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _apply(self, shortcut: str, when: float) -> None:
+        self.counts[shortcut] = self.counts.get(shortcut, 0) + 1
+        if when > self.last_used.get(shortcut, 0.0):
+            self.last_used[shortcut] = when
+
+    def _segment_path(self, generation: int) -> Path:
+        return self.filepath.with_name(f"{self.filepath.name}.{generation}")
+
+    def _load(self) -> None:
+        try:
+            with open(self.summary_path, "r", encoding="utf-8") as f:
+                summary = json.load(f)
+            self._generation = int(summary.get("generation", 0))
+            for shortcut, (count, last_used) in summary.get("snippets", {}).items():
+                self.counts[shortcut] = int(count)
+                self.last_used[shortcut] = float(last_used)
+        except (FileNotFoundError, json.JSONDecodeError, ValueError, TypeError):
+            pass
+
+        # Segments left behind by an interrupted compaction
+        leftovers = []
+        newest = self._generation
+        for segment in sorted(self.filepath.parent.glob(self.filepath.name + ".*")):
+            suffix = segment.name.rsplit(".", 1)[-1]
+            if not suffix.isdigit():
+                continue
+            if int(suffix) > self._generation:
+                self._replay(segment)
+                leftovers.append(segment)
+                newest = max(newest, int(suffix))
+            elif not self.read_only:
+                # Already folded into the summary
+                segment.unlink(missing_ok=True)
+        self._replay(self.filepath)
+        if leftovers and not self.read_only:
+            # The new summary's generation covers every merged segment
+            self._generation = newest
+            self.compact()
+            for segment in leftovers:
+                segment.unlink(missing_ok=True)
+
+    def _replay(self, path: Path) -> None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        when, shortcut = json.loads(line)
+                    except (ValueError, TypeError):
+                        continue  # Torn write at the end of the log
+                    self._apply(shortcut, float(when))
+                    self._pending += 1
+        except FileNotFoundError:
+            pass
+
+    def _write_summary(self, generation: int) -> None:
+        summary = {
+            "generation": generation,
+            "snippets": {s: [n, self.last_used.get(s, 0.0)] for s, n in self.counts.items()},
+        }
+        tmp_path = self.summary_path.with_name(self.summary_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False)
+        os.replace(tmp_path, self.summary_path)
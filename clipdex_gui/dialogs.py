@@ -1,5 +1,8 @@
+import threading
+
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLineEdit, QTextEdit,
-                             QFormLayout, QDialogButtonBox, QLabel)
+                             QFormLayout, QDialogButtonBox, QLabel, QInputDialog, QProgressDialog)
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
 
 class SnippetDialog(QDialog):
     def __init__(self, parent=None, shortcut="", expansion=""):
@@ -12,7 +15,9 @@ class SnippetDialog(QDialog):
         self.shortcut_input = QLineEdit(shortcut)
         self.shortcut_input.setPlaceholderText("shortcut")
         self.expansion_input = QTextEdit(expansion)
-        self.expansion_input.setPlaceholderText("Enter the text to expand.")
+        self.expansion_input.setPlaceholderText(
+            "Enter the text to expand.\n"
+            "Placeholders: {date}, {time}, {clipboard}, {cursor}, {prompt:Name}")
 
         form_layout.addRow(QLabel("Shortcut:"), self.shortcut_input)
         form_layout.addRow(QLabel("Text:"), self.expansion_input)
@@ -81,4 +86,97 @@ class SnippetDialog(QDialog):
         return {
             "shortcut": shortcut,
             "expansion": self.expansion_input.toPlainText().strip()
-        }
\ No newline at end of file
+        }
+
+class TemplatePrompt(QObject):
+    """
+    Answers {prompt:Name} placeholders with an input dialog.
+
+    ``ask`` is called from the injection thread and blocks until the dialog,
+    shown on the GUI thread, is closed.
+    """
+
+    _requested = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self._answered = threading.Event()
+        self._answer = None
+        self._requested.connect(self._show, Qt.ConnectionType.QueuedConnection)
+
+    def ask(self, label):
+        """Returns the text entered for *label*, or None if the dialog was cancelled."""
+        self._answered.clear()
+        self._answer = None
+        self._requested.emit(label)
+        self._answered.wait()
+        return self._answer
+
+    def _show(self, label):
+        text, ok = QInputDialog.getText(None, "Clipdex", f"{label}:")
+        self._answer = text if ok else None
+        self._answered.set()
+
+
+class ImportProgressDialog(QProgressDialog):
+    """
+    Runs a ``SnippetImporter`` on a worker thread while showing its progress.
+
+    ``exec`` returns once the import finished, failed or was cancelled;
+    afterwards ``import_result`` holds ``(imported, skipped)`` or ``error`` the
+    exception (ImportCancelled after Cancel). Cancel only asks the worker to
+    stop; the dialog stays open, with the event loop running, until it has.
+    """
+
+    _progressed = pyqtSignal(float, int)
+    _finished = pyqtSignal()
+
+    def __init__(self, importer, parent=None):
+        super().__init__("Reading snippets…", "Cancel", 0, 1000, parent)
+        self.setWindowTitle("Import Snippets")
+        self.setWindowModality(Qt.WindowModality.WindowModal)
+        self.setMinimumDuration(0)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self.import_result = None  # Not "result": that would hide QDialog.result()
+        self.error = None
+        self._importer = importer
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="clipdex-import", daemon=True)
+        self._progressed.connect(self._show_progress)
+        self._finished.connect(self.accept)
+        # Replaces the built-in cancel(), which would hide the dialog before the worker stopped
+        self.canceled.disconnect()
+        self.canceled.connect(self._request_cancel)
+
+    def exec(self):
+        self._thread.start()
+        code = super().exec()
+        # Only _finished closes the dialog, so the worker is already on its way out
+        self._thread.join()
+        return code
+
+    def reject(self):
+        # Esc and the window's close button cancel the import as well
+        self._request_cancel()
+
+    def _request_cancel(self):
+        if not self._cancel.is_set():
+            self._cancel.set()
+            self.setLabelText("Cancelling…")
+
+    def _run(self):
+        try:
+            self.import_result = self._importer.run(on_progress=self._progressed.emit, cancelled=self._cancel.is_set)
+        except Exception as e:
+            self.error = e
+        self._finished.emit()
+
+    def _show_progress(self, fraction, imported):
+        if self._cancel.is_set():
+            return
+        self.setValue(int(fraction * 1000))
+        if fraction >= 1.0:
+            self.setLabelText(f"Saving {imported:,} snippets…")
+        else:
+            self.setLabelText(f"Reading snippets… {imported:,}")
@@ -2,8 +2,9 @@ import sys
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QTableWidget, QTableWidgetItem,
                              QPushButton, QVBoxLayout, QWidget, QHBoxLayout, QHeaderView, QMessageBox,
                              QTabWidget, QLabel, QTextEdit, QLineEdit, QStyledItemDelegate, QStyleOptionViewItem, QStyle,
-                             QSystemTrayIcon, QMenu, QCheckBox, QComboBox, QFileDialog)
+                             QSystemTrayIcon, QMenu, QCheckBox, QComboBox, QFileDialog, QInputDialog)
 import json
+from datetime import datetime
 from PyQt6.QtGui import QFont, QMouseEvent, QAction, QIcon
 from PyQt6.QtCore import QEvent
 from PyQt6.QtCore import QModelIndex
@@ -12,10 +13,11 @@ from pathlib import Path
 from PyQt6.QtCore import QSize
 from PyQt6.QtCore import QTimer
 
-from clipdex_gui.dialogs import SnippetDialog
+from clipdex_gui.dialogs import ImportProgressDialog, SnippetDialog
 
-from clipdex_core.snippet_manager import SnippetManager
+from clipdex_core.snippet_manager import STORAGE_ENGINES, SnippetManager
 from clipdex_core.config_manager import ConfigManager
+from clipdex_core import startup
 
 # Basic theme structure for theme management
 DARK_THEME = {
@@ -167,29 +169,57 @@ class HoverTableWidget(QTableWidget):
         super().leaveEvent(event)
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    STATS_REFRESH_MS = 1000  # Statistics tab refresh interval while it is visible
+    PREVIEW_CHARS = 200  # Characters of each expansion shown in the table
+
+    def __init__(self, metrics=None, engine=None):
+        """
+        *metrics* is the listener's ExpansionMetrics (anything with snapshot() and reset()).
+        *engine* is the EngineClient of the engine process, told when snippets are saved.
+        """
         super().__init__()
+        self._metrics = metrics
+        self._engine = engine
         # Apply the proper application icon before anything else
         self._setup_app_icon()
         self.setWindowTitle("Clipdex - Snippet Manager")
         self.setGeometry(300, 300, 500, 600)
         self.setFixedSize(500, 600) # Set the fixed size of the window
 
+        with startup.phase("config_manager"):
+            self.config_manager = ConfigManager()
         # Initialize the SnippetManager
-        self.snippet_manager = SnippetManager()
-        self.config_manager = ConfigManager()
+        with startup.phase("snippet_manager"):
+            self.snippet_manager = SnippetManager(storage=self.config_manager.get("snippet_storage", "json"),
+                                                 keep_history=True)
+        self._table_snippets = {}  # What the Shortcuts table was last filled from
+        # Cached theme preference, kept current by config change notifications
+        self._theme_pref = self.config_manager.get("theme", "system")
+        self.config_manager.subscribe(self._on_config_changed)
 
         # Create tab widget as central widget
         self.tab_widget = QTabWidget()
         self.setCentralWidget(self.tab_widget)
 
-        # Create tabs
-        self.create_shortcuts_tab()
-        self.create_settings_tab()
-        self.create_about_tab()
+        # Tabs are empty pages until first shown; started to tray, none of them is built
+        self._tab_builders = {}
+        self._painted = False
+        self._paint_callbacks = []  # Work queued until the first paint
+        self._add_lazy_tab("Shortcuts", self.create_shortcuts_tab)
+        self._add_lazy_tab("Settings", self.create_settings_tab)
+        self._stats_tab = self._add_lazy_tab("Statistics", self.create_statistics_tab)
+        self._add_lazy_tab("About", self.create_about_tab)
+        self.tab_widget.currentChanged.connect(self._on_tab_changed)
+        # Statistics only refresh while their tab is on screen (see _on_tab_changed)
+        self._stats_timer = QTimer()
+        self._stats_timer.timeout.connect(self._refresh_statistics)
 
         # Setup system tray (goes before installing global event filter so tray is ready)
         self._setup_tray_icon()
+        startup.mark("tray_icon")
+
+        # Keep the login entry in line with the config once the event loop runs
+        QTimer.singleShot(0, self._sync_auto_start)
 
         # To catch any click on any widget, install a global event filter
         app_instance = QApplication.instance()
@@ -238,20 +268,24 @@ class MainWindow(QMainWindow):
         self.add_btn = QPushButton("Add")
         self.edit_btn = QPushButton("Edit")
         self.delete_btn = QPushButton("Delete")
+        self.history_btn = QPushButton("History")
 
         # Set the height of the buttons
         self.add_btn.setFixedHeight(50)
         self.edit_btn.setFixedHeight(50)
         self.delete_btn.setFixedHeight(50)
+        self.history_btn.setFixedHeight(50)
 
         self.add_btn.setStyleSheet("font-size: 15px; font-weight: bold;")
         self.edit_btn.setStyleSheet("font-size: 15px; font-weight: bold;")
         self.delete_btn.setStyleSheet("font-size: 15px; font-weight: bold;")
+        self.history_btn.setStyleSheet("font-size: 15px; font-weight: bold;")
 
         # Add the buttons to the layout
         button_layout.addWidget(self.add_btn)
         button_layout.addWidget(self.edit_btn)
         button_layout.addWidget(self.delete_btn)
+        button_layout.addWidget(self.history_btn)
         shortcuts_layout.addLayout(button_layout)
 
         # Test area
@@ -263,13 +297,14 @@ class MainWindow(QMainWindow):
         self.test_textbox.setPlaceholderText("You can test your shortcuts here...")
         shortcuts_layout.addWidget(self.test_textbox)
 
-        # Load the data into the table
-        self.populate_table()
+        # Load the data into the table once the window has painted
+        self._after_first_paint(self.populate_table)
 
         # Connect the buttons to the functions
         self.add_btn.clicked.connect(self.add_snippet)
         self.edit_btn.clicked.connect(self.edit_snippet)
         self.delete_btn.clicked.connect(self.delete_snippet)
+        self.history_btn.clicked.connect(self.snippet_history)
         
         # Connect search box to filter function
         self.search_box.textChanged.connect(self.filter_table)
@@ -277,17 +312,14 @@ class MainWindow(QMainWindow):
         # Connection: update font when selection changes
         self.table.itemSelectionChanged.connect(self.update_selected_font)
 
-        # Add shortcuts tab
-        self.tab_widget.addTab(shortcuts_widget, "Shortcuts")
-        
         # System theme change listener - check less frequently to reduce system load
         self._theme_timer = QTimer()
         self._theme_timer.timeout.connect(self._check_system_theme_change)
         self._theme_timer.start(30000)  # Check every 30 seconds instead of 5
         
         # Apply current theme
-        current_theme = self.config_manager.get("theme", "system")
-        self.apply_theme(current_theme)
+        self.apply_theme(self._theme_pref)
+        return shortcuts_widget
 
     def create_settings_tab(self):
         """Creates the Settings tab."""
@@ -328,6 +360,18 @@ class MainWindow(QMainWindow):
         trigger_layout.addStretch()
         settings_layout.addLayout(trigger_layout)
 
+        expansion_mode_layout = QHBoxLayout()
+        expansion_mode_label = QLabel("Expand shortcuts:")
+        expansion_mode_combo = QComboBox()
+        expansion_mode_combo.addItems(["After the trigger key", "As soon as they are typed"])
+        expansion_mode_combo.setToolTip("'As soon as they are typed' needs no shortcut character or trigger key:\n"
+                                        "a shortcut such as 'btw' or 'addr;' expands on its last character.\n"
+                                        "Choose shortcuts that do not start ordinary words.")
+        expansion_mode_layout.addWidget(expansion_mode_label)
+        expansion_mode_layout.addWidget(expansion_mode_combo)
+        expansion_mode_layout.addStretch()
+        settings_layout.addLayout(expansion_mode_layout)
+
         # ----------------- 4. Shortcut character -----------------
         shortcut_char_layout = QHBoxLayout()
         shortcut_char_label = QLabel("Shortcut character:")
@@ -338,14 +382,58 @@ class MainWindow(QMainWindow):
         shortcut_char_layout.addStretch()
         settings_layout.addLayout(shortcut_char_layout)
 
-        # ----------------- 6. Backup / Restore -------------
+        suggestions_checkbox = QCheckBox("Show suggestions while typing a shortcut")
+        settings_layout.addWidget(suggestions_checkbox)
+
+        # ----------------- 5. Insertion method -----------------
+        insertion_layout = QHBoxLayout()
+        insertion_label = QLabel("Insert text by:")
+        insertion_combo = QComboBox()
+        insertion_combo.addItems(["Automatic", "Typing", "Pasting"])
+        insertion_combo.setToolTip("Automatic pastes long or non-ASCII expansions and types short ones.")
+        insertion_layout.addWidget(insertion_label)
+        insertion_layout.addWidget(insertion_combo)
+        insertion_layout.addStretch()
+        settings_layout.addLayout(insertion_layout)
+
+        pacing_layout = QHBoxLayout()
+        pacing_label = QLabel("Key pacing:")
+        pacing_combo = QComboBox()
+        pacing_combo.addItems(["Automatic", "Fast", "Balanced", "Safe", "Custom"])
+        pacing_combo.setToolTip("Automatic calibrates how fast keys can be sent on this machine.\n"
+                                "Custom uses the 'pacing_custom' values in config.json.")
+        pacing_layout.addWidget(pacing_label)
+        pacing_layout.addWidget(pacing_combo)
+        pacing_layout.addStretch()
+        settings_layout.addLayout(pacing_layout)
+
+        # ----------------- 6. Storage, backup / restore -------------
+        storage_layout = QHBoxLayout()
+        storage_label = QLabel("Store snippets in:")
+        storage_combo = QComboBox()
+        storage_combo.addItems(["JSON file", "SQLite database"])
+        storage_combo.setToolTip("The database saves each change on its own, which keeps large libraries fast.\n"
+                                 "Switching to it copies the current snippets.json once.")
+        storage_layout.addWidget(storage_label)
+        storage_layout.addWidget(storage_combo)
+        storage_layout.addStretch()
+        settings_layout.addLayout(storage_layout)
+
         backup_layout = QHBoxLayout()
         export_btn = QPushButton("Export Snippets…")
         import_btn = QPushButton("Import Snippets…")
         export_btn.clicked.connect(self._export_snippets)
         import_btn.clicked.connect(self._import_snippets)
+        restore_btn = QPushButton("Restore Backup…")
+        restore_btn.setToolTip("Clipdex backs up the snippets automatically while it runs (every 30 minutes by default).")
+        restore_btn.clicked.connect(self._restore_backup)
         backup_layout.addWidget(export_btn)
         backup_layout.addWidget(import_btn)
+        backup_layout.addWidget(restore_btn)
+        undo_btn = QPushButton("Undo Changes…")
+        undo_btn.setToolTip("Every change to the snippets is kept; go back to how they were after any of them.")
+        undo_btn.clicked.connect(self._restore_history)
+        backup_layout.addWidget(undo_btn)
         settings_layout.addLayout(backup_layout)
 
         # ----------------- Action buttons ----------------- 
@@ -359,15 +447,61 @@ class MainWindow(QMainWindow):
         action_layout.addWidget(save_btn)
         settings_layout.addLayout(action_layout)
 
-        self.tab_widget.addTab(settings_widget, "Settings")
-
         # Save references
         self._auto_start_checkbox = auto_start_checkbox
         self._trigger_combo = trigger_combo
+        self._expansion_mode_combo = expansion_mode_combo
         self._shortcut_char_combo = shortcut_char_combo
+        self._suggestions_checkbox = suggestions_checkbox
+        self._insertion_combo = insertion_combo
+        self._pacing_combo = pacing_combo
+        self._storage_combo = storage_combo
 
         # Initialise UI with current config values
         self._reload_settings_ui()
+        return settings_widget
+
+    def create_statistics_tab(self):
+        """Creates the Statistics tab with live expansion latency percentiles."""
+        stats_widget = QWidget()
+        stats_layout = QVBoxLayout(stats_widget)
+
+        title = QLabel("Expansion latency")
+        title.setStyleSheet("font-size: 16px; font-weight: bold; margin: 4px;")
+        stats_layout.addWidget(title)
+
+        hint = QLabel("Measured from the trigger key until each stage finished, in milliseconds.")
+        hint.setWordWrap(True)
+        hint.setStyleSheet("color: gray; font-size: 11px; margin: 4px;")
+        stats_layout.addWidget(hint)
+
+        self.stats_table = QTableWidget()
+        self.stats_table.setColumnCount(6)
+        self.stats_table.setHorizontalHeaderLabels(["Stage", "Count", "p50", "p95", "p99", "Max"])
+        self.stats_table.verticalHeader().setVisible(False)
+        self.stats_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.stats_table.setSelectionMode(QTableWidget.SelectionMode.NoSelection)
+        self.stats_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        stats_layout.addWidget(self.stats_table)
+
+        self.stats_status_label = QLabel()
+        self.stats_status_label.setStyleSheet("color: gray; font-size: 11px; margin: 4px;")
+        stats_layout.addWidget(self.stats_status_label)
+
+        button_layout = QHBoxLayout()
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self._reset_statistics)
+        export_btn = QPushButton("Export JSON…")
+        export_btn.clicked.connect(self._export_statistics)
+        if self._metrics is None:
+            reset_btn.setEnabled(False)
+            export_btn.setEnabled(False)
+        button_layout.addStretch()
+        button_layout.addWidget(reset_btn)
+        button_layout.addWidget(export_btn)
+        stats_layout.addLayout(button_layout)
+
+        return stats_widget
 
     def create_about_tab(self):
         """Creates the About tab with a modern label-based layout (no text box)."""
@@ -441,13 +575,49 @@ class MainWindow(QMainWindow):
         about_layout.addWidget(contact_label)
 
         about_layout.addStretch()  # Push content to top
-
-        self.tab_widget.addTab(about_widget, "About")
+        return about_widget
+
+    # ---------------- Lazy tabs ----------------
+
+    def _add_lazy_tab(self, title, builder):
+        """Adds an empty page that *builder* fills in the first time it is shown; returns the page."""
+        page = QWidget()
+        layout = QVBoxLayout(page)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.tab_widget.addTab(page, title)
+        self._tab_builders[page] = builder
+        return page
+
+    def _ensure_tab_built(self, index):
+        page = self.tab_widget.widget(index)
+        builder = self._tab_builders.pop(page, None)
+        if builder is not None:
+            page.layout().addWidget(builder())
+
+    def showEvent(self, event):
+        self._ensure_tab_built(self.tab_widget.currentIndex())
+        super().showEvent(event)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            startup.mark("first_paint")
+            callbacks, self._paint_callbacks = self._paint_callbacks, []
+            for callback in callbacks:
+                QTimer.singleShot(0, callback)
+
+    def _after_first_paint(self, callback):
+        """Runs *callback* from the event loop once the window has painted at least once."""
+        if self._painted:
+            QTimer.singleShot(0, callback)
+        else:
+            self._paint_callbacks.append(callback)
 
     def setup_table(self):
         """Sets up the table with modern styling."""
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["#", "Shortcut", "Expansion"])
+        self.table.setColumnCount(4)
+        self.table.setHorizontalHeaderLabels(["#", "Shortcut", "Expansion", "Uses"])
         # Alternating row colors and other settings will be applied with apply_theme
         self.table.setAlternatingRowColors(True)
         vertical_header = self.table.verticalHeader()
@@ -459,9 +629,11 @@ class MainWindow(QMainWindow):
             header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
             header.setSectionResizeMode(1, QHeaderView.ResizeMode.Interactive)
             header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
-            header.setStretchLastSection(True)
+            header.setSectionResizeMode(3, QHeaderView.ResizeMode.Fixed)
+            header.setStretchLastSection(False)
         self.table.setColumnWidth(0, 50)
         self.table.setColumnWidth(1, 120)
+        self.table.setColumnWidth(3, 60)
         self.table.setSortingEnabled(True)
         self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
@@ -469,19 +641,32 @@ class MainWindow(QMainWindow):
 
     def populate_table(self):
         """Reads the data from snippets.json and populates the table."""
+        with startup.phase("populate_table"):
+            self._populate_table()
+        startup.mark("table_populated")
+
+    def _populate_table(self):
         self.table.setSortingEnabled(False) # Disable sorting during updates
 
-        snippets = self.snippet_manager.load_snippets()
+        # Expansions are decoded one preview at a time; full texts stay packed until needed
+        snippets = self.snippet_manager.load_packed()
+        self._table_snippets = snippets
         self.table.setRowCount(len(snippets))
+        # Usage counters kept by the engine; only the compacted summary and a short log tail are read
+        from clipdex_core.usage_log import UsageLog
+        usage = UsageLog(read_only=True).stats()
 
         row = 0
-        for idx, (shortcut, expansion) in enumerate(snippets.items(), start=1):
+        for idx, shortcut in enumerate(snippets, start=1):
             # Numbering column
             number_item = QTableWidgetItem(str(idx))
             number_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
 
             shortcut_item = QTableWidgetItem(shortcut)
-            expansion_item = QTableWidgetItem(expansion)
+            preview, truncated = snippets.preview(shortcut, self.PREVIEW_CHARS)
+            expansion_item = QTableWidgetItem(preview + "…" if truncated else preview)
+            # Marks rows whose full text has to be looked up (search, edit)
+            expansion_item.setData(Qt.ItemDataRole.UserRole, truncated)
             
             # Set text alignment for better readability
             shortcut_item.setTextAlignment(0x0001 | 0x0080)  # Left | VCenter
@@ -490,6 +675,15 @@ class MainWindow(QMainWindow):
             self.table.setItem(row, 0, number_item)
             self.table.setItem(row, 1, shortcut_item)
             self.table.setItem(row, 2, expansion_item)
+
+            # Numeric data so that sorting by this column orders by frequency
+            count, last_used = usage.get(shortcut, (0, 0.0))
+            uses_item = QTableWidgetItem()
+            uses_item.setData(Qt.ItemDataRole.DisplayRole, count)
+            uses_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+            if last_used:
+                uses_item.setToolTip("Last used " + datetime.fromtimestamp(last_used).strftime("%Y-%m-%d %H:%M"))
+            self.table.setItem(row, 3, uses_item)
             row += 1
 
         self.table.setSortingEnabled(True) # Re-enable sorting
@@ -514,9 +708,17 @@ class MainWindow(QMainWindow):
             should_show = (search_text == "" or 
                           search_text in shortcut_text or 
                           search_text in expansion_text)
+            if not should_show and expansion_item is not None and expansion_item.data(Qt.ItemDataRole.UserRole):
+                # Only a preview is shown; search the whole expansion
+                should_show = search_text in self._table_snippets.get(shortcut_item.text(), "").lower()
             
             self.table.setRowHidden(row, not should_show)
 
+    def _snippets_changed(self):
+        """Tells the engine to pick up saved snippets without waiting for its file watcher."""
+        if self._engine is not None:
+            self._engine.notify("reload")
+
     def add_snippet(self):
         """Opens the new snippet dialog."""
         dialog = SnippetDialog(self)
@@ -526,11 +728,9 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, "Warning", "Shortcut and text fields cannot be left blank.")
                 return
 
-            snippets = self.snippet_manager.load_snippets()
-            
             # Check if shortcut already exists
-            if data["shortcut"] in snippets:
-                existing_expansion = snippets[data["shortcut"]]
+            existing_expansion = self.snippet_manager.get_snippet(data["shortcut"])
+            if existing_expansion is not None:
                 reply = QMessageBox.question(
                     self, 
                     "Duplicate Shortcut", 
@@ -544,8 +744,8 @@ class MainWindow(QMainWindow):
                 if reply == QMessageBox.StandardButton.No:
                     return
             
-            snippets[data["shortcut"]] = data["expansion"]
-            self.snippet_manager.save_snippets(snippets)
+            self.snippet_manager.set_snippet(data["shortcut"], data["expansion"])
+            self._snippets_changed()
             self.populate_table()  # Refresh the table
 
     def edit_snippet(self):
@@ -563,7 +763,10 @@ class MainWindow(QMainWindow):
             return
 
         old_shortcut = item_shortcut.text()
-        expansion = item_expansion.text()
+        # The table may only hold a preview of long expansions
+        expansion = self.snippet_manager.get_snippet(old_shortcut)
+        if expansion is None:
+            expansion = item_expansion.text()
 
         dialog = SnippetDialog(self, shortcut=old_shortcut, expansion=expansion)
         if dialog.exec():
@@ -572,13 +775,9 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, "Warning", "Shortcut and text fields cannot be left blank.")
                 return
 
-            snippets = self.snippet_manager.load_snippets()
-            # Delete the old shortcut (if it was changed)
-            if old_shortcut in snippets:
-                del snippets[old_shortcut]
-
-            snippets[data["shortcut"]] = data["expansion"]
-            self.snippet_manager.save_snippets(snippets)
+            # Replaces the old shortcut (if it was changed)
+            self.snippet_manager.set_snippet(data["shortcut"], data["expansion"], replaces=old_shortcut)
+            self._snippets_changed()
             self.populate_table()
 
     def delete_snippet(self):
@@ -601,12 +800,37 @@ class MainWindow(QMainWindow):
                                      QMessageBox.StandardButton.No)
 
         if reply == QMessageBox.StandardButton.Yes:
-            snippets = self.snippet_manager.load_snippets()
-            if shortcut in snippets:
-                del snippets[shortcut]
-                self.snippet_manager.save_snippets(snippets)
+            if self.snippet_manager.delete_snippet(shortcut):
+                self._snippets_changed()
                 self.populate_table()
 
+    def snippet_history(self):
+        """Lists the earlier versions of the selected shortcut and restores the chosen one."""
+        current_row = self.table.currentRow()
+        item_shortcut = self.table.item(current_row, 1) if current_row >= 0 else None
+        if item_shortcut is None:
+            QMessageBox.warning(self, "Warning", "Please select a shortcut to see its history.")
+            return
+
+        shortcut = item_shortcut.text()
+        versions = self.snippet_manager.history.versions(shortcut)[1:]  # The first one is the current text
+        if not versions:
+            QMessageBox.information(self, "History", f"'{shortcut}' has no earlier versions.")
+            return
+        labels = [f"{datetime.fromtimestamp(stamp):%Y-%m-%d %H:%M}  " +
+                  ("(deleted)" if text is None else text[:60].replace("\n", " ")) + f"  (#{revision})"
+                  for revision, stamp, _, text in versions]
+        label, ok = QInputDialog.getItem(self, "History", f"Restore '{shortcut}' to:", labels, 0, False)
+        if not ok:
+            return
+        text = versions[labels.index(label)][3]
+        if text is None:
+            self.snippet_manager.delete_snippet(shortcut)
+        else:
+            self.snippet_manager.set_snippet(shortcut, text)
+        self._snippets_changed()
+        self.populate_table()
+
     def update_selected_font(self):
         """Update the font of the selected row to bold"""
         for row in range(self.table.rowCount()):
@@ -639,8 +863,10 @@ class MainWindow(QMainWindow):
             if clicked_widget is None:
                 return super().eventFilter(watched, event)
 
-            # Protected widget list (table + buttons)
-            protected_widgets = (self.table, self.add_btn, self.edit_btn, self.delete_btn)
+            # Protected widget list (table + buttons); nothing to protect before the tab is built
+            if getattr(self, "table", None) is None:
+                return super().eventFilter(watched, event)
+            protected_widgets = (self.table, self.add_btn, self.edit_btn, self.delete_btn, self.history_btn)
 
             def is_descendant_of_any(widget, parents):
                 if widget is None:
@@ -763,13 +989,17 @@ class MainWindow(QMainWindow):
             icns_path = base_dir / "icon_package" / "app_icon.icns" if (base_dir / "icon_package" / "app_icon.icns").exists() else base_dir / "app_icon.icns"
             return QIcon(str(icns_path))
 
-        # Linux / other – compose icon from the provided PNGs
+        # Linux / other – compose icon from the PNGs at the resolutions actually displayed
         icon = QIcon()
         pkg_dir = base_dir / "icon_package"
-        for size in [16, 24, 32, 48, 64, 128, 256, 512, 1024]:
-            png_path = pkg_dir / f"icon_{size}x{size}.png"
-            if png_path.exists():
-                icon.addFile(str(png_path), QSize(size, size))
+        available = [size for size in (16, 24, 32, 48, 64, 128, 256, 512, 1024)
+                     if (pkg_dir / f"icon_{size}x{size}.png").exists()]
+        chosen = set()
+        for wanted in self._displayed_icon_sizes():
+            # Smallest file that is at least as large, so nothing is scaled up
+            chosen.add(next((size for size in available if size >= wanted), available[-1] if available else None))
+        for size in sorted(size for size in chosen if size is not None):
+            icon.addFile(str(pkg_dir / f"icon_{size}x{size}.png"), QSize(size, size))
         # Fallback to a single PNG in assets root if multi-resolution set is missing
         if icon.isNull():
             fallback_png = base_dir / "app_icon.png"
@@ -777,6 +1007,16 @@ class MainWindow(QMainWindow):
                 icon = QIcon(str(fallback_png))
         return icon
 
+    def _displayed_icon_sizes(self):
+        """Pixel sizes the window icon is drawn at: title bar and task switcher, on this screen."""
+        app = QApplication.instance()
+        if app is None:
+            return [32]
+        ratio = app.devicePixelRatio()
+        style = app.style()
+        return [round(style.pixelMetric(QStyle.PixelMetric.PM_SmallIconSize) * ratio),
+                round(style.pixelMetric(QStyle.PixelMetric.PM_LargeIconSize) * ratio)]
+
     def _get_tray_icon(self) -> QIcon:
         """Returns an appropriate QIcon for system tray based on the platform."""
         pkg_dir = self._assets_dir() / "icon_package"
@@ -793,6 +1033,9 @@ class MainWindow(QMainWindow):
 
     # ---------------- Settings helpers ----------------
 
+    # Pacing profile names in the order of the Settings combo box
+    _PACING_PROFILES = ("auto", "fast", "balanced", "safe", "custom")
+
     # Common registry path constant (HKCU)
     _RUN_REG_PATH = r"Software\Microsoft\Windows\CurrentVersion\Run"
 
@@ -826,21 +1069,7 @@ class MainWindow(QMainWindow):
         self.config_manager.set("auto_start", enabled)
 
         if sys.platform.startswith("win"):
-            try:
-                import winreg  # type: ignore
-
-                # Create (or open) the Run key with write access
-                with winreg.CreateKey(winreg.HKEY_CURRENT_USER, self._RUN_REG_PATH) as key:
-                    if enabled:
-                        exe_path = sys.argv[0]
-                        winreg.SetValueEx(key, "Clipdex", 0, winreg.REG_SZ, exe_path)
-                    else:
-                        try:
-                            winreg.DeleteValue(key, "Clipdex")
-                        except FileNotFoundError:
-                            pass
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Auto-start registry update failed:\n{e}")
+            self._update_auto_start_registry(enabled)
         elif sys.platform == "darwin":
             self._update_macos_auto_start(enabled)
         else:
@@ -868,22 +1097,159 @@ class MainWindow(QMainWindow):
         """Imports snippets from a JSON file chosen by the user."""
         src, _ = QFileDialog.getOpenFileName(self, "Import Snippets", "", "JSON Files (*.json)")
         if src:
-            try:
-                with open(src, "r", encoding="utf-8") as f:
-                    snippets = json.load(f)
-                if not isinstance(snippets, dict):
-                    raise ValueError("Invalid file format")
-                # Merge with existing snippets (overwrite duplicates)
-                current = self.snippet_manager.load_snippets()
-                current.update(snippets)
-                self.snippet_manager.save_snippets(current)
+            from clipdex_core.snippet_import import ImportCancelled, SnippetImporter
+            # Parsed and merged (overwriting duplicates) on a worker thread, saved once at the end
+            dialog = ImportProgressDialog(SnippetImporter(self.snippet_manager, src), self)
+            dialog.exec()
+            if isinstance(dialog.error, ImportCancelled):
+                return
+            if dialog.error is not None:
+                QMessageBox.warning(self, "Error", f"An error occurred while importing:\n{dialog.error}")
+                return
+            imported, skipped = dialog.import_result
+            self._snippets_changed()
+            if getattr(self, "table", None) is not None:
                 self.populate_table()
-                QMessageBox.information(self, "Success", "Snippets imported successfully.")
+            message = f"{imported:,} snippets imported successfully."
+            if skipped:
+                message += f"\n{skipped:,} entries without a shortcut or text were skipped."
+            QMessageBox.information(self, "Success", message)
+
+    def _restore_backup(self):
+        """Replaces the snippets with an automatic backup chosen by the user."""
+        from clipdex_core.backups import BackupManager
+        try:
+            backups = BackupManager()
+            points = backups.points()[::-1]  # Newest first
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Could not read the backups:\n{e}")
+            return
+        if not points:
+            QMessageBox.information(self, "Info", "There are no backups yet.")
+            return
+        labels = [f"{datetime.fromtimestamp(stamp):%Y-%m-%d %H:%M}  (#{seq})" for seq, stamp, _ in points]
+        label, ok = QInputDialog.getItem(self, "Restore Backup", "Restore snippets as they were on:", labels, 0, False)
+        if not ok:
+            return
+        seq = points[labels.index(label)][0]
+        reply = QMessageBox.question(self, "Restore Backup",
+                                     "Replace all current snippets with this backup?\n"
+                                     "The current snippets are backed up first.",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            count = backups.restore(self.snippet_manager, seq)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Error", f"An error occurred while restoring:\n{e}")
+            return
+        self._snippets_changed()
+        if getattr(self, "table", None) is not None:
+            self.populate_table()
+        QMessageBox.information(self, "Success", f"{count:,} snippets restored.")
+
+    def _restore_history(self):
+        """Puts all snippets back to how they were right after a recent change."""
+        changes = self.snippet_manager.history.recent()
+        if len(changes) < 2:
+            QMessageBox.information(self, "Info", "There are no earlier changes to go back to.")
+            return
+        labels = [f"{datetime.fromtimestamp(stamp):%Y-%m-%d %H:%M}  " +
+                  (f"{count:,} snippets changed" if count > 1 else
+                   f"'{shortcut}' " + ("deleted" if text is None else "saved")) + f"  (#{revision})"
+                  for revision, stamp, count, shortcut, text in changes[1:]]
+        label, ok = QInputDialog.getItem(self, "Undo Changes", "Restore all snippets to how they were after:",
+                                         labels, 0, False)
+        if not ok:
+            return
+        revision = changes[1:][labels.index(label)][0]
+        reply = QMessageBox.question(self, "Undo Changes",
+                                     "Undo every change made after this one?\n"
+                                     "The undo itself is kept in the history.",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        snippets = self.snippet_manager.history.snapshot(revision)
+        self.snippet_manager.save_snippets(snippets)
+        self._snippets_changed()
+        if getattr(self, "table", None) is not None:
+            self.populate_table()
+        QMessageBox.information(self, "Success", f"{len(snippets):,} snippets restored.")
+
+    # ---------------- Statistics ----------------
+    def _on_tab_changed(self, index: int):
+        self._ensure_tab_built(index)
+        if self.tab_widget.widget(index) is self._stats_tab:
+            self._refresh_statistics()
+            self._stats_timer.start(self.STATS_REFRESH_MS)
+        else:
+            self._stats_timer.stop()
+
+    def _refresh_statistics(self):
+        """Fills the statistics table from the latest metrics snapshot."""
+        if self._metrics is None:
+            self.stats_table.setRowCount(0)
+            self.stats_status_label.setText("The keyboard engine is not running.")
+            return
+        try:
+            snapshot = self._metrics.snapshot()
+        except Exception as e:
+            self.stats_status_label.setText(f"Statistics unavailable: {e}")
+            return
+        stages = snapshot.get("stages", {})
+        self.stats_table.setRowCount(len(stages))
+        for row, (stage, stats) in enumerate(stages.items()):
+            values = [stage.capitalize(), str(stats["count"])]
+            for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms"):
+                values.append(f"{stats[key]:.1f}" if stats["count"] else "–")
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.stats_table.setItem(row, column, item)
+        expansions = stages.get("write", {}).get("count", 0)
+        self.stats_status_label.setText(f"{expansions} expansions recorded")
+
+    def _reset_statistics(self):
+        if self._metrics is None:
+            return
+        self._metrics.reset()
+        self._refresh_statistics()
+
+    def _export_statistics(self):
+        """Exports the current metrics snapshot to a user-selected JSON file."""
+        if self._metrics is None:
+            return
+        dest, _ = QFileDialog.getSaveFileName(self, "Export Statistics", "clipdex_statistics.json", "JSON Files (*.json)")
+        if dest:
+            try:
+                with open(dest, "w", encoding="utf-8") as f:
+                    json.dump(self._metrics.snapshot(), f, indent=4)
+                QMessageBox.information(self, "Success", "Statistics exported successfully.")
             except Exception as e:
-                QMessageBox.warning(self, "Error", f"An error occurred while importing:\n{e}")
+                QMessageBox.warning(self, "Error", f"An error occurred while exporting:\n{e}")
 
     # ---------------- Settings save / cancel ----------------
 
+    def _sync_auto_start(self):
+        """
+        Makes the platform auto-start entry match the config. Enabled entries are
+        rewritten too, so ones from older versions launch the headless engine.
+        """
+        enabled_cfg = bool(self.config_manager.get("auto_start", False))
+        if sys.platform.startswith("win"):
+            reg_enabled = self._is_auto_start_enabled()
+            if reg_enabled != enabled_cfg or enabled_cfg:
+                self._update_auto_start_registry(enabled_cfg)
+        elif sys.platform == "darwin":
+            macos_enabled = self._is_auto_start_enabled()
+            if macos_enabled != enabled_cfg or enabled_cfg:
+                self._update_macos_auto_start(enabled_cfg)
+        else:
+            linux_enabled = self._is_auto_start_enabled()
+            if linux_enabled != enabled_cfg or enabled_cfg:
+                self._update_linux_auto_start(enabled_cfg)
+
     def _reload_settings_ui(self):
         """Syncs the Settings controls with current config values."""
         # 1) Auto-start: Read from config
@@ -899,29 +1265,28 @@ class MainWindow(QMainWindow):
         else:
             self._theme_combo.setCurrentIndex(2)
 
-        # 3) Sync with platform-specific auto-start (all platforms)
-        if sys.platform.startswith("win"):
-            reg_enabled = self._is_auto_start_enabled()
-            if reg_enabled != enabled_cfg:
-                self._update_auto_start_registry(enabled_cfg)
-        elif sys.platform == "darwin":
-            macos_enabled = self._is_auto_start_enabled()
-            if macos_enabled != enabled_cfg:
-                self._update_macos_auto_start(enabled_cfg)
-        else:
-            linux_enabled = self._is_auto_start_enabled()
-            if linux_enabled != enabled_cfg:
-                self._update_linux_auto_start(enabled_cfg)
-
-        # 4) Trigger key
+        # 3) Trigger key
         current_trigger = self.config_manager.get("trigger_key", "space").lower()
         self._trigger_combo.setCurrentIndex(0 if current_trigger == "space" else 1)
+        expansion_mode = self.config_manager.get("expansion_mode", "trigger")
+        self._expansion_mode_combo.setCurrentIndex(1 if expansion_mode == "instant" else 0)
 
-        # 5) Shortcut character
+        # 4) Shortcut character
         current_shortcut_char = self.config_manager.get("shortcut_character", ":")
         shortcut_char_index = self._shortcut_char_combo.findText(current_shortcut_char)
         if shortcut_char_index >= 0:
             self._shortcut_char_combo.setCurrentIndex(shortcut_char_index)
+        self._suggestions_checkbox.setChecked(bool(self.config_manager.get("suggestions_enabled", True)))
+
+        # 5) Insertion method
+        strategy = self.config_manager.get("injection_strategy", "auto")
+        self._insertion_combo.setCurrentIndex({"auto": 0, "type": 1, "paste": 2}.get(strategy, 0))
+        pacing = self.config_manager.get("pacing_profile", "auto")
+        self._pacing_combo.setCurrentIndex(self._PACING_PROFILES.index(pacing) if pacing in self._PACING_PROFILES else 0)
+
+        # 6) Snippet storage
+        storage = self.config_manager.get("snippet_storage", "json")
+        self._storage_combo.setCurrentIndex(STORAGE_ENGINES.index(storage) if storage in STORAGE_ENGINES else 0)
 
     def _save_settings(self):
         """Applies changes only when user presses Save."""
@@ -955,10 +1320,40 @@ class MainWindow(QMainWindow):
         # Trigger key
         trig = "space" if self._trigger_combo.currentIndex() == 0 else "enter"
         self.config_manager.set("trigger_key", trig)
+        expansion_mode = "instant" if self._expansion_mode_combo.currentIndex() == 1 else "trigger"
+        self.config_manager.set("expansion_mode", expansion_mode)
 
         # Shortcut character
         shortcut_char = self._shortcut_char_combo.currentText()
         self.config_manager.set("shortcut_character", shortcut_char)
+        self.config_manager.set("suggestions_enabled", self._suggestions_checkbox.isChecked())
+
+        # Insertion method
+        strategy = ("auto", "type", "paste")[self._insertion_combo.currentIndex()]
+        self.config_manager.set("injection_strategy", strategy)
+        self.config_manager.set("pacing_profile", self._PACING_PROFILES[self._pacing_combo.currentIndex()])
+
+        # Snippet storage: open (and, the first time, migrate to) the new engine before
+        # the engine process sees the setting
+        storage = STORAGE_ENGINES[self._storage_combo.currentIndex()]
+        if storage != self.snippet_manager.storage:
+            manager = None
+            try:
+                manager = SnippetManager(storage=storage, keep_history=True)
+                # Carry the library over, so edits made since the last switch are not left behind
+                snippets = self.snippet_manager.load_snippets()
+                if manager.load_snippets() != snippets:
+                    manager.save_snippets(snippets)
+            except Exception as e:
+                if manager is not None:
+                    manager.close()
+                QMessageBox.warning(self, "Error", f"Could not open the snippet storage:\n{e}")
+            else:
+                self.snippet_manager.close()
+                self.snippet_manager = manager
+                self.config_manager.set("snippet_storage", storage)
+                if getattr(self, "table", None) is not None:
+                    self.populate_table()
 
         QMessageBox.information(self, "Settings", "Changes saved successfully.")
 
@@ -973,13 +1368,16 @@ class MainWindow(QMainWindow):
         if not sys.platform.startswith("win"):
             return
         try:
+            import subprocess
             import winreg  # type: ignore
+            from clipdex_core.engine_ipc import headless_command
 
             # Create (or open) the Run key with write access
             with winreg.CreateKey(winreg.HKEY_CURRENT_USER, self._RUN_REG_PATH) as key:
                 if enabled:
-                    exe_path = sys.argv[0]
-                    winreg.SetValueEx(key, "Clipdex", 0, winreg.REG_SZ, exe_path)
+                    # Log-in starts only the headless engine; the window opens on demand
+                    command = subprocess.list2cmdline(headless_command())
+                    winreg.SetValueEx(key, "Clipdex", 0, winreg.REG_SZ, command)
                 else:
                     try:
                         winreg.DeleteValue(key, "Clipdex")
@@ -997,12 +1395,12 @@ class MainWindow(QMainWindow):
             plist_path = launch_agents_dir / "com.clipdex.plist"
             
             if enabled:
-                # Get the executable path
-                exe_path = sys.argv[0]
-                if exe_path.endswith('.py'):
-                    # If running as script, use python to run it
-                    exe_path = f"{sys.executable} {exe_path}"
-                
+                # Log-in starts only the headless engine; the window opens on demand
+                from xml.sax.saxutils import escape
+                from clipdex_core.engine_ipc import headless_command
+                arguments = "\n".join(f"        <string>{escape(argument)}</string>"
+                                      for argument in headless_command())
+
                 # Create LaunchAgent plist content
                 plist_content = f'''<?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
@@ -1012,8 +1410,7 @@ class MainWindow(QMainWindow):
     <string>com.clipdex</string>
     <key>ProgramArguments</key>
     <array>
-        <string>{sys.executable}</string>
-        <string>{sys.argv[0]}</string>
+{arguments}
     </array>
     <key>RunAtLoad</key>
     <true/>
@@ -1041,12 +1438,11 @@ class MainWindow(QMainWindow):
             desktop_entry_path = autostart_dir / "clipdex.desktop"
             
             if enabled:
-                # Get the executable path
-                exe_path = sys.argv[0]
-                if exe_path.endswith('.py'):
-                    # If running as script, use python to run it
-                    exe_path = f"{sys.executable} {exe_path}"
-                
+                # Log-in starts only the headless engine; the window opens on demand
+                from clipdex_core.engine_ipc import headless_command
+                exe_path = " ".join(f'"{argument}"' if " " in argument else argument
+                                    for argument in headless_command())
+
                 # Create desktop entry content
                 desktop_content = f"""[Desktop Entry]
 Type=Application
@@ -1097,6 +1493,8 @@ X-GNOME-Autostart-enabled=true
         self.tray_icon.show()
 
     def apply_theme(self, theme_name):
+        if getattr(self, "table", None) is None:
+            return  # Applied when the Shortcuts tab is built
         theme = get_theme(theme_name)
         # Tablo stili
         self.table.setStyleSheet(f"""
@@ -1190,6 +1588,7 @@ X-GNOME-Autostart-enabled=true
         self.add_btn.setStyleSheet(btn_style)
         self.edit_btn.setStyleSheet(btn_style)
         self.delete_btn.setStyleSheet(btn_style)
+        self.history_btn.setStyleSheet(btn_style)
         # Test kutusu
         self.test_textbox.setStyleSheet(f"""
             QTextEdit {{
@@ -1208,10 +1607,15 @@ X-GNOME-Autostart-enabled=true
         # Kısa yol sayısı etiketi
         self.count_label.setStyleSheet(f"color: gray; font-size: 11px; margin: 4px; background: transparent;")
 
+    def _on_config_changed(self, config):
+        """Caches config values derived by the window; may run outside the GUI thread."""
+        self._theme_pref = config.get("theme", "system")
+
     def _check_system_theme_change(self):
         """Sistem teması değişikliklerini kontrol eder ve gerekirse günceller."""
-        current_theme = self.config_manager.get("theme", "system")
-        if current_theme == "system":
+        # Pick up edits made to config.json outside the application
+        self.config_manager.refresh()
+        if self._theme_pref == "system":
             # Sistem teması ayarlanmışsa, değişiklikleri kontrol et
             detected_theme = detect_system_theme()
             self.apply_theme(detected_theme)
@@ -0,0 +1,76 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QListWidget, QListWidgetItem
+from PyQt6.QtCore import Qt, QPoint, pyqtSignal
+from PyQt6.QtGui import QCursor
+
+
+class SuggestionPopup(QWidget):
+    """
+    Small always-on-top list of matching snippets, shown while a shortcut is typed.
+
+    The popup never takes keyboard focus, so typing continues in the target
+    application; clicking a suggestion expands it right away.
+    """
+
+    MAX_PREVIEW = 40  # Characters of the expansion shown next to each shortcut
+
+    # Emitted from the keyboard thread, delivered on the GUI thread
+    suggestionsChanged = pyqtSignal(str, list)
+
+    def __init__(self, on_select):
+        super().__init__(None, Qt.WindowType.ToolTip
+                         | Qt.WindowType.FramelessWindowHint
+                         | Qt.WindowType.WindowStaysOnTopHint
+                         | Qt.WindowType.WindowDoesNotAcceptFocus)
+        self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating)
+        self._on_select = on_select
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self._list = QListWidget()
+        self._list.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self._list.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self._list.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self._list.setStyleSheet("""
+            QListWidget {
+                border: 1px solid palette(mid);
+                border-radius: 6px;
+                background-color: palette(base);
+                color: palette(text);
+                font-size: 13px;
+                font-family: 'Segoe UI', Arial, sans-serif;
+            }
+            QListWidget::item { padding: 4px 8px; }
+            QListWidget::item:hover { background-color: palette(highlight); color: palette(highlighted-text); }
+        """)
+        self._list.itemClicked.connect(self._select)
+        layout.addWidget(self._list)
+
+        self.suggestionsChanged.connect(self._show_suggestions)
+
+    def post(self, prefix, items):
+        """Thread-safe entry point for ClipdexListener.on_suggestions."""
+        self.suggestionsChanged.emit(prefix, items)
+
+    def _show_suggestions(self, prefix, items):
+        if not items:
+            self.hide()
+            return
+        self._list.clear()
+        for shortcut, expansion in items:
+            preview = expansion.splitlines()[0] if expansion else ""
+            if len(preview) > self.MAX_PREVIEW:
+                preview = preview[:self.MAX_PREVIEW - 1] + "…"
+            item = QListWidgetItem(f"{shortcut}   {preview}")
+            item.setData(Qt.ItemDataRole.UserRole, shortcut)
+            item.setToolTip(expansion)
+            self._list.addItem(item)
+        row_height = self._list.sizeHintForRow(0)
+        self.resize(320, row_height * len(items) + 8)
+        if not self.isVisible():
+            # Caret positions of other applications are not available; follow the mouse pointer
+            self.move(QCursor.pos() + QPoint(16, 20))
+            self.show()
+
+    def _select(self, item):
+        self.hide()
+        self._on_select(item.data(Qt.ItemDataRole.UserRole))
@@ -1,28 +1,53 @@
 import sys
-import threading
-from PyQt6.QtWidgets import QApplication, QMessageBox
 
-from clipdex_gui.main_window import MainWindow
-from clipdex_core.listener import ClipdexListener
+from clipdex_core import startup
+from clipdex_core.engine_ipc import (EngineClient, EngineServer, EngineSupervisor, RemoteMetrics,
+                                     headless_command)
 
-# Run the backend listener
-def run_backend_listener():
+# Run the keyboard engine (headless, or in its own process under the GUI)
+def run_engine():
     """
-    Starts and keeps the Clipdex keyboard listener running.
+    Starts the Clipdex keyboard listener and serves it to GUI front ends until it is stopped.
+    Only clipdex_core is imported; PyQt6 is never loaded in this process.
     """
-    print("Backend listener thread started...")
+    from clipdex_core.backups import BackupScheduler
+    from clipdex_core.listener import ClipdexListener
+
+    print("Clipdex engine started (headless)...")
     try:
-        clipdex_engine = ClipdexListener()
-        clipdex_engine.start()
-        clipdex_engine.join() # Wait for the thread to finish
-        print("Backend listener thread finished.")
+        with startup.phase("listener_init"):
+            clipdex_engine = ClipdexListener()
+        with startup.phase("ipc_server"):
+            server = EngineServer(clipdex_engine)
+            server.start()
+    except Exception as e:
+        print(f"Listener error: {e}")
+        return 1
+    backups = None
+    try:
+        with startup.phase("listener_start"):
+            clipdex_engine.start()
+        # From here on a typed shortcut expands
+        startup.mark("expansion_ready")
+        # Storage switches replace the manager, so look it up at every backup
+        backups = BackupScheduler(lambda: clipdex_engine.snippet_manager, clipdex_engine.config_manager)
+        backups.start()
+        clipdex_engine.join()  # Returns once a front end asks the engine to stop
+        print("Clipdex engine finished.")
     except Exception as e:
         print(f"Listener error: {e}")
         if sys.platform == "darwin":
             print("Check Accessibility permissions on macOS!")
+    finally:
+        if backups is not None:
+            backups.stop()
+        server.close()
+    return 0
 
 def show_macos_permission_dialog():
     """Show a dialog explaining MacOS permissions."""
+    from PyQt6.QtWidgets import QMessageBox
+
     msg = QMessageBox()
     msg.setIcon(QMessageBox.Icon.Information)
     msg.setWindowTitle("macOS Permissions")
@@ -39,24 +64,52 @@ def show_macos_permission_dialog():
 def main():
     """
     The main entry point of the application.
-    Starts the GUI and runs the backend in a separate thread.
+
+    ``--headless`` runs only the keyboard engine. Otherwise the GUI starts as a
+    front end: it attaches to a running engine, or starts one and supervises it.
+    ``--tray`` starts the GUI hidden in the system tray. ``--profile-startup``
+    (or CLIPDEX_PROFILE_STARTUP) writes start-up timing reports, see clipdex_core.startup.
     """
+    headless = "--headless" in sys.argv[1:]
+    startup.enable("engine" if headless else "gui")
+    if headless:
+        sys.exit(run_engine())
+
+    with startup.phase("gui_imports"):
+        from PyQt6.QtWidgets import QApplication
+        from clipdex_gui.main_window import MainWindow
+        from clipdex_gui.suggestion_popup import SuggestionPopup
+        from clipdex_gui.dialogs import TemplatePrompt
+
     # Check if we're on MacOS and show permission info if needed
     if sys.platform == "darwin":
         print("macOS detected - Checking permissions...")
-    
-    # 1. Start the backend listener in a separate daemon thread
-    # daemon=True, the main application (GUI) will automatically close this thread when it exits.
-    listener_thread = threading.Thread(target=run_backend_listener, daemon=True)
-    listener_thread.start()
 
-    # 2. Start the PyQt GUI application
-    app = QApplication(sys.argv)
-    window = MainWindow()
-    window.show()
+    # 1. Start the PyQt GUI application
+    with startup.phase("qt_application"):
+        app = QApplication(sys.argv)
+
+    # 2. Attach to the engine process, starting it if needed.
+    # Completions shown while a shortcut is being typed, and values for {prompt:Name} placeholders
+    engine_client = EngineClient()
+    suggestion_popup = SuggestionPopup(
+        on_select=lambda shortcut: engine_client.notify("expand_suggestion", shortcut=shortcut))
+    template_prompt = TemplatePrompt()
+    engine_client.on_suggestions = suggestion_popup.post
+    engine_client.on_prompt = template_prompt.ask
+    supervisor = EngineSupervisor(engine_client, headless_command())
+    with startup.phase("engine_attach"):
+        if not supervisor.start():
+            print("Clipdex engine is not reachable yet; it will be retried in the background.")
+    app.aboutToQuit.connect(supervisor.stop)
+
+    with startup.phase("main_window"):
+        window = MainWindow(metrics=RemoteMetrics(engine_client), engine=engine_client)
+    if "--tray" not in sys.argv[1:] or getattr(window, "tray_icon", None) is None:
+        window.show()
 
     # Start the application loop and wait for the exit code
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,120 @@
+import time
+
+import pytest
+
+from clipdex_core.backends.memory import MemoryBackend, event_for_char
+from clipdex_core.config_manager import ConfigManager
+from clipdex_core.listener import ClipdexListener
+from clipdex_core.snippet_manager import SnippetManager
+from clipdex_core.usage_log import UsageLog
+
+
+@pytest.fixture
+def make_listener(tmp_path):
+    """Starts a listener on the memory backend with *snippets*; stopped after the test."""
+    listeners = []
+
+    def make(snippets, **config):
+        snippet_manager = SnippetManager(tmp_path / "snippets.json")
+        snippet_manager.save_snippets(snippets)
+        config_manager = ConfigManager(tmp_path / "config.json")
+        config_manager.set("pacing_profile", "fast")
+        for key, value in config.items():
+            config_manager.set(key, value)
+        backend = MemoryBackend()
+        listener = ClipdexListener(backend=backend, snippet_manager=snippet_manager,
+                                   config_manager=config_manager, usage_log=UsageLog(tmp_path / "usage.log"))
+        listener.start()
+        listeners.append(listener)
+        return listener, backend
+
+    yield make
+    for listener in listeners:
+        listener.stop()
+        listener.join()
+
+
+def _wait_idle(listener, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    time.sleep(0.01)  # Let the injection thread pick up a job that was just queued
+    while listener.injector.busy:
+        assert time.monotonic() < deadline, "injection did not finish"
+        time.sleep(0.001)
+
+
+def test_expansion(make_listener):
+    listener, backend = make_listener({"hi": "Hello, world!"})
+    backend.type("Say :hi ")
+    _wait_idle(listener)
+    assert backend.text == "Say Hello, world!"
+
+
+def test_unknown_shortcut_is_left_alone(make_listener):
+    listener, backend = make_listener({"hi": "Hello, world!"})
+    backend.type(":ho ")
+    _wait_idle(listener)
+    assert backend.text == ":ho "
+
+
+def test_backspace_reverts_expansion(make_listener):
+    listener, backend = make_listener({"hi": "Hello, world!"})
+    backend.type("Say :hi ")
+    _wait_idle(listener)
+    backend.press("backspace")
+    _wait_idle(listener)
+    assert backend.text == "Say :hi"
+
+
+def test_cursor_placeholder(make_listener):
+    listener, backend = make_listener({"fn": "def ():{cursor} pass"})
+    backend.type(":fn ")
+    _wait_idle(listener)
+    assert backend.text == "def (): pass"
+    backend.type("x")
+    assert backend.text == "def ():x pass"
+
+
+@pytest.mark.parametrize("expansion", ["done 👍🏽", "👨‍👩‍👧", "été"])
+def test_revert_after_grapheme_clusters(make_listener, expansion):
+    listener, backend = make_listener({"ok": expansion})
+    backend.type(":ok ")
+    _wait_idle(listener)
+    assert backend.text == expansion
+    # Backspace removes the whole last cluster; the revert must not leave half of it behind
+    backend.press("backspace")
+    _wait_idle(listener)
+    assert backend.text == ":ok"
+
+
+def test_long_expansion_is_pasted(make_listener):
+    listener, backend = make_listener({"long": "x" * 3000})
+    clipboard = backend.clipboard
+    clipboard.set_text("previous")
+    placed = []
+    set_text = clipboard.set_text
+    clipboard.set_text = lambda text: placed.append(text) or set_text(text)
+    backend.type(":long ")
+    _wait_idle(listener)
+    assert backend.text == "x" * 3000
+    # Pasted in one go, then the user's clipboard was put back
+    assert placed == ["x" * 3000, "previous"]
+    assert clipboard.get_text() == "previous"
+
+
+def test_instant_mode(make_listener):
+    listener, backend = make_listener({"brb": "be right back"}, expansion_mode="instant")
+    backend.type("ok brb")
+    _wait_idle(listener)
+    assert backend.text == "ok be right back"
+    backend.press("backspace")
+    _wait_idle(listener)
+    assert backend.text == "ok brb"
+
+
+def test_keys_injected_by_other_tools_expand(make_listener):
+    # On-screen keyboards and remote sessions inject keys too; only Clipdex's own echoes are skipped
+    listener, backend = make_listener({"hi": "Hello, world!"})
+    for char in ":hi ":
+        backend.source.emit(event_for_char(char, injected=True))
+    _wait_idle(listener)
+    assert backend.text == "Hello, world!"
@@ -0,0 +1,42 @@
+import json
+
+from clipdex_core.snippet_import import SnippetImporter
+from clipdex_core.snippet_manager import SnippetManager
+
+
+def _manager(tmp_path, snippets):
+    filepath = tmp_path / "snippets.json"
+    SnippetManager(filepath).save_snippets(snippets)
+    return SnippetManager(filepath, keep_history=True)
+
+
+def test_restore_right_after_seeding(tmp_path):
+    manager = _manager(tmp_path, {"a": "1", "b": "2"})
+    manager.set_snippet("c", "3")
+    history = manager.history
+
+    points = history.recent()
+    assert [(revision, count) for revision, _, count, _, _ in points] == [(2, 1), (1, 2)]
+    assert history.snapshot(1) == {"a": "1", "b": "2"}
+    assert history.snapshot(2) == {"a": "1", "b": "2", "c": "3"}
+    manager.close()
+
+
+def test_restore_after_multi_snippet_import(tmp_path):
+    manager = _manager(tmp_path, {"a": "1"})
+    manager.set_snippet("a", "2")
+    source = tmp_path / "import.json"
+    source.write_text(json.dumps({"x": "X", "y": "Y", "z": "Z"}), encoding="utf-8")
+    SnippetImporter(manager, source).run()
+    manager.delete_snippet("x")
+    history = manager.history
+
+    points = history.recent()
+    assert [count for _, _, count, _, _ in points] == [1, 3, 1, 1]
+    imported = points[1][0]
+    assert history.snapshot(imported) == {"a": "2", "x": "X", "y": "Y", "z": "Z"}
+    # The restore itself is one more revision, with every snippet it brought back
+    manager.save_snippets(history.snapshot(imported))
+    assert manager.load_snippets() == {"a": "2", "x": "X", "y": "Y", "z": "Z"}
+    assert history.recent(1)[0][2:4] == (1, "x")
+    manager.close()